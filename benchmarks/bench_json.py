@@ -0,0 +1,104 @@
+"""
+Benchmark decoding of large /mcp/information responses.
+
+Compares buffering the whole body and decoding it (standard library and,
+when installed, orjson) against decoding it while it streams in, on
+synthetic responses of a few megabytes. Reports the time and the peak
+memory allocated to turn the body into the list of page contents.
+
+Usage:
+    python benchmarks/bench_json.py [--sizes 2 8 32] [--repeat 5] [--chunk-size 65536]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from typing import AsyncIterator, Callable, List
+
+from huuh_mcp.huuh.decoding import _orjson_loads, collect_field
+
+
+def make_response(size_mb: float, seed: int = 0) -> bytes:
+    """Build a synthetic /mcp/information response body of about size_mb megabytes."""
+    rnd = random.Random(seed)
+    words = [f"word{i}" for i in range(5000)]
+    documents = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        document = {
+            "page_content": " ".join(rnd.choices(words, k=150)),
+            "metadata": {
+                "course_id": "course-1",
+                "file_id": f"file-{rnd.randrange(10 ** 6)}",
+                "module": rnd.randrange(20),
+                "page": rnd.randrange(500),
+                "score": rnd.random(),
+                "embedding": [round(rnd.uniform(-1, 1), 6) for _ in range(64)],
+                "headings": [" ".join(rnd.choices(words, k=5)) for _ in range(3)],
+            },
+        }
+        documents.append(document)
+        size += len(json.dumps(document))
+    return json.dumps({"documents": documents, "total": len(documents)}).encode()
+
+
+async def _chunks(body: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+def _buffered(loads: Callable[[bytes], object]) -> Callable[[bytes, int], List[str]]:
+    def run(body: bytes, chunk_size: int) -> List[str]:
+        # Like httpx without streaming: join the chunks, then decode everything
+        data = loads(b"".join(body[start:start + chunk_size] for start in range(0, len(body), chunk_size)))
+        return [doc["page_content"] for doc in data.get("documents") or [] if "page_content" in doc]
+    return run
+
+
+def _streamed(body: bytes, chunk_size: int) -> List[str]:
+    return asyncio.run(collect_field(_chunks(body, chunk_size), "documents", "page_content"))
+
+
+def measure(run: Callable[[bytes, int], List[str]], body: bytes, chunk_size: int, repeat: int):
+    """Get the median time in seconds and the peak traced memory in bytes of a decoder."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(body, chunk_size)
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    run(body, chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[2, 8, 32], help="Response sizes in MB")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per decoder")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Streamed chunk size in bytes")
+    args = parser.parse_args()
+
+    decoders = {"json (buffered)": _buffered(json.loads)}
+    orjson_loads = _orjson_loads()
+    if orjson_loads is not None:
+        decoders["orjson (buffered)"] = _buffered(orjson_loads)
+    decoders["streamed"] = _streamed
+
+    print(f"{'size':>8}  {'decoder':<18} {'median ms':>10} {'peak MB':>9}")
+    for size_mb in args.sizes:
+        body = make_response(size_mb)
+        for name, run in decoders.items():
+            elapsed, peak = measure(run, body, args.chunk_size, args.repeat)
+            print(f"{len(body) / 2 ** 20:>6.1f}MB  {name:<18} {elapsed * 1000:>10.1f} {peak / 2 ** 20:>9.1f}")
+    if orjson_loads is None:
+        print("orjson is not installed, install the 'fast-json' extra to compare it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark event-loop blocking caused by logging under concurrent tool load.
+
+Simulates many concurrent tool calls, each logging a few records the way the
+tools and the API client do, with logs written to stderr and a log file as
+configure_logging sets them up. For each logging setup it reports the time
+the event loop spent inside logging calls and how late a ticker task woke
+up (loop lag). Stderr is redirected to a pipe drained by a deliberately slow
+reader, standing in for an MCP client that reads the stdio server's stderr
+slowly.
+
+Usage:
+    python benchmarks/bench_logging.py [--calls 2000] [--concurrency 100] [--sampling 0.1]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from huuh_mcp.utils.logging import configure_logging, stop_logging  # noqa: E402
+
+TICK = 0.005
+
+
+def _slow_stderr(bytes_per_second: int) -> None:
+    """Point stderr at a pipe drained at a limited rate by a background thread."""
+    read_fd, write_fd = os.pipe()
+    os.dup2(write_fd, 2)
+    os.close(write_fd)
+
+    def drain() -> None:
+        while True:
+            data = os.read(read_fd, 4096)
+            if not data:
+                return
+            time.sleep(len(data) / bytes_per_second)
+
+    threading.Thread(target=drain, daemon=True).start()
+
+
+async def _tool_call(index: int, timings: List[float]) -> None:
+    """One simulated tool call: its log records around two awaits."""
+    tool_logger = logging.getLogger("huuh_mcp.tools.persona")
+    auth_logger = logging.getLogger("huuh_mcp.utils.auth_wrapper")
+    client_logger = logging.getLogger("huuh_mcp.huuh.client")
+
+    started = time.perf_counter()
+    tool_logger.info("refresh_persona called with parameters: title='%s', new_content length=%d, course_id='%s'",
+                     f"persona {index}", 4000 + index, f"course-{index % 17}")
+    auth_logger.info("Authenticating MCP request")
+    auth_logger.info("Using cached token")
+    client_logger.debug("Making %s request to %s", "POST", "https://api.example/mcp/refresh_persona")
+    timings.append(time.perf_counter() - started)
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    client_logger.info("Retrying %s %s in %.2fs (attempt %d/%d)", "POST", "/mcp/refresh_persona", 0.1, 1, 3)
+    timings.append(time.perf_counter() - started)
+    await asyncio.sleep(0)
+
+
+async def _ticker(lags: List[float], stop: asyncio.Event) -> None:
+    """Record how late each TICK-second sleep wakes up."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+
+async def _load(calls: int, concurrency: int) -> Dict[str, float]:
+    timings: List[float] = []
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int) -> None:
+        async with semaphore:
+            await _tool_call(index, timings)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(index) for index in range(calls)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    lags.sort()
+    return {
+        "elapsed": elapsed,
+        "logging": sum(timings),
+        "lag_p99": lags[int(len(lags) * 0.99)] if lags else 0.0,
+        "lag_max": lags[-1] if lags else 0.0,
+        "per_call": statistics.mean(timings) * 2,
+    }
+
+
+def run_case(name: str, calls: int, concurrency: int, log_file: str, log_format: str, use_queue: bool,
+             sampling: Optional[Dict[str, float]] = None) -> None:
+    configure_logging("INFO", log_file=log_file, log_format=log_format, use_queue=use_queue, sampling=sampling)
+    result = asyncio.run(_load(calls, concurrency))
+    stop_logging()
+    print(f"{name:<26} loop blocked {result['logging'] * 1000:8.1f} ms   "
+          f"per call {result['per_call'] * 1e6:7.1f} us   lag p99 {result['lag_p99'] * 1000:6.1f} ms   "
+          f"max {result['lag_max'] * 1000:6.1f} ms   total {result['elapsed'] * 1000:7.1f} ms",
+          file=sys.__stdout__, flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000, help="Simulated tool calls")
+    parser.add_argument("--concurrency", type=int, default=100, help="Tool calls in flight at once")
+    parser.add_argument("--sampling", type=float, default=0.1,
+                        help="Rate kept for the per-call authentication messages in the sampled case")
+    parser.add_argument("--stderr-rate", type=int, default=2_000_000, help="Bytes per second the stderr reader drains")
+    args = parser.parse_args()
+
+    _slow_stderr(args.stderr_rate)
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = os.path.join(directory, "huuh.log")
+        cases = [
+            ("text, synchronous", "text", False, None),
+            ("text, queued", "text", True, None),
+            ("json, synchronous", "json", False, None),
+            ("json, queued", "json", True, None),
+            ("json, queued, sampled", "json", True, {"huuh_mcp.utils.auth_wrapper": args.sampling}),
+        ]
+        for name, log_format, use_queue, sampling in cases:
+            run_case(name, args.calls, args.concurrency, log_file, log_format, use_queue, sampling)
+
+
+if __name__ == "__main__":
+    main()
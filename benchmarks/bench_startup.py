@@ -0,0 +1,121 @@
+"""
+Benchmark server cold start.
+
+Measures, in fresh processes, the time to import huuh_mcp.server and the
+time from spawning the stdio server until its first tools/list response.
+Both are what a client pays at the start of every session. Exits with
+status 1 when a median exceeds the given budget, so it can guard against
+regressions in CI.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--max-import-ms 800] [--max-ready-ms 1500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import huuh_mcp.server; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _environment() -> Dict[str, str]:
+    """Environment for the measured processes, kept off the network."""
+    env = dict(os.environ)
+    env.setdefault("HUUH_API_KEY", "benchmark")
+    env["BACKEND_URL"] = "http://127.0.0.1:9"
+    env["HTTP_WARMUP_CONNECTIONS"] = "0"
+    env["MCP_TRANSPORT"] = "stdio"
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def measure_import() -> float:
+    """Get the seconds a fresh interpreter takes to import the server module."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        env=_environment(), capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _send(process: subprocess.Popen, message: Dict) -> None:
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+
+
+def _read_response(process: subprocess.Popen, request_id: int) -> Dict:
+    """Read stdout lines until the response to request_id arrives."""
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"Server exited early: {process.stderr.read()[-2000:]}")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def measure_ready() -> float:
+    """Get the seconds from spawning the stdio server to its first tools/list response."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "huuh_mcp.server"],
+        env=_environment(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        _send(process, {
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-03-26",
+                "capabilities": {},
+                "clientInfo": {"name": "bench_startup", "version": "0"},
+            },
+        })
+        _read_response(process, 1)
+        _send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        _send(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        response = _read_response(process, 2)
+        elapsed = time.perf_counter() - started
+        if "result" not in response or not response["result"].get("tools"):
+            raise RuntimeError(f"Unexpected tools/list response: {response}")
+        return elapsed
+    finally:
+        process.kill()
+        process.communicate()
+
+
+def _report(name: str, samples: List[float], budget_ms: Optional[float]) -> bool:
+    """Print a summary line, False if the median is over budget."""
+    median = statistics.median(samples) * 1000
+    print(f"{name:<22} median {median:8.1f} ms   min {min(samples) * 1000:8.1f} ms   "
+          f"max {max(samples) * 1000:8.1f} ms")
+    if budget_ms is not None and median > budget_ms:
+        print(f"  over budget of {budget_ms:.0f} ms")
+        return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Processes started per measurement")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import time exceeds this")
+    parser.add_argument("--max-ready-ms", type=float, help="Fail if the median time to tools/list exceeds this")
+    args = parser.parse_args()
+
+    # One untimed run of each warms the OS file cache and bytecode caches
+    measure_import()
+    measure_ready()
+
+    ok = _report("import huuh_mcp.server", [measure_import() for _ in range(args.runs)], args.max_import_ms)
+    ok = _report("first tools/list", [measure_ready() for _ in range(args.runs)], args.max_ready_ms) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Benchmark every tool end to end against a local fake API.
+
+Starts benchmarks/fake_backend.py in a subprocess, points the server at it
+and calls each tool in-process through an MCP client at several
+concurrency levels. Reports throughput and p50/p95/p99 latency per tool
+and level, then measures memory allocated per call with tracemalloc in a
+separate sequential pass, as tracing allocations slows calls down.
+
+Each call gets distinct arguments, so the response and retrieval caches
+only serve what repeats across calls (user options); --no-cache disables
+them altogether. Results can be saved as JSON and compared with a
+previous run, exiting with status 1 when a tool regressed past the
+threshold:
+
+    python benchmarks/bench_tools.py --output baseline.json
+    python benchmarks/bench_tools.py --compare baseline.json --max-regression 15
+
+Usage:
+    python benchmarks/bench_tools.py [--tools get_persona,retrieve_information] [--concurrency 1,8,32]
+        [--calls 200] [--profile profile.json] [--latency-ms 20] [--error-rate 0] [--no-cache]
+        [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_backend import load_profile  # noqa: E402
+
+# Arguments of the index-th call of each tool, distinct per call
+TOOL_ARGUMENTS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "get_user_options": lambda i: {},
+    "search_marketplace": lambda i: {"query": f"topic {i}"},
+    "retrieve_information": lambda i: {"query": f"question {i}", "course_id": "course-1"},
+    "retrieve_information_from_all_bases": lambda i: {"query": f"question {i}"},
+    "get_persona": lambda i: {"title": f"persona {i}"},
+    "refresh_persona": lambda i: {"title": f"persona {i}", "new_content": f"content {i} " * 50},
+    "contribute_persona_to_course": lambda i: {
+        "course_id": "course-1", "persona_title": f"persona {i}", "persona_content": f"persona content {i}"
+    },
+    "contribute_persona_to_user": lambda i: {"persona_title": f"persona {i}", "persona_content": f"persona content {i}"},
+    "contribute": lambda i: {
+        "course_id": "course-1", "week_number": str(i % 12 + 1),
+        "contribution_title": f"note {i}", "contribution_content": f"content {i} " * 50
+    },
+    "create_base": lambda i: {"base_name": f"base {i}", "base_description": "benchmark"},
+    "assign_base_to_space": lambda i: {"space_id": "space-1", "base_id": f"base-{i}"},
+    "create_spaces": lambda i: {"space_name": f"space {i}", "space_description": "benchmark"},
+    "batch": lambda i: {"operations": [
+        {"tool": "retrieve_information", "arguments": {"query": f"question {i}.{j}", "course_id": f"course-{j}"}}
+        for j in range(5)
+    ]},
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _fake_stats(url: str, reset: bool = False) -> Dict[str, Any]:
+    request = urllib.request.Request(f"{url}/_stats", method="POST" if reset else "GET")
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.load(response)
+
+
+def start_backend(profile: Dict[str, Any], directory: str) -> Tuple[subprocess.Popen, str]:
+    """Start the fake API with a profile and wait until it answers."""
+    path = os.path.join(directory, "profile.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(profile, file)
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "fake_backend.py"), "--port", str(port), "--profile", path]
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            _fake_stats(url)
+            return process, url
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Fake backend did not start")
+
+
+def server_environment(url: str, directory: str, cache: bool = True, warmup: bool = False) -> Dict[str, str]:
+    """Get the settings pointing a server at the fake API, without startup warmup unless asked for."""
+    env = {
+        "HUUH_API_KEY": "benchmark",
+        "BACKEND_URL": url,
+        "TOKEN_CACHE_FILE": os.path.join(directory, "token_cache.json"),
+        "PERSISTENT_CACHE_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    if not warmup:
+        env["HTTP_WARMUP_CONNECTIONS"] = "0"
+        env["STARTUP_PREWARM"] = "false"
+    if not cache:
+        env["RESPONSE_CACHE_ENABLED"] = "false"
+        env["RETRIEVAL_CACHE_ENABLED"] = "false"
+    return env
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+def _is_error(content: List[Any]) -> bool:
+    text = getattr(content[0], "text", "") if content else ""
+    return text[:32].lstrip("{ \n").startswith('"error"')
+
+
+async def _call(client: Any, tool: str, arguments: Dict[str, Any]) -> bool:
+    """Call a tool, returning whether it succeeded."""
+    try:
+        return not _is_error(await client.call_tool(tool, arguments))
+    except Exception:
+        return False
+
+
+async def run_level(client: Any, tool: str, calls: int, concurrency: int, offset: int) -> Dict[str, Any]:
+    """Make calls to a tool with at most concurrency in flight, and summarize their latencies."""
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            ok = await _call(client, tool, TOOL_ARGUMENTS[tool](offset + index))
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "tool": tool,
+        "concurrency": concurrency,
+        "calls": calls,
+        "errors": errors,
+        "throughput": round(calls / elapsed, 2),
+        "mean_ms": round(sum(latencies) / calls * 1000, 3),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def measure_allocations(client: Any, tool: str, calls: int, offset: int) -> Dict[str, Any]:
+    """Trace allocations over sequential calls to a tool."""
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    for index in range(calls):
+        await _call(client, tool, TOOL_ARGUMENTS[tool](offset + index))
+    after = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "lineno") if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "lineno") if stat.count_diff > 0)
+    return {
+        "calls": calls,
+        "peak_kib": round((peak - baseline) / 1024, 1),
+        "retained_kib_per_call": round((current - baseline) / calls / 1024, 2),
+        "grown_kib_per_call": round(allocated / calls / 1024, 2),
+        "grown_blocks_per_call": round(blocks / calls, 1),
+    }
+
+
+async def run_benchmark(tools: List[str], levels: List[int], calls: int, warmup: int,
+                        alloc_calls: int, backend_url: str) -> Dict[str, Any]:
+    from fastmcp import Client
+
+    from huuh_mcp import server
+    from huuh_mcp.huuh.auth import get_auth_client
+
+    # Failed calls are counted, not printed with their tracebacks
+    logging.getLogger("fastmcp").setLevel(logging.CRITICAL)
+    # Same middleware as the stdio server
+    server.enable_tracing()
+    server.enable_metrics(http=False)
+
+    results: List[Dict[str, Any]] = []
+    allocations: Dict[str, Dict[str, Any]] = {}
+    upstream: Dict[str, Dict[str, int]] = {}
+    offset = 0
+    async with Client(server.mcp) as client:
+        for tool in tools:
+            for index in range(warmup):
+                await _call(client, tool, TOOL_ARGUMENTS[tool](offset + index))
+            offset += warmup
+            _fake_stats(backend_url, reset=True)
+            for concurrency in levels:
+                result = await run_level(client, tool, calls, concurrency, offset)
+                offset += calls
+                results.append(result)
+                print(f"{tool:<38} c={concurrency:<4} {result['throughput']:9.1f}/s   "
+                      f"p50 {result['p50_ms']:8.2f} ms   p95 {result['p95_ms']:8.2f} ms   "
+                      f"p99 {result['p99_ms']:8.2f} ms   errors {result['errors']}", flush=True)
+            upstream[tool] = _fake_stats(backend_url)["requests"]
+            if alloc_calls:
+                allocations[tool] = await measure_allocations(client, tool, alloc_calls, offset)
+                offset += alloc_calls
+                print(f"{tool:<38} allocations: peak {allocations[tool]['peak_kib']:.1f} KiB, "
+                      f"{allocations[tool]['grown_blocks_per_call']:.0f} blocks/call retained "
+                      f"{allocations[tool]['retained_kib_per_call']:.2f} KiB/call", flush=True)
+    await get_auth_client().close()
+    return {"results": results, "allocations": allocations, "upstream_requests": upstream}
+
+
+def git_commit() -> Optional[str]:
+    """Get the checked out commit, marked when the tree has changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    """Print the change of each tool and level against a baseline, returning whether any regressed."""
+    previous = {(result["tool"], result["concurrency"]): result for result in baseline["results"]}
+    regressed = False
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp', '?')}):")
+    for result in current["results"]:
+        before = previous.get((result["tool"], result["concurrency"]))
+        if before is None:
+            continue
+        p95 = (result["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        throughput = (result["throughput"] / before["throughput"] - 1) * 100 if before["throughput"] else 0.0
+        worse = p95 > max_regression or -throughput > max_regression
+        regressed = regressed or worse
+        print(f"{result['tool']:<38} c={result['concurrency']:<4} p95 {p95:+7.1f}%   "
+              f"throughput {throughput:+7.1f}%{'   REGRESSED' if worse else ''}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", default=",".join(TOOL_ARGUMENTS), help="Comma-separated tools to benchmark")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per tool and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured calls per tool first")
+    parser.add_argument("--alloc-calls", type=int, default=20, help="Calls traced for allocations, 0 to skip")
+    parser.add_argument("--profile", help="Fake backend profile file, see benchmarks/fake_backend.py")
+    parser.add_argument("--latency-ms", type=float, help="Median latency of every fake endpoint")
+    parser.add_argument("--jitter", type=float, help="Sigma of the log-normal latency distribution")
+    parser.add_argument("--error-rate", type=float, help="Fraction of fake requests failing")
+    parser.add_argument("--documents", type=int, help="Documents per information response")
+    parser.add_argument("--document-chars", type=int, help="Characters per document")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response and retrieval caches")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare with the results in this JSON file")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="Percent p95 or throughput change counted as a regression")
+    args = parser.parse_args()
+
+    tools = [tool.strip() for tool in args.tools.split(",") if tool.strip()]
+    unknown = [tool for tool in tools if tool not in TOOL_ARGUMENTS]
+    if unknown:
+        parser.error(f"Unknown tools: {', '.join(unknown)}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    profile = load_profile(
+        args.profile, latency_ms=args.latency_ms, jitter=args.jitter, error_rate=args.error_rate,
+        documents=args.documents, document_chars=args.document_chars
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend, url = start_backend(profile, directory)
+        try:
+            # Settings are read when huuh_mcp is first imported, in run_benchmark
+            os.environ.update(server_environment(url, directory, cache=not args.no_cache))
+            measured = asyncio.run(run_benchmark(tools, levels, args.calls, args.warmup, args.alloc_calls, url))
+        finally:
+            backend.terminate()
+            backend.wait(timeout=10)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "tools": tools, "concurrency": levels, "calls": args.calls, "warmup": args.warmup,
+            "alloc_calls": args.alloc_calls, "cache": not args.no_cache, "profile": profile,
+        },
+        **measured,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Local stand-in for the huuh API, for benchmarks and load tests.
+
+Implements the endpoints the tools call (token exchange and validation,
+user options, information retrieval, personas, the marketplace and the
+write endpoints) with synthetic responses. Each endpoint waits for a
+latency drawn from a log-normal distribution and fails with a configurable
+probability, so results depend on the server rather than on the network
+or the real backend. Responses are generated from a fixed seed, making
+payloads identical across runs.
+
+A profile file (JSON) overrides the defaults and sets behaviour per path:
+
+    {
+        "latency_ms": 20, "jitter": 0.3, "error_rate": 0.0, "error_status": 503,
+        "documents": 10, "document_chars": 1500, "courses": 8,
+        "endpoints": {"/mcp/information": {"latency_ms": 150, "jitter": 0.6, "error_rate": 0.01}}
+    }
+
+GET /_stats returns the number of requests and errors served per path, and
+POST /_stats resets them.
+
+Usage:
+    python benchmarks/fake_backend.py [--port 8900] [--profile profile.json] [--latency-ms 20] [--error-rate 0]
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+from typing import Any, Dict, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "latency_ms": 20.0,
+    "jitter": 0.3,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "documents": 10,
+    "document_chars": 1500,
+    "courses": 8,
+    "persona_chars": 4000,
+    "marketplace_results": 10,
+    "seed": 1,
+    "endpoints": {},
+}
+
+_WORDS = (
+    "lecture module exercise theorem proof example chapter summary definition lemma "
+    "course reading seminar assignment solution concept method analysis result model"
+).split()
+
+
+def load_profile(path: Optional[str] = None, **overrides: Any) -> Dict[str, Any]:
+    """Merge the defaults, a profile file and explicit overrides (None values are ignored)."""
+    profile = dict(DEFAULT_PROFILE)
+    if path:
+        with open(path, encoding="utf-8") as file:
+            profile.update(json.load(file))
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+class FakeBackend:
+    """Synthetic huuh API with per-endpoint latency and error injection."""
+
+    def __init__(self, profile: Dict[str, Any]):
+        self.profile = profile
+        self.rng = random.Random(profile["seed"])
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+        # Payloads are built once, the fake should cost as little as possible per request
+        rng = random.Random(profile["seed"])
+        self.documents = [
+            {
+                "page_content": _text(rng, profile["document_chars"]),
+                "metadata": {"file_id": f"file-{index}", "module": index % 12, "page": index},
+            }
+            for index in range(profile["documents"])
+        ]
+        self.user_options = {
+            "courses": [
+                {
+                    "course_id": f"course-{index}",
+                    "name": f"Course {index}",
+                    "modules": [{"number": module, "title": f"Module {module}"} for module in range(12)],
+                }
+                for index in range(profile["courses"])
+            ],
+            "spaces": [{"space_id": f"space-{index}", "name": f"Space {index}"} for index in range(3)],
+        }
+        self.persona = _text(rng, profile["persona_chars"])
+        self.marketplace = [
+            {"course_id": f"market-{index}", "title": f"Base {index}", "description": _text(rng, 200)}
+            for index in range(profile["marketplace_results"])
+        ]
+
+    def _settings(self, path: str) -> Dict[str, Any]:
+        return {**self.profile, **self.profile["endpoints"].get(path, {})}
+
+    async def _simulate(self, path: str) -> Optional[Response]:
+        """Wait for the endpoint's latency, then return an error response or None to succeed."""
+        self.requests[path] = self.requests.get(path, 0) + 1
+        settings = self._settings(path)
+        median = settings["latency_ms"] / 1000
+        if median > 0:
+            jitter = settings["jitter"]
+            await asyncio.sleep(median * math.exp(self.rng.gauss(0, jitter)) if jitter else median)
+        if settings["error_rate"] and self.rng.random() < settings["error_rate"]:
+            self.errors[path] = self.errors.get(path, 0) + 1
+            return JSONResponse({"detail": "Injected failure"}, status_code=settings["error_status"])
+        return None
+
+    async def handle(self, request: Request) -> Response:
+        path = request.url.path
+        failure = await self._simulate(path)
+        if failure is not None:
+            return failure
+        return JSONResponse(self.respond(request))
+
+    def respond(self, request: Request) -> Any:
+        """Build the successful response body of an endpoint."""
+        path = request.url.path
+        params = request.query_params
+        if path == "/mcp/token":
+            return {"access_token": "fake-token", "token_type": "bearer", "expires_in": 3600}
+        if path == "/mcp/validate":
+            return {"valid": True, "user_id": "benchmark"}
+        if path == "/mcp/user_options":
+            return self.user_options
+        if path == "/mcp/information":
+            return {"query": params.get("query"), "course_id": params.get("course_id"), "documents": self.documents}
+        if path == "/mcp/get_persona":
+            return {"title": params.get("title"), "content": self.persona}
+        if path == "/mcp/search_marketplace":
+            return {"query": params.get("user_query"), "results": self.marketplace}
+        return {"status": "ok", "id": f"{path.rsplit('/', 1)[-1]}-{self.requests[path]}"}
+
+    async def stats(self, request: Request) -> Response:
+        if request.method == "POST":
+            self.requests.clear()
+            self.errors.clear()
+        return JSONResponse({"requests": self.requests, "errors": self.errors})
+
+
+async def _root(request: Request) -> Response:
+    # Target of connection warmup
+    return Response(status_code=204)
+
+
+GET_ENDPOINTS = ("/mcp/validate", "/mcp/user_options", "/mcp/information", "/mcp/get_persona",
+                 "/mcp/search_marketplace")
+POST_ENDPOINTS = ("/mcp/token", "/mcp/refresh_persona", "/mcp/contribute_persona_to_course",
+                  "/mcp/add_persona_to_user", "/mcp/create_course", "/mcp/assign_base_to_space",
+                  "/mcp/create_spaces", "/mcp/contribute")
+
+
+def create_app(profile: Optional[Dict[str, Any]] = None) -> Starlette:
+    """Create the fake API application for a profile (see load_profile)."""
+    backend = FakeBackend(profile or load_profile())
+    routes = [Route("/", _root, methods=["GET", "HEAD"]),
+              Route("/_stats", backend.stats, methods=["GET", "POST"])]
+    routes += [Route(path, backend.handle, methods=["GET"]) for path in GET_ENDPOINTS]
+    routes += [Route(path, backend.handle, methods=["POST"]) for path in POST_ENDPOINTS]
+    app = Starlette(routes=routes)
+    app.state.backend = backend
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--profile", help="JSON profile file")
+    parser.add_argument("--latency-ms", type=float, help="Median latency of every endpoint")
+    parser.add_argument("--jitter", type=float, help="Sigma of the log-normal latency distribution, 0 for constant")
+    parser.add_argument("--error-rate", type=float, help="Fraction of requests failing with error_status")
+    parser.add_argument("--documents", type=int, help="Documents per information response")
+    parser.add_argument("--document-chars", type=int, help="Characters per document")
+    args = parser.parse_args()
+
+    profile = load_profile(
+        args.profile, latency_ms=args.latency_ms, jitter=args.jitter, error_rate=args.error_rate,
+        documents=args.documents, document_chars=args.document_chars
+    )
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+Load test the server with concurrent MCP sessions replaying agent workflows.
+
+Opens many MCP sessions against huuh_mcp.server, either one stdio server
+subprocess per session, as desktop clients run it, or sessions on one HTTP
+server (--transport http, optionally with --workers). Every session
+repeatedly picks a workflow from the scenario by weight, calls its tools in
+order with think time in between, and does so until the scenario's
+duration is up. The server talks to benchmarks/fake_backend.py configured
+by the scenario, so the results reflect the server, not the real API.
+
+Reports end-to-end latency per tool and workflow (including think time),
+session setup time, error counts and the CPU and memory used by the
+server processes (read from /proc, so only on Linux). Several session counts can be given to
+find where latency starts to climb.
+
+Scenario files (see benchmarks/scenarios/) are JSON:
+
+    {
+        "name": "...", "sessions": 20, "duration_s": 30, "ramp_up_s": 5, "think_time_ms": [200, 1500],
+        "backend": {fake backend profile},
+        "values": {"query": ["...", "..."], "course_id": ["course-0", "course-1"]},
+        "workflows": [{"name": "...", "weight": 3, "steps": [{"tool": "...", "arguments": {...}}]}]
+    }
+
+Strings in arguments may contain {session}, {iteration} and names from
+"values", which take a random value per workflow run.
+
+Usage:
+    python benchmarks/load_test.py benchmarks/scenarios/research_agent.json [--transport stdio|http]
+        [--sessions 10,50,100] [--duration 30] [--workers 1] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_tools import git_commit, server_environment, start_backend  # noqa: E402
+from benchmarks.fake_backend import load_profile  # noqa: E402
+
+SAMPLE_INTERVAL = 0.5
+
+
+def _percentiles(values: List[float]) -> Dict[str, Any]:
+    """Summarize durations in seconds as milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50_ms": rank(0.50),
+        "p95_ms": rank(0.95),
+        "p99_ms": rank(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class _Values(dict):
+    """Placeholder values of one workflow run, drawing each named value once."""
+
+    def __init__(self, choices: Dict[str, List[Any]], rng: random.Random, **fixed: Any):
+        super().__init__(fixed)
+        self.choices = choices
+        self.rng = rng
+
+    def __missing__(self, key: str) -> Any:
+        if key not in self.choices:
+            raise KeyError(f"Scenario uses undefined value {{{key}}}")
+        value = self[key] = self.rng.choice(self.choices[key])
+        return value
+
+
+def _fill(template: Any, values: _Values) -> Any:
+    """Substitute placeholders in every string of an argument structure."""
+    if isinstance(template, str):
+        return template.format_map(values)
+    if isinstance(template, dict):
+        return {key: _fill(value, values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [_fill(value, values) for value in template]
+    return template
+
+
+class Recorder:
+    """Latencies and errors gathered from all sessions of a run."""
+
+    def __init__(self):
+        self.tools: Dict[str, List[float]] = {}
+        self.workflows: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.connect: List[float] = []
+        self.session_failures: List[str] = []
+
+    def tool(self, name: str, seconds: float, ok: bool) -> None:
+        self.tools.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        calls = sum(len(latencies) for latencies in self.tools.values())
+        return {
+            "calls": calls,
+            "errors": sum(self.errors.values()),
+            "calls_per_second": round(calls / elapsed, 2) if elapsed else None,
+            "connect": _percentiles(self.connect),
+            "session_failures": len(self.session_failures),
+            "tools": {name: dict(_percentiles(latencies), errors=self.errors.get(name, 0))
+                      for name, latencies in sorted(self.tools.items())},
+            "workflows": {name: _percentiles(latencies) for name, latencies in sorted(self.workflows.items())},
+        }
+
+
+def _is_error(result: Any) -> bool:
+    if result.isError:
+        return True
+    text = getattr(result.content[0], "text", "") if result.content else ""
+    return text[:32].lstrip("{ \n").startswith('"error"')
+
+
+async def run_session(index: int, open_client: Any, scenario: Dict[str, Any], started: float,
+                      deadline: float, recorder: Recorder) -> None:
+    """Open one MCP session and replay workflows on it until the deadline."""
+    rng = random.Random(index)
+    workflows = scenario["workflows"]
+    weights = [workflow.get("weight", 1) for workflow in workflows]
+    think_min, think_max = scenario.get("think_time_ms", [0, 0])
+
+    # Spread session starts over the ramp-up
+    await asyncio.sleep(max(0.0, started + scenario.get("ramp_up_s", 0) * rng.random() - time.monotonic()))
+    connecting = time.perf_counter()
+    try:
+        async with open_client() as client:
+            recorder.connect.append(time.perf_counter() - connecting)
+            iteration = 0
+            while time.monotonic() < deadline:
+                workflow = rng.choices(workflows, weights)[0]
+                values = _Values(scenario.get("values", {}), rng, session=index, iteration=iteration)
+                workflow_started = time.perf_counter()
+                for step in workflow["steps"]:
+                    if time.monotonic() >= deadline:
+                        return
+                    arguments = _fill(step.get("arguments", {}), values)
+                    call_started = time.perf_counter()
+                    try:
+                        ok = not _is_error(await client.call_tool_mcp(step["tool"], arguments))
+                    except Exception:
+                        ok = False
+                    recorder.tool(step["tool"], time.perf_counter() - call_started, ok)
+                    await asyncio.sleep(rng.uniform(think_min, think_max) / 1000)
+                recorder.workflows.setdefault(workflow["name"], []).append(time.perf_counter() - workflow_started)
+                iteration += 1
+    except Exception as e:
+        recorder.session_failures.append(f"session {index}: {type(e).__name__}: {e}")
+
+
+class ProcessSampler:
+    """Samples the CPU time and resident memory of server processes from /proc."""
+
+    def __init__(self, exclude: Set[int]):
+        self.exclude = exclude
+        self.available = os.path.isdir("/proc/self")
+        self.ticks = os.sysconf("SC_CLK_TCK") if self.available else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if self.available else 4096
+        self.cpu: List[float] = []
+        self.rss: List[int] = []
+        self.processes: List[int] = []
+
+    def _servers(self) -> Dict[int, int]:
+        """Map the servers among our descendants to their parent pid."""
+        parents: Dict[int, int] = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as file:
+                        parents[int(entry)] = int(file.read().rsplit(")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+        found: Dict[int, int] = {}
+        frontier = [os.getpid()]
+        while frontier:
+            parent = frontier.pop()
+            for pid, ppid in parents.items():
+                if ppid == parent and pid not in self.exclude and pid not in found:
+                    found[pid] = ppid
+                    frontier.append(pid)
+        return found
+
+    def _read(self, pid: int) -> Optional[tuple]:
+        try:
+            with open(f"/proc/{pid}/stat") as file:
+                fields = file.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{pid}/statm") as file:
+                resident = int(file.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            return None
+        return (int(fields[11]) + int(fields[12])) / self.ticks, resident * self.page_size
+
+    async def run(self, stop: asyncio.Event) -> None:
+        if not self.available:
+            return
+        previous: Dict[int, float] = {}
+        sampled = time.monotonic()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), SAMPLE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            cpu_seconds = 0.0
+            rss = 0
+            current: Dict[int, float] = {}
+            for pid in self._servers():
+                reading = self._read(pid)
+                if reading is None:
+                    continue
+                current[pid] = reading[0]
+                cpu_seconds += reading[0] - previous.get(pid, reading[0])
+                rss += reading[1]
+            if previous:
+                self.cpu.append(cpu_seconds / (now - sampled) * 100)
+                self.rss.append(rss)
+                self.processes.append(len(current))
+            previous, sampled = current, now
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.cpu:
+            return {"available": self.available}
+        return {
+            "available": True,
+            "processes": max(self.processes),
+            "cpu_percent_mean": round(sum(self.cpu) / len(self.cpu), 1),
+            "cpu_percent_peak": round(max(self.cpu), 1),
+            "rss_mib_mean": round(sum(self.rss) / len(self.rss) / 2 ** 20, 1),
+            "rss_mib_peak": round(max(self.rss) / 2 ** 20, 1),
+        }
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("HTTP server exited during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("HTTP server did not start")
+
+
+async def run_load(scenario: Dict[str, Any], sessions: int, transport: str, env: Dict[str, str],
+                   workers: int, exclude: Set[int]) -> Dict[str, Any]:
+    """Run the scenario with a number of sessions and summarize it."""
+    from fastmcp import Client
+    from fastmcp.client.transports import StdioTransport
+
+    http_server: Optional[subprocess.Popen] = None
+    if transport == "http":
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        http_server = subprocess.Popen(
+            [sys.executable, "-m", "huuh_mcp.server", "--transport", "http", "--port", str(port),
+             "--workers", str(workers)],
+            cwd=ROOT, env=env
+        )
+        _wait_for_port(port, http_server)
+        url = f"http://127.0.0.1:{port}/mcp/"
+
+        def open_client() -> Client:
+            return Client(url, timeout=120)
+    else:
+        def open_client() -> Client:
+            return Client(StdioTransport(sys.executable, ["-m", "huuh_mcp.server"], env=env, cwd=ROOT,
+                                         keep_alive=False), timeout=120)
+
+    recorder = Recorder()
+    sampler = ProcessSampler(exclude)
+    stop = asyncio.Event()
+    sampling = asyncio.create_task(sampler.run(stop))
+    started = time.monotonic()
+    deadline = started + scenario.get("ramp_up_s", 0) + scenario["duration_s"]
+    try:
+        await asyncio.gather(*(
+            run_session(index, open_client, scenario, started, deadline, recorder) for index in range(sessions)
+        ))
+    finally:
+        elapsed = time.monotonic() - started
+        stop.set()
+        await sampling
+        if http_server is not None:
+            http_server.terminate()
+            try:
+                http_server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                http_server.kill()
+
+    return {"sessions": sessions, "elapsed_s": round(elapsed, 1), **recorder.summary(elapsed),
+            "server": sampler.summary(), "failures": recorder.session_failures[:10]}
+
+
+def _print_level(result: Dict[str, Any]) -> None:
+    server = result["server"]
+    resources = (f"cpu {server['cpu_percent_mean']:.0f}% (peak {server['cpu_percent_peak']:.0f}%)   "
+                 f"rss {server['rss_mib_peak']:.0f} MiB in {server['processes']} processes"
+                 if "cpu_percent_mean" in server else "server resources unavailable")
+    print(f"\n{result['sessions']} sessions: {result['calls']} calls, {result['calls_per_second']}/s, "
+          f"{result['errors']} errors, {result['session_failures']} failed sessions, "
+          f"connect p95 {result['connect'].get('p95_ms', '-')} ms   {resources}")
+    for name, stats in result["tools"].items():
+        print(f"  {name:<38} n={stats['count']:<6} p50 {stats['p50_ms']:8.1f} ms   p95 {stats['p95_ms']:8.1f} ms   "
+              f"p99 {stats['p99_ms']:8.1f} ms   errors {stats['errors']}")
+    for name, stats in result["workflows"].items():
+        print(f"  workflow {name:<29} n={stats['count']:<6} p50 {stats['p50_ms']:8.1f} ms   "
+              f"p95 {stats['p95_ms']:8.1f} ms")
+    for failure in result["failures"]:
+        print(f"  ! {failure}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", help="Scenario file")
+    parser.add_argument("--transport", choices=["stdio", "http"], default="stdio",
+                        help="Run one stdio server per session, or one HTTP server for all")
+    parser.add_argument("--sessions", help="Comma-separated session counts, run one after another "
+                                           "(default: the scenario's)")
+    parser.add_argument("--duration", type=float, help="Seconds each session count runs, after ramp-up")
+    parser.add_argument("--workers", type=int, default=1, help="HTTP worker processes")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response and retrieval caches")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.scenario, encoding="utf-8") as file:
+        scenario = json.load(file)
+    if args.duration is not None:
+        scenario["duration_s"] = args.duration
+    scenario.setdefault("duration_s", 30)
+    levels = [int(level) for level in args.sessions.split(",")] if args.sessions else [scenario.get("sessions", 10)]
+    profile = load_profile(**scenario.get("backend", {}))
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        backend, url = start_backend(profile, directory)
+        try:
+            env = dict(os.environ, **server_environment(url, directory, cache=not args.no_cache, warmup=True))
+            env["MCP_TRANSPORT"] = args.transport
+            env["PYTHONWARNINGS"] = "ignore"
+            env["FASTMCP_LOG_LEVEL"] = "WARNING"
+            print(f"Scenario {scenario.get('name', args.scenario)} over {args.transport}, "
+                  f"{scenario['duration_s']:g}s per level", flush=True)
+            for sessions in levels:
+                result = asyncio.run(run_load(scenario, sessions, args.transport, env, args.workers, {backend.pid}))
+                _print_level(result)
+                results.append(result)
+        finally:
+            backend.terminate()
+            backend.wait(timeout=10)
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scenario": scenario,
+            "transport": args.transport,
+            "workers": args.workers,
+            "cache": not args.no_cache,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
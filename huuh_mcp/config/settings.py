@@ -1,8 +1,9 @@
 """MCP huuh server configuration."""
 import os
+from typing import Any, Dict, List, Optional, cast
 
 from dotenv import load_dotenv
-from pydantic import HttpUrl, SecretStr, Field
+from pydantic import AliasChoices, HttpUrl, SecretStr, Field
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +11,53 @@ class Settings(BaseSettings):
     """Application settings."""
     # Application settings
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = Field(
+        "text",
+        description="Log output format: 'text' or 'json' (one object per line)"
+    )
+    LOG_FILE: str = Field(
+        "",
+        description="File logs are also written to (none when empty)"
+    )
+    LOG_QUEUE: bool = Field(
+        True,
+        description="Write log records from a background thread instead of the event loop"
+    )
+    LOG_SAMPLING: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Fraction of records below WARNING kept, by logger name, e.g. {\"huuh_mcp.utils.auth_wrapper\": 0.01}"
+    )
+
+    # Server transport settings
+    MCP_TRANSPORT: str = Field(
+        "stdio",
+        description="Transport to serve on: 'stdio' or 'http' (Streamable HTTP)"
+    )
+    MCP_HOST: str = Field(
+        "127.0.0.1",
+        description="Interface the HTTP transport binds to"
+    )
+    MCP_PORT: int = Field(
+        8000,
+        validation_alias=AliasChoices("MCP_PORT", "PORT"),
+        description="Port the HTTP transport listens on"
+    )
+    MCP_PATH: str = Field(
+        "/mcp",
+        description="Path of the MCP endpoint in HTTP mode"
+    )
+    MCP_WORKERS: int = Field(
+        1,
+        description="Number of HTTP worker processes sharing the port"
+    )
+    MCP_STATELESS_HTTP: bool = Field(
+        False,
+        description="Serve HTTP requests without server-side sessions (always on with several workers)"
+    )
+    MCP_GRACEFUL_SHUTDOWN_TIMEOUT: float = Field(
+        5.0,
+        description="Seconds to wait for open HTTP requests on shutdown"
+    )
 
     # Infolab API settings
     INFOLAB_API_URL: HttpUrl = Field(
@@ -18,9 +66,21 @@ class Settings(BaseSettings):
     )
 
     # Auth settings
-    HUUH_API_KEY: SecretStr = Field(
-        ...,
-        description="API key for MCP authentication"
+    HUUH_API_KEY: Optional[SecretStr] = Field(
+        None,
+        description="API key for MCP authentication, optional in HTTP mode where callers send their own"
+    )
+    TENANT_API_KEY_HEADER: str = Field(
+        "X-Huuh-Api-Key",
+        description="HTTP request header carrying the caller's API key in HTTP mode"
+    )
+    TENANT_ALLOW_DEFAULT_KEY: bool = Field(
+        False,
+        description="Serve HTTP requests without the API key header with HUUH_API_KEY instead of rejecting them"
+    )
+    TENANT_POOL_SIZE: int = Field(
+        256,
+        description="Maximum number of per-API-key clients kept in memory in HTTP mode"
     )
     TOKEN_ENDPOINT: str = Field(
         "/mcp/token",
@@ -30,6 +90,292 @@ class Settings(BaseSettings):
         "/mcp/validate",
         description="Endpoint for token validation"
     )
+    AUTH_MODE: str = Field(
+        "optimistic",
+        description="'optimistic' sends requests with the cached token and refreshes on 401, "
+                    "'validate' checks the token against VALIDATE_ENDPOINT before every tool call"
+    )
+    VALIDATION_CACHE_TTL: float = Field(
+        60.0,
+        description="Seconds a successful token validation is trusted before validating again"
+    )
+    TOKEN_BACKGROUND_RENEWAL: bool = Field(
+        True,
+        description="Renew the access token in the background before it expires"
+    )
+    TOKEN_RENEWAL_MARGIN: float = Field(
+        300.0,
+        description="Seconds before token expiry at which the background renewal runs"
+    )
+
+    # HTTP transport settings (shared by the auth and API clients)
+    HTTP_MAX_CONNECTIONS: int = Field(
+        20,
+        description="Maximum number of open connections to the API"
+    )
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        10,
+        description="Maximum number of idle connections kept alive"
+    )
+    HTTP_KEEPALIVE_EXPIRY: float = Field(
+        30.0,
+        description="Seconds an idle connection is kept alive"
+    )
+    HTTP_CONNECT_TIMEOUT: float = Field(
+        10.0,
+        description="Seconds to wait for a connection to be established"
+    )
+    HTTP_READ_TIMEOUT: float = Field(
+        30.0,
+        description="Seconds to wait for response data"
+    )
+    HTTP_WRITE_TIMEOUT: float = Field(
+        30.0,
+        description="Seconds to wait while sending request data"
+    )
+    HTTP_POOL_TIMEOUT: float = Field(
+        30.0,
+        description="Seconds to wait for a free connection from the pool"
+    )
+    HTTP2_ENABLED: bool = Field(
+        False,
+        description="Multiplex requests over HTTP/2 (requires the 'http2' extra)"
+    )
+    HTTP_WARMUP_CONNECTIONS: int = Field(
+        2,
+        description="Connections to open at startup before the first tool call (0 disables warmup)"
+    )
+    STARTUP_PREWARM: bool = Field(
+        True,
+        description="Obtain a token, open connections and prefetch user options in the background at startup"
+    )
+    PREWARM_USER_OPTIONS: bool = Field(
+        True,
+        description="Prefetch /mcp/user_options into the response cache during the startup prewarm"
+    )
+
+    # Response decoding settings
+    JSON_BACKEND: str = Field(
+        "auto",
+        description="JSON decoder: 'auto' (orjson if installed), 'orjson' (requires the 'fast-json' extra) or 'json'"
+    )
+    STREAM_RETRIEVAL: bool = Field(
+        True,
+        description="Decode /mcp/information responses while they stream in, keeping only page contents"
+    )
+    STREAM_CHUNK_SIZE: int = Field(
+        64 * 1024,
+        description="Bytes read at a time from streamed responses"
+    )
+
+    # Compression settings
+    REQUEST_COMPRESSION: str = Field(
+        "auto",
+        description="Request body compression: 'auto' (encodings the API advertises), 'gzip', 'zstd' or 'off'"
+    )
+    REQUEST_COMPRESSION_MIN_BYTES: int = Field(
+        1024,
+        description="Request bodies smaller than this many bytes are sent uncompressed"
+    )
+
+    # Retry and circuit breaker settings
+    RETRY_MAX_ATTEMPTS: int = Field(
+        3,
+        description="Maximum attempts for idempotent requests failing with a connection error, 429 or 5xx"
+    )
+    RETRY_BACKOFF_BASE: float = Field(
+        0.2,
+        description="Base delay in seconds of the exponential retry backoff"
+    )
+    RETRY_BACKOFF_MAX: float = Field(
+        5.0,
+        description="Maximum retry delay in seconds, longer Retry-After requests are not retried"
+    )
+    CIRCUIT_BREAKER_ENABLED: bool = Field(
+        True,
+        description="Fail fast on endpoints that keep failing"
+    )
+    CIRCUIT_FAILURE_THRESHOLD: int = Field(
+        5,
+        description="Consecutive failures after which an endpoint's circuit opens"
+    )
+    CIRCUIT_RESET_TIMEOUT: float = Field(
+        30.0,
+        description="Seconds an open circuit waits before letting a probe request through"
+    )
+
+    # Hedged request settings
+    HEDGE_ENABLED: bool = Field(
+        False,
+        description="Send a second copy of slow idempotent requests to HEDGE_ENDPOINTS"
+    )
+    HEDGE_ENDPOINTS: List[str] = Field(
+        ["/mcp/information"],
+        description="Endpoints whose GET requests may be hedged"
+    )
+    HEDGE_PERCENTILE: float = Field(
+        95.0,
+        description="Latency percentile after which an outstanding request is hedged"
+    )
+    HEDGE_MIN_DELAY: float = Field(
+        0.05,
+        description="Minimum seconds to wait before hedging a request"
+    )
+    HEDGE_MIN_SAMPLES: int = Field(
+        20,
+        description="Latency samples needed for an endpoint before it is hedged"
+    )
+    HEDGE_BUDGET: float = Field(
+        0.05,
+        description="Maximum fraction of requests that may be hedged"
+    )
+
+    # Response cache settings for read-only endpoints
+    RESPONSE_CACHE_ENABLED: bool = Field(
+        True,
+        description="Cache responses of read-only endpoints in memory"
+    )
+    RESPONSE_CACHE_TTLS: Dict[str, float] = Field(
+        {
+            "/mcp/user_options": 60.0,
+            "/mcp/get_persona": 300.0,
+            "/mcp/search_marketplace": 300.0,
+        },
+        description="Seconds to cache GET responses per endpoint, endpoints not listed are not cached"
+    )
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(
+        256,
+        description="Maximum number of cached responses"
+    )
+    RESPONSE_CACHE_MAX_BYTES: int = Field(
+        8 * 1024 * 1024,
+        description="Maximum total size of cached responses in bytes (JSON-encoded)"
+    )
+    SWR_ENDPOINTS: List[str] = Field(
+        ["/mcp/user_options", "/mcp/get_persona", "/mcp/search_marketplace"],
+        description="Cached endpoints whose expired responses are served while they are refreshed in the background"
+    )
+    SWR_MAX_STALENESS: float = Field(
+        600.0,
+        description="Maximum seconds past expiry a response is still served stale (0 disables stale-while-revalidate)"
+    )
+    SWR_REFRESH_SPACING: float = Field(
+        0.1,
+        description="Average seconds between the starts of background refreshes"
+    )
+    SWR_MAX_CONCURRENT_REFRESHES: int = Field(
+        2,
+        description="Maximum background refreshes running at once"
+    )
+
+    # Persistent response cache settings, shared by server processes across restarts
+    PERSISTENT_CACHE_ENABLED: bool = Field(
+        False,
+        description="Also keep cached responses in an SQLite database and revalidate them at startup"
+    )
+    PERSISTENT_CACHE_FILE: str = Field(
+        "",
+        description="SQLite database of the persistent cache (defaults to response_cache.sqlite3 next to TOKEN_CACHE_FILE)"
+    )
+    PERSISTENT_CACHE_MAX_ENTRIES: int = Field(
+        1024,
+        description="Maximum number of responses in the persistent cache, across API keys"
+    )
+    PERSISTENT_CACHE_MAX_BYTES: int = Field(
+        32 * 1024 * 1024,
+        description="Maximum total size of the persistent cache in bytes (JSON-encoded)"
+    )
+    PERSISTENT_CACHE_KEEP_EXPIRED: float = Field(
+        7 * 24 * 3600.0,
+        description="Seconds expired responses are kept so a later process knows to revalidate them"
+    )
+    PERSISTENT_CACHE_REVALIDATE_MAX: int = Field(
+        32,
+        description="Maximum stale persisted responses refetched at startup"
+    )
+
+    RETRIEVAL_CACHE_ENABLED: bool = Field(
+        True,
+        description="Cache retrieve_information results until the base receives a contribution"
+    )
+    RETRIEVAL_CACHE_TTL: float = Field(
+        300.0,
+        description="Seconds to cache retrieve_information results"
+    )
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = Field(
+        512,
+        description="Maximum number of cached retrieve_information results"
+    )
+    RETRIEVAL_CACHE_MAX_BYTES: int = Field(
+        16 * 1024 * 1024,
+        description="Maximum total size of cached retrieve_information results in bytes"
+    )
+    FEDERATED_MAX_CONCURRENCY: int = Field(
+        4,
+        description="Maximum number of bases searched concurrently by retrieve_information_from_all_bases"
+    )
+    FEDERATED_BASE_TIMEOUT: float = Field(
+        8.0,
+        description="Seconds to wait for each base once its search has started"
+    )
+    FEDERATED_TOTAL_TIMEOUT: float = Field(
+        20.0,
+        description="Seconds to wait for all bases together, bases not started by then are skipped (0 for no limit)"
+    )
+    BATCH_MAX_OPERATIONS: int = Field(
+        25,
+        description="Maximum number of operations accepted by the batch tool"
+    )
+    BATCH_MAX_CONCURRENCY: int = Field(
+        4,
+        description="Maximum number of batch operations run concurrently"
+    )
+    REQUEST_COALESCING_ENABLED: bool = Field(
+        True,
+        description="Share one upstream call between identical concurrent GET requests"
+    )
+
+    # Metrics settings
+    METRICS_ENABLED: bool = Field(
+        True,
+        description="Record tool and API latencies, served at METRICS_PATH over HTTP and by the server_stats tool over stdio"
+    )
+    METRICS_PATH: str = Field(
+        "/metrics",
+        description="Path of the Prometheus metrics endpoint in HTTP mode"
+    )
+
+    # Tracing settings
+    TRACING_ENABLED: bool = Field(
+        False,
+        description="Record a trace of every tool call, from auth down to the API requests"
+    )
+    TRACE_FILE: str = Field(
+        "traces.jsonl",
+        description="File finished spans are appended to, as OTLP/JSON lines"
+    )
+    TRACE_SAMPLE_RATE: float = Field(
+        1.0,
+        description="Fraction of tool calls traced, unless the caller's traceparent header decides"
+    )
+    TRACE_PROPAGATE: bool = Field(
+        True,
+        description="Send a W3C traceparent header with API requests of traced calls"
+    )
+
+    # Notification settings
+    NOTIFY_LEVEL: str = Field(
+        "full",
+        description="Log and progress notifications sent during tool calls: off, errors or full"
+    )
+    NOTIFY_MIN_DURATION: float = Field(
+        0.5,
+        description="Seconds a tool call runs before its info and progress notifications are sent"
+    )
+    NOTIFY_PROGRESS_INTERVAL: float = Field(
+        0.5,
+        description="Minimum seconds between progress notifications of one tool call"
+    )
 
     # Token cache settings
     TOKEN_CACHE_FILE: str = Field(
@@ -43,9 +389,27 @@ class Settings(BaseSettings):
         extra: str = "allow"
 
 
-# Initialize settings
-load_dotenv()
-settings = Settings(
-    HUUH_API_KEY=os.getenv('HUUH_API_KEY'),
-    INFOLAB_API_URL=os.getenv('BACKEND_URL', "https://api.huuh.me")
-)
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Load the .env file and validate the settings on first use."""
+    global _settings
+    if _settings is None:
+        load_dotenv()
+        _settings = Settings(
+            HUUH_API_KEY=os.getenv('HUUH_API_KEY'),
+            INFOLAB_API_URL=os.getenv('BACKEND_URL', "https://api.huuh.me")
+        )
+    return _settings
+
+
+class _LazySettings:
+    """Stand-in for the settings that loads them on first attribute access."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+
+# Importing the settings is free, they are loaded when first read
+settings = cast(Settings, _LazySettings())
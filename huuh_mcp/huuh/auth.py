@@ -1,15 +1,20 @@
 """huuh MCP authentication implementation."""
+import asyncio
 import json
 import logging
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Any, Optional, Dict
 from urllib.parse import urljoin
 
 import httpx
 from pydantic import BaseModel
 
 from ..config.settings import settings
+from .metrics import metrics
+from .tracing import tracer
+from .transport import get_http_client, close_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +34,21 @@ class TokenData(BaseModel):
 class TokenCache:
     """Manages access token caching and retrieval."""
 
-    def __init__(self, cache_file: str = None):
+    def __init__(self, cache_file: str = None, persist: bool = True):
         self.cache_file = cache_file or settings.TOKEN_CACHE_FILE
+        # In-memory only caches are used for tenants of a shared HTTP server
+        self.persist = persist
         self._token_data: Optional[TokenData] = None
-        self._load_from_cache()
+        # The cache file is read on first use rather than at construction
+        self._loaded = False
 
     def _load_from_cache(self) -> None:
         """Load token data from cache file if it exists."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.persist:
+            return
         cache_path = Path(self.cache_file)
         if not cache_path.exists():
             return
@@ -54,12 +67,12 @@ class TokenCache:
                     logger.info("Cached token is expired")
                     self._token_data = None
         except Exception as e:
-            logger.error(f"Error loading token from cache: {str(e)}")
+            logger.error("Error loading token from cache: %s", e)
             self._token_data = None
 
     def _save_to_cache(self) -> None:
         """Save token data to cache file."""
-        if not self._token_data:
+        if not self._token_data or not self.persist:
             return
 
         try:
@@ -72,15 +85,24 @@ class TokenCache:
             with open(self.cache_file, "w") as f:
                 json.dump(data, f)
         except Exception as e:
-            logger.error(f"Error saving token to cache: {str(e)}")
+            logger.error("Error saving token to cache: %s", e)
 
     @property
     def token(self) -> Optional[str]:
         """Get the current access token if valid."""
+        self._load_from_cache()
         if not self._token_data or self._token_data.is_expired():
             return None
         return self._token_data.access_token
 
+    @property
+    def expires_at(self) -> Optional[datetime]:
+        """Get the expiry time of the current token, if any."""
+        self._load_from_cache()
+        if not self._token_data:
+            return None
+        return self._token_data.expires_at
+
     @property
     def auth_header(self) -> Optional[Dict[str, str]]:
         """Get authorization header with the current token."""
@@ -91,50 +113,92 @@ class TokenCache:
     def update_token(self, access_token: str, expires_in: int) -> None:
         """Update the token with a new one."""
         expires_at = datetime.now() + timedelta(seconds=expires_in)
+        self._loaded = True
         self._token_data = TokenData(
             access_token=access_token,
             expires_at=expires_at
         )
         self._save_to_cache()
-        logger.info(f"Updated access token, expires at {expires_at.isoformat()}")
+        logger.info("Updated access token, expires at %s", expires_at.isoformat())
+
+    def clear(self) -> None:
+        """Forget the current token so the next lookup exchanges the API key again."""
+        self._loaded = True
+        self._token_data = None
 
 
 class AuthClient:
     """Client for MCP authentication with huuh API."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        token_cache: Optional[TokenCache] = None,
+        background_renewal: Optional[bool] = None
+    ):
         self.api_url = str(settings.INFOLAB_API_URL)
-        self.api_key = settings.HUUH_API_KEY.get_secret_value()
+        if api_key is None and settings.HUUH_API_KEY is not None:
+            api_key = settings.HUUH_API_KEY.get_secret_value()
+        self.api_key = api_key
         self.token_endpoint = urljoin(self.api_url, settings.TOKEN_ENDPOINT)
         self.validate_endpoint = urljoin(self.api_url, settings.VALIDATE_ENDPOINT)
-        self.token_cache = TokenCache()
-        # Use limits and timeouts for better reliability
-        self.http_client = httpx.AsyncClient(
-            timeout=30.0,  # 30 seconds timeout
-            limits=httpx.Limits(
-                max_keepalive_connections=5,
-                max_connections=10,
-                keepalive_expiry=30.0
-            )
+        self.token_cache = token_cache or TokenCache()
+        self.background_renewal = (
+            settings.TOKEN_BACKGROUND_RENEWAL if background_renewal is None else background_renewal
         )
+        # Last token the backend confirmed as valid and when (monotonic clock)
+        self._validated_token: Optional[str] = None
+        self._validated_at: float = 0.0
+        # In-flight token exchange shared by concurrent callers
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._renewal_task: Optional[asyncio.Task] = None
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """HTTP client shared with the API client."""
+        return get_http_client()
 
     async def get_token(self) -> str:
         """Get a valid access token, refreshing if necessary."""
+        self._ensure_renewal_task()
         if self.token_cache.token:
             return self.token_cache.token
 
         return await self.refresh_token()
 
     async def refresh_token(self) -> str:
-        """Exchange API key for a new access token."""
+        """
+        Exchange API key for a new access token.
+
+        Concurrent callers share a single in-flight exchange instead of each
+        posting to the token endpoint and rewriting the token cache file.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._exchange_token())
+            # Mark the exception as retrieved even if every waiter was cancelled
+            self._refresh_task.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+        # Shield so that a cancelled caller does not abort the exchange for the others
+        return await asyncio.shield(self._refresh_task)
+
+    async def _exchange_token(self) -> str:
+        """Perform the API key to access token exchange."""
+        if not self.api_key:
+            raise ValueError("No API key configured")
+
         logger.info("Exchanging API key for access token")
 
         try:
-            response = await self.http_client.post(
-                self.token_endpoint,
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                timeout=15.0  # Specific timeout for token requests
-            )
+            with (
+                metrics.timer("huuh_phase_duration_seconds", phase="token_exchange"),
+                tracer.span("token_exchange")
+            ):
+                response = await self.http_client.post(
+                    self.token_endpoint,
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    timeout=15.0  # Specific timeout for token requests
+                )
 
             response.raise_for_status()  # Raise exception for HTTP errors
 
@@ -143,19 +207,19 @@ class AuthClient:
             expires_in = data.get("expires_in")
 
             if not access_token or not expires_in:
-                logger.error(f"Invalid token response: {data}")
+                logger.error("Invalid token response: %s", data)
                 raise ValueError("Invalid token response")
 
             self.token_cache.update_token(access_token, expires_in)
             return access_token
         except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error during token refresh: {e.response.status_code} - {e.response.text}")
+            logger.error("HTTP error during token refresh: %s - %s", e.response.status_code, e.response.text)
             raise ValueError(f"Failed to get token: {e.response.status_code}")
         except httpx.RequestError as e:
-            logger.error(f"Request error during token refresh: {str(e)}")
+            logger.error("Request error during token refresh: %s", e)
             raise ValueError(f"Connection error: {str(e)}")
         except Exception as e:
-            logger.error(f"Error refreshing token: {str(e)}")
+            logger.error("Error refreshing token: %s", e)
             raise
 
     async def validate_token(self, token: Optional[str] = None) -> bool:
@@ -166,38 +230,123 @@ class AuthClient:
             if not self.token_cache.token:
                 logger.error("No valid token available for validation")
                 return False
+            token = self.token_cache.token
+
+        if (
+            token == self._validated_token
+            and time.monotonic() - self._validated_at < settings.VALIDATION_CACHE_TTL
+        ):
+            return True
 
         try:
-            response = await self.http_client.get(
-                self.validate_endpoint,
-                headers={"Authorization": f"Bearer {token}"},
-                timeout=10.0  # Shorter timeout for validation
-            )
+            with (
+                metrics.timer("huuh_phase_duration_seconds", phase="token_validation"),
+                tracer.span("token_validation")
+            ):
+                response = await self.http_client.get(
+                    self.validate_endpoint,
+                    headers={"Authorization": f"Bearer {token}"},
+                    timeout=10.0  # Shorter timeout for validation
+                )
 
             if response.status_code != 200:
-                logger.warning(f"Token validation failed: {response.status_code} - {response.text}")
+                logger.warning("Token validation failed: %s - %s", response.status_code, response.text)
+                self._validated_token = None
                 return False
 
+            self._validated_token = token
+            self._validated_at = time.monotonic()
             return True
         except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error during token validation: {e.response.status_code}")
+            logger.error("HTTP error during token validation: %s", e.response.status_code)
             return False
         except httpx.RequestError as e:
-            logger.error(f"Request error during token validation: {str(e)}")
+            logger.error("Request error during token validation: %s", e)
             return False
         except Exception as e:
-            logger.error(f"Error validating token: {str(e)}")
+            logger.error("Error validating token: %s", e)
             return False
 
+    def _ensure_renewal_task(self) -> None:
+        """Start the background renewal task if enabled and not yet running."""
+        if not self.background_renewal:
+            return
+        if self._renewal_task is not None and not self._renewal_task.done():
+            return
+        self._renewal_task = asyncio.create_task(self._renew_before_expiry())
+
+    async def _renew_before_expiry(self) -> None:
+        """Refresh the token ahead of its expiry so tool calls never wait for an exchange."""
+        failures = 0
+        while True:
+            expires_at = self.token_cache.expires_at
+            if expires_at is None:
+                delay = 0.0
+            else:
+                remaining = (expires_at - datetime.now()).total_seconds()
+                # Never renew more often than every half token lifetime, even
+                # when the margin is larger than the lifetime itself
+                delay = max(remaining - settings.TOKEN_RENEWAL_MARGIN, remaining / 2)
+            if failures:
+                delay = max(delay, min(2 ** failures, 60))
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if self.token_cache.expires_at != expires_at:
+                    # Refreshed by a request in the meantime, reschedule
+                    continue
+
+            try:
+                await self.refresh_token()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                logger.warning("Background token renewal failed: %s", e)
+
+    def invalidate_token(self, token: str) -> None:
+        """Drop a token the backend rejected.
+
+        Only clears the cache if it still holds the rejected token, so a token
+        refreshed by a concurrent request is not thrown away.
+        """
+        if self._validated_token == token:
+            self._validated_token = None
+        if self.token_cache.token == token:
+            logger.info("Access token rejected by backend, clearing cached token")
+            self.token_cache.clear()
+
     async def get_auth_header(self) -> Dict[str, str]:
         """Get authorization header with a valid token."""
         token = await self.get_token()
         return {"Authorization": f"Bearer {token}"}
 
+    def stop(self) -> None:
+        """Stop background token renewal."""
+        if self._renewal_task is not None:
+            self._renewal_task.cancel()
+            self._renewal_task = None
+
     async def close(self) -> None:
-        """Close the HTTP client."""
-        await self.http_client.aclose()
+        """Stop background renewal and close the shared HTTP client."""
+        self.stop()
+        await close_http_client()
+
+
+_auth_client: Optional[AuthClient] = None
+
+
+def get_auth_client() -> AuthClient:
+    """Get the auth client of the server's own API key, creating it on first use."""
+    global _auth_client
+    if _auth_client is None:
+        _auth_client = AuthClient()
+    return _auth_client
 
 
-# Create a singleton instance
-auth_client = AuthClient()
+def __getattr__(name: str) -> Any:
+    # The singleton stays importable as `auth_client` but is only built when first used
+    if name == "auth_client":
+        return get_auth_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,196 @@
+"""Response caching for read-only huuh API calls."""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+from ..utils.text import normalize_whitespace
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(
+    method: str,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None
+) -> Tuple[str, str, Tuple[Tuple[str, str], ...]]:
+    """
+    Build a cache key for a request.
+
+    Query parameters given inline in the endpoint and through ``params`` are
+    merged and sorted, so equivalent requests map to the same key.
+
+    Args:
+        method: HTTP method
+        endpoint: API endpoint path, optionally with a query string
+        params: Query parameters
+
+    Returns:
+        Tuple of (method, path, sorted query items)
+    """
+    parts = urlsplit(endpoint)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((key, str(value)) for key, value in params.items() if value is not None)
+    return method.upper(), parts.path, tuple(sorted(query))
+
+
+def retrieval_key(
+    query: str,
+    course_id: str,
+    relevant_modules: Optional[Iterable[str]] = None,
+    relevant_groups: Optional[Iterable[str]] = None,
+    relevant_file_ids: Optional[Iterable[str]] = None
+) -> Tuple[str, str, Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Build a cache key for a retrieval query.
+
+    Queries differing only in whitespace or case, and filters given in a
+    different order, map to the same key.
+
+    Returns:
+        Tuple of (normalized query, course ID, sorted modules, sorted groups, sorted file IDs)
+    """
+    return (
+        normalize_whitespace(query).casefold(),
+        course_id,
+        tuple(sorted(set(relevant_modules or ()))),
+        tuple(sorted(set(relevant_groups or ()))),
+        tuple(sorted(set(relevant_file_ids or ()))),
+    )
+
+
+class _CacheEntry:
+    """A cached value with its expiry, estimated size and invalidation tag."""
+    __slots__ = ("value", "expires_at", "size", "tag")
+
+    def __init__(self, value: Any, expires_at: float, size: int, tag: Optional[Hashable]):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.tag = tag
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with per-entry TTLs and tag-based invalidation.
+
+    Expired entries are kept for up to ``max_stale`` seconds so they can
+    still be served through ``get_stale`` while they are being refreshed.
+    Values are returned as stored, callers must not mutate them.
+
+    Every invalidation advances the generation of its tag, so a caller can
+    tell whether a value fetched meanwhile predates the invalidation.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 8 * 1024 * 1024, max_stale: float = 0.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        # Invalidations per tag, and clears of the whole cache
+        self._generations: Dict[Hashable, int] = {}
+        self._clears = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        now = time.monotonic()
+        if entry.expires_at <= now:
+            if entry.expires_at + self.max_stale <= now:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Get an expired value that is at most max_stale seconds past its expiry, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if entry.expires_at > now or entry.expires_at + self.max_stale <= now:
+            return None
+
+        self._entries.move_to_end(key)
+        self.stale_hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: float, tag: Optional[Hashable] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value to cache
+            ttl: Seconds until the entry expires
+            tag: Optional tag used to invalidate related entries together
+        """
+        try:
+            size = len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            logger.debug("Not caching unserializable value for %s", key)
+            return
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(value, time.monotonic() + ttl, size, tag)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def generation(self, tag: Hashable) -> int:
+        """Get a number that changes whenever entries of the tag are invalidated or the cache is cleared."""
+        return self._generations.get(tag, 0) + self._clears
+
+    def invalidate(self, tag: Hashable) -> int:
+        """
+        Remove all entries stored with the given tag.
+
+        Returns:
+            Number of entries removed
+        """
+        self._generations[tag] = self._generations.get(tag, 0) + 1
+        keys = [key for key, entry in self._entries.items() if entry.tag == tag]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._clears += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and hit/miss counters."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
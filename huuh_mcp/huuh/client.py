@@ -1,34 +1,87 @@
 """Client for interacting with the huuh backend API."""
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional
-from urllib.parse import urljoin
+import time
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Hashable, List, Optional, Tuple, TypeVar
+from urllib.parse import urljoin, urlsplit
 
 import httpx
 
 from ..config.settings import settings
-from .auth import auth_client
+from .auth import AuthClient, get_auth_client
+from .cache import ResponseCache, request_key
+from .compression import compressor, transfer_stats
+from .decoding import collect_field, dumps, loads
+from .hedging import hedger
+from .metrics import metrics
+from .persistence import PersistentCache, persistent_cache
+from .refresh import refresh_scheduler
+from .resilience import (
+    IDEMPOTENT_METHODS, RETRYABLE_STATUSES, CircuitBreaker, CircuitOpenError,
+    backoff_delay, parse_retry_after, resilience
+)
+from .tracing import KIND_CLIENT, http_trace_hook, tracer
+from .transport import get_http_client, close_http_client
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+# Cached endpoints whose entries go stale after a write to the given endpoint
+CACHE_INVALIDATIONS: Dict[str, Tuple[str, ...]] = {
+    "/mcp/refresh_persona": ("/mcp/get_persona",),
+    "/mcp/contribute_persona_to_course": ("/mcp/get_persona",),
+    "/mcp/add_persona_to_user": ("/mcp/get_persona",),
+    "/mcp/create_course": ("/mcp/user_options",),
+    "/mcp/create_spaces": ("/mcp/user_options",),
+    "/mcp/assign_base_to_space": ("/mcp/user_options",),
+}
+
+
+def _circuit_open_error(path: str) -> CircuitOpenError:
+    """Build the error of a request rejected by an open circuit, counting it."""
+    logger.warning("Circuit open for %s, failing fast", path)
+    metrics.increment("huuh_upstream_errors_total", endpoint=path, type="circuit_open")
+    return CircuitOpenError(f"Service temporarily unavailable: {path} is failing, try again later")
+
 
 class HuuhClient:
     """HTTP client for communicating with huuh backend API."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        auth: Optional[AuthClient] = None,
+        cache: Optional[ResponseCache] = None,
+        persistent: Optional[PersistentCache] = None
+    ):
         self.api_url = str(settings.INFOLAB_API_URL)
-        # Use limits and timeouts for better reliability
-        self.http_client = httpx.AsyncClient(
-            timeout=30.0,  # 30 seconds timeout
-            limits=httpx.Limits(
-                max_keepalive_connections=5,
-                max_connections=10,
-                keepalive_expiry=30.0
-            )
+        self.auth = auth or get_auth_client()
+        self.cache = cache or ResponseCache(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+            max_stale=settings.SWR_MAX_STALENESS
         )
-    
+        # On-disk copy of the response cache, its entries are namespaced by API key
+        self.persistent = persistent or (persistent_cache if settings.PERSISTENT_CACHE_ENABLED else None)
+        self.namespace = hashlib.sha256((self.auth.api_key or "").encode()).hexdigest()
+        # Transformed retrieve_information results, tagged with their course ID
+        self.retrieval_cache = ResponseCache(
+            max_entries=settings.RETRIEVAL_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RETRIEVAL_CACHE_MAX_BYTES
+        )
+        # Upstream GETs currently in flight, keyed like the response cache
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """HTTP client shared with the auth client."""
+        return get_http_client()
+
     async def close(self):
-        """Close the HTTP client."""
-        await self.http_client.aclose()
+        """Close the shared HTTP client."""
+        await close_http_client()
     
     async def request(
         self, 
@@ -56,36 +109,368 @@ class HuuhClient:
         Raises:
             ValueError: If the request fails
         """
+        ttl = self._cache_ttl(method, endpoint)
+        cache_key = request_key(method, endpoint, params) if ttl else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is None and self.persistent is not None:
+                cached = await self._load_persisted(cache_key)
+            if cached is not None:
+                logger.debug("Serving %s %s from cache", method, endpoint)
+                return cached
+
+            # Expired but recent enough: answer now and refresh in the background
+            stale = self.cache.get_stale(cache_key) if self._serves_stale(cache_key) else None
+            if stale is not None:
+                logger.debug("Serving stale %s %s while it is refreshed", method, endpoint)
+                refresh_scheduler.schedule(
+                    (self.namespace, cache_key),
+                    lambda: self._refresh(cache_key, method, endpoint, params, headers, timeout, ttl)
+                )
+                return stale
+
+        # A write invalidating the endpoint while this request is in flight makes its response stale
+        generation = self.cache.generation(cache_key[1]) if cache_key is not None else None
+        if method.upper() == "GET" and settings.REQUEST_COALESCING_ENABLED:
+            key = cache_key or request_key(method, endpoint, params)
+            data = await self._send_coalesced(
+                key, lambda: self._send(method, endpoint, json, params, headers, timeout)
+            )
+        else:
+            try:
+                data = await self._send(method, endpoint, json, params, headers, timeout)
+            finally:
+                # Invalidate even if the write failed, it may have been applied anyway
+                if method.upper() != "GET":
+                    self._invalidate_after_write(endpoint)
+
+        if cache_key is not None:
+            self._store(cache_key, data, ttl, generation)
+        return data
+
+    def _store(
+        self,
+        cache_key: Tuple[str, str, Tuple[Tuple[str, str], ...]],
+        data: Any,
+        ttl: float,
+        generation: Optional[int] = None
+    ) -> None:
+        """
+        Cache a response in memory and, if enabled, on disk.
+
+        With generation, the cache generation of the endpoint taken before the
+        response was requested, a response that an invalidation overtook is
+        not stored, as it may predate the write behind the invalidation.
+        """
+        if generation is not None and self.cache.generation(cache_key[1]) != generation:
+            logger.debug("Not caching %s %s, invalidated while it was fetched", cache_key[0], cache_key[1])
+            return
+        self.cache.set(cache_key, data, ttl, tag=cache_key[1])
+        if self.persistent is not None:
+            self.persistent.set(self.namespace, cache_key, data, ttl, tag=cache_key[1])
+
+    async def _load_persisted(self, cache_key: Tuple[str, str, Tuple[Tuple[str, str], ...]]) -> Optional[Any]:
+        """Get a response persisted by this or an earlier process, copying it to the memory cache."""
+        if self.persistent is None:
+            return None
+        max_stale = settings.SWR_MAX_STALENESS if self._serves_stale(cache_key) else 0.0
+        generation = self.cache.generation(cache_key[1])
+        persisted = await self.persistent.load(self.namespace, cache_key, max_stale=max_stale)
+        if persisted is None:
+            return None
+        data, remaining = persisted
+        if self.cache.generation(cache_key[1]) != generation:
+            # Invalidated while it was read
+            return None
+        self.cache.set(cache_key, data, remaining, tag=cache_key[1])
+        # A stale copy is picked up by the stale-while-revalidate path
+        return data if remaining > 0 else None
+
+    def _serves_stale(self, cache_key: Tuple[str, str, Tuple[Tuple[str, str], ...]]) -> bool:
+        """Check whether expired responses of the key's endpoint may be served while refreshing."""
+        return settings.SWR_MAX_STALENESS > 0 and cache_key[1] in settings.SWR_ENDPOINTS
+
+    async def _refresh(
+        self,
+        cache_key: Tuple[str, str, Tuple[Tuple[str, str], ...]],
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        ttl: float
+    ) -> None:
+        """Refetch a cached response, joining a fetch of the same request already in flight."""
+        generation = self.cache.generation(cache_key[1])
+        data = await self._send_coalesced(
+            cache_key, lambda: self._send(method, endpoint, None, params, headers, timeout)
+        )
+        self._store(cache_key, data, ttl, generation)
+
+    async def revalidate_persisted(self, max_concurrency: int = 4, limit: Optional[int] = None) -> int:
+        """
+        Refetch stale responses persisted for this API key, e.g. by earlier processes.
+
+        Meant to run in the background at startup. Only responses that
+        expired recently enough to be served stale are refetched, most
+        recently expired first: fresh ones are served from disk as they are,
+        and older ones are fetched when asked for. Calls for them meanwhile
+        join the refetch already in flight.
+
+        Args:
+            max_concurrency: Maximum refetches at once
+            limit: Maximum responses refetched (defaults to PERSISTENT_CACHE_REVALIDATE_MAX)
+
+        Returns:
+            Number of responses refreshed
+        """
+        if self.persistent is None:
+            return 0
+        limit = settings.PERSISTENT_CACHE_REVALIDATE_MAX if limit is None else limit
+        stale = [
+            (remaining, key) for key, remaining in await self.persistent.load_entries(self.namespace)
+            if -settings.SWR_MAX_STALENESS < remaining <= 0
+            and self._cache_ttl(key[0], key[1]) and self._serves_stale(key)
+        ]
+        stale.sort(key=lambda entry: entry[0], reverse=True)
+        keys = [key for _, key in stale[:max(limit, 0)]]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _refresh(key: Tuple[str, str, Tuple[Tuple[str, str], ...]]) -> bool:
+            method, path, query = key
+            generation = self.cache.generation(path)
+            async with semaphore:
+                try:
+                    data = await self._send_coalesced(
+                        key, lambda: self._send(method, path, None, dict(query), None, None)
+                    )
+                except ValueError as e:
+                    logger.debug("Could not revalidate %s %s: %s", method, path, e)
+                    return False
+            self._store(key, data, self._cache_ttl(method, path), generation)
+            return True
+
+        refreshed = sum(await asyncio.gather(*(_refresh(key) for key in keys)))
+        logger.debug("Revalidated %d/%d stale persisted responses", refreshed, len(keys))
+        return refreshed
+
+    def _cache_ttl(self, method: str, endpoint: str) -> float:
+        """Get the cache TTL for a request, 0 if it must not be cached."""
+        if not settings.RESPONSE_CACHE_ENABLED or method.upper() != "GET":
+            return 0.0
+        return settings.RESPONSE_CACHE_TTLS.get(urlsplit(endpoint).path, 0.0)
+
+    def _invalidate_after_write(self, endpoint: str) -> None:
+        """Evict cached responses made stale by a write to the endpoint."""
+        for cached_endpoint in CACHE_INVALIDATIONS.get(urlsplit(endpoint).path, ()):
+            if self.persistent is not None:
+                self.persistent.invalidate(self.namespace, cached_endpoint)
+            removed = self.cache.invalidate(cached_endpoint)
+            # Later reads must not join a fetch sent before the write
+            for key in [key for key in self._inflight if len(key) == 3 and key[1] == cached_endpoint]:
+                del self._inflight[key]
+            if removed:
+                logger.debug("Invalidated %d cached %s responses", removed, cached_endpoint)
+
+    async def stream_field(
+        self,
+        endpoint: str,
+        key: str,
+        field: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> List[Any]:
+        """
+        GET an endpoint and collect one field of every item of an array in the response.
+
+        The body is decoded while it streams in, one array item at a time, so
+        neither the raw payload nor the fields that are not needed are ever
+        held in memory as a whole. Responses are not cached.
+
+        Args:
+            endpoint: API endpoint path
+            key: Name of the array member of the top-level response object
+            field: Field to take from each array item
+            params: Query parameters
+            headers: Additional headers
+            timeout: Request timeout in seconds
+
+        Returns:
+            The field values in array order
+
+        Raises:
+            ValueError: If the request fails
+        """
+        def _stream() -> Awaitable[List[Any]]:
+            return self._stream_field(endpoint, key, field, params, headers, timeout)
+
+        if settings.REQUEST_COALESCING_ENABLED:
+            return await self._send_coalesced(("stream", key, field, request_key("GET", endpoint, params)), _stream)
+        return await _stream()
+
+    async def _send_coalesced(self, key: Hashable, send: Callable[[], Awaitable[T]]) -> T:
+        """Send a request, sharing one upstream call between identical concurrent callers."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(send())
+            self._inflight[key] = task
+
+            def _forget(done: asyncio.Task) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+                # Mark the exception as retrieved even if every waiter was cancelled
+                if not done.cancelled():
+                    done.exception()
+
+            task.add_done_callback(_forget)
+        else:
+            logger.debug("Joining in-flight request %s", key)
+
+        # Shield so that a cancelled waiter does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        json: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        """Send a request upstream and decode its JSON response."""
+        with tracer.span(f"api {method} {urlsplit(endpoint).path}"):
+            response = await self._send_response(method, endpoint, json, params, headers, timeout)
+        try:
+            with metrics.timer("huuh_phase_duration_seconds", phase="decode"), tracer.span("decode"):
+                return loads(response.content)
+        except ValueError as e:
+            metrics.increment("huuh_upstream_errors_total", endpoint=urlsplit(endpoint).path, type="decode")
+            logger.error("Unexpected error during request: %s", e)
+            raise ValueError(f"Unexpected error: {str(e)}")
+
+    async def _stream_field(
+        self,
+        endpoint: str,
+        key: str,
+        field: str,
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float]
+    ) -> List[Any]:
+        """Send a GET upstream and collect a field from its array while the body streams in."""
+        with tracer.span(f"api GET {urlsplit(endpoint).path}"):
+            response = await self._send_response("GET", endpoint, None, params, headers, timeout, stream=True)
+        decoded = 0
+
+        async def _chunks() -> AsyncIterator[bytes]:
+            nonlocal decoded
+            async for chunk in response.aiter_bytes(settings.STREAM_CHUNK_SIZE):
+                decoded += len(chunk)
+                yield chunk
+
+        try:
+            # Covers reading the body too, decoding is interleaved with it
+            with tracer.span("decode", attributes={"streaming": True}):
+                return await collect_field(_chunks(), key, field)
+        except httpx.RequestError as e:
+            logger.error("Request error: %s", e)
+            raise ValueError(f"Connection error: {str(e)}")
+        except ValueError as e:
+            logger.error("Unexpected error during request: %s", e)
+            raise ValueError(f"Unexpected error: {str(e)}")
+        finally:
+            await response.aclose()
+            transfer_stats.record_response(response.request.url.path, decoded, response.num_bytes_downloaded)
+
+    async def _send_response(
+        self,
+        method: str,
+        endpoint: str,
+        json: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        stream: bool = False
+    ) -> httpx.Response:
+        """
+        Send a request upstream with retries, converting errors to ValueError.
+
+        With stream set the body is left unread on success and the caller
+        must close the response.
+        """
+        path = urlsplit(endpoint).path
+        breaker = resilience.breaker(path)
+        if settings.CIRCUIT_BREAKER_ENABLED and not breaker.allow():
+            raise _circuit_open_error(path)
+
+        def _circuit_opened() -> bool:
+            # Retries stop once the circuit opens, failing with the last error
+            return settings.CIRCUIT_BREAKER_ENABLED and breaker.state == CircuitBreaker.OPEN
+
+        started = time.perf_counter()
         try:
-            # Get authorization header
-            auth_headers = await auth_client.get_auth_header()
-            
-            # Build headers
-            request_headers = headers or {}
-            request_headers.update(auth_headers)
-            
             # Build URL
             url = urljoin(self.api_url, endpoint)
             
             # Build timeout
             request_timeout = httpx.Timeout(timeout) if timeout else None
+
+            # Only idempotent requests are retried or hedged, a repeated write could apply twice.
+            # Streamed requests are not hedged, the losing copy would keep its connection busy
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+            attempts = settings.RETRY_MAX_ATTEMPTS if idempotent else 1
+            hedge = idempotent and not stream and settings.HEDGE_ENABLED and path in settings.HEDGE_ENDPOINTS
+
+            def _attempt() -> Awaitable[httpx.Response]:
+                return self._send_authenticated(method, url, json, params, headers, request_timeout, stream)
+
+            def _succeeded(response: httpx.Response) -> bool:
+                return response.status_code not in RETRYABLE_STATUSES
+
+            attempt = 1
+            while True:
+                try:
+                    response = await (hedger.run(path, _attempt, _succeeded) if hedge else _attempt())
+                except httpx.RequestError:
+                    breaker.record_failure()
+                    if attempt >= attempts or _circuit_opened():
+                        raise
+                    response = None
+                    retry_after = None
+                else:
+                    if response.status_code not in RETRYABLE_STATUSES:
+                        breaker.record_success()
+                        break
+                    # Throttling means the backend is up, only count server errors
+                    if response.status_code != 429:
+                        breaker.record_failure()
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if attempt >= attempts or _circuit_opened() or (
+                        retry_after is not None and retry_after > settings.RETRY_BACKOFF_MAX
+                    ):
+                        break
+
+                if response is not None:
+                    await response.aclose()
+                delay = backoff_delay(attempt, retry_after)
+                logger.info("Retrying %s %s in %.2fs (attempt %d/%d)", method, path, delay, attempt + 1, attempts)
+                resilience.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                # Other requests may have opened the circuit meanwhile
+                if settings.CIRCUIT_BREAKER_ENABLED and not breaker.allow():
+                    raise _circuit_open_error(path)
             
-            # Make request
-            logger.debug(f"Making {method} request to {url}")
-            response = await self.http_client.request(
-                method, 
-                url,
-                json=json, 
-                params=params, 
-                headers=request_headers,
-                timeout=request_timeout
-            )
-            
-            # Check for errors
+            # Check for errors, reading a streamed error body for its detail
+            if stream and response.is_error:
+                await response.aread()
             response.raise_for_status()
-            
-            # Return response data
-            return response.json()
+
+            return response
+        except CircuitOpenError:
+            raise
         except httpx.HTTPStatusError as e:
             # Handle HTTP errors
             error_detail = f"HTTP {e.response.status_code}"
@@ -97,17 +482,135 @@ class HuuhClient:
                 if e.response.text:
                     error_detail = e.response.text[:100]  # First 100 chars of error
             
-            logger.error(f"API request failed: {error_detail}")
+            metrics.increment("huuh_upstream_errors_total", endpoint=path, type=f"http_{e.response.status_code}")
+            logger.error("API request failed: %s", error_detail)
             raise ValueError(f"API request failed: {error_detail}")
         except httpx.RequestError as e:
             # Handle request errors (network, timeout, etc.)
-            logger.error(f"Request error: {str(e)}")
+            metrics.increment("huuh_upstream_errors_total", endpoint=path, type=type(e).__name__)
+            logger.error("Request error: %s", e)
             raise ValueError(f"Connection error: {str(e)}")
         except Exception as e:
             # Handle other errors
-            logger.error(f"Unexpected error during request: {str(e)}")
+            metrics.increment("huuh_upstream_errors_total", endpoint=path, type="unexpected")
+            logger.error("Unexpected error during request: %s", e)
             raise ValueError(f"Unexpected error: {str(e)}")
+        finally:
+            metrics.observe("huuh_upstream_duration_seconds", time.perf_counter() - started, endpoint=path)
+
+    async def _send_authenticated(
+        self,
+        method: str,
+        url: str,
+        json: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[httpx.Timeout],
+        stream: bool = False
+    ) -> httpx.Response:
+        """Send one request with the cached token, refreshing it and replaying once on 401."""
+        # Get the cached token; it is only validated by the backend itself
+        token = await self.auth.get_token()
+        
+        # Build headers
+        request_headers = dict(headers or {})
+        request_headers["Authorization"] = f"Bearer {token}"
+        
+        # Make request
+        logger.debug("Making %s request to %s", method, url)
+        response = await self._send_http(method, url, json, params, request_headers, timeout, stream)
+        
+        # The token was revoked or expired server-side: refresh once and replay
+        if response.status_code == 401:
+            self.auth.invalidate_token(token)
+            token = await self.auth.get_token()
+            request_headers["Authorization"] = f"Bearer {token}"
+            logger.debug("Replaying %s request to %s with refreshed token", method, url)
+            await response.aclose()
+            response = await self._send_http(method, url, json, params, request_headers, timeout, stream)
+        return response
+
+    async def _send_http(
+        self,
+        method: str,
+        url: str,
+        json: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        headers: Dict[str, str],
+        timeout: Optional[httpx.Timeout],
+        stream: bool
+    ) -> httpx.Response:
+        """Send one HTTP request, compressing its body when worthwhile and leaving the response unread when streaming."""
+        body = dumps(json) if json is not None else b""
+        content, encoding = compressor.encode(body) if body else (body, None)
+        if json is not None:
+            headers = dict(headers, **{"Content-Type": "application/json"})
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+
+        # Only the path is traced: query strings carry user input such as search text
+        parts = urlsplit(url)
+        attributes = {"http.request.method": method, "server.address": parts.hostname, "url.path": parts.path}
+        with tracer.span(f"HTTP {method}", KIND_CLIENT, attributes) as span:
+            extensions = None
+            if span is not None:
+                # Connection phases become child spans, the backend continues the trace
+                extensions = {"trace": http_trace_hook(tracer, span)}
+                if settings.TRACE_PROPAGATE:
+                    headers["traceparent"] = span.traceparent()
+
+            request = self.http_client.build_request(
+                method,
+                url,
+                content=content if json is not None else None,
+                params=params,
+                headers=headers,
+                timeout=timeout,
+                extensions=extensions
+            )
+            response = await self.http_client.send(request, stream=stream)
+            compressor.observe(response)
+
+            # The server does not support this encoding after all: resend the body as is
+            if encoding is not None and response.status_code == 415:
+                compressor.reject(encoding)
+                await response.aclose()
+                del headers["Content-Encoding"]
+                content = body
+                request = self.http_client.build_request(
+                    method,
+                    url,
+                    content=content,
+                    params=params,
+                    headers=headers,
+                    timeout=timeout,
+                    extensions=extensions
+                )
+                response = await self.http_client.send(request, stream=stream)
+
+            if span is not None:
+                span.set_attribute("http.response.status_code", response.status_code)
+
+        path = request.url.path
+        transfer_stats.record_request(path, len(body), len(content))
+        if not stream:
+            transfer_stats.record_response(path, len(response.content), response.num_bytes_downloaded)
+        return response
+
+
+_api_client: Optional[HuuhClient] = None
+
+
+def get_api_client() -> HuuhClient:
+    """Get the client of the server's own API key, creating it on first use."""
+    global _api_client
+    if _api_client is None:
+        _api_client = HuuhClient()
+    return _api_client
 
 
-# Create a singleton instance
-api_client = HuuhClient()
+def __getattr__(name: str) -> Any:
+    # The singleton stays importable as `api_client` but is only built when first used
+    if name == "api_client":
+        return get_api_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
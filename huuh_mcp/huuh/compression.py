@@ -0,0 +1,179 @@
+"""Compression of request bodies and accounting of bytes on the wire."""
+import functools
+import gzip
+import importlib.util
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Request body encodings in order of preference, zstd needs the 'compression' extra
+REQUEST_ENCODINGS = ("zstd", "gzip")
+
+
+@functools.lru_cache(maxsize=None)
+def _module_available(name: str) -> bool:
+    """Check whether an optional dependency is installed."""
+    return importlib.util.find_spec(name) is not None
+
+
+def accept_encoding() -> str:
+    """
+    Build the Accept-Encoding header for API requests.
+
+    zstd and brotli come first when their decoders are installed, gzip and
+    deflate are always understood by httpx.
+    """
+    encodings: List[str] = []
+    if _module_available("zstandard"):
+        encodings.append("zstd")
+    if _module_available("brotli") or _module_available("brotlicffi"):
+        encodings.append("br")
+    encodings.extend(("gzip", "deflate"))
+    return ", ".join(encodings)
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with one of REQUEST_ENCODINGS."""
+    if encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    # Favour speed, JSON text compresses well even at low levels
+    return gzip.compress(body, compresslevel=5)
+
+
+class RequestCompressor:
+    """
+    Chooses whether and how to compress request bodies.
+
+    The API advertises the encodings it accepts in the Accept-Encoding header
+    of its responses (RFC 7694). In 'auto' mode bodies are only compressed
+    once such a header was seen, and an encoding the server rejects with 415
+    is not used again.
+    """
+
+    def __init__(self):
+        # Encodings the server advertised, None until a response said so
+        self._accepted: Optional[List[str]] = None
+        self._rejected: set = set()
+
+    def observe(self, response: httpx.Response) -> None:
+        """Learn the accepted request encodings from a response."""
+        header = response.headers.get("Accept-Encoding")
+        if header is None:
+            return
+        accepted = []
+        for item in header.split(","):
+            encoding, _, params = item.lower().partition(";")
+            name, _, quality = params.strip().partition("=")
+            try:
+                refused = name.strip() == "q" and float(quality) == 0
+            except ValueError:
+                refused = False
+            if encoding.strip() and not refused:
+                accepted.append(encoding.strip())
+        if accepted != self._accepted:
+            logger.debug("API accepts request encodings: %s", ", ".join(accepted) or "none")
+        self._accepted = accepted
+
+    def reject(self, encoding: str) -> None:
+        """Stop using an encoding the server refused."""
+        logger.warning("API rejected %s-encoded request body, sending uncompressed", encoding)
+        self._rejected.add(encoding)
+
+    def choose(self, size: int) -> Optional[str]:
+        """
+        Pick the encoding for a request body.
+
+        Args:
+            size: Uncompressed body size in bytes
+
+        Returns:
+            Encoding to use, None to send the body as is
+        """
+        mode = settings.REQUEST_COMPRESSION.lower()
+        if mode == "off" or size < settings.REQUEST_COMPRESSION_MIN_BYTES:
+            return None
+
+        if mode == "auto":
+            if not self._accepted:
+                return None
+            candidates = [encoding for encoding in REQUEST_ENCODINGS if encoding in self._accepted]
+        else:
+            candidates = [mode]
+
+        for encoding in candidates:
+            if encoding in self._rejected or encoding not in REQUEST_ENCODINGS:
+                continue
+            if encoding == "zstd" and not _module_available("zstandard"):
+                continue
+            return encoding
+        return None
+
+    def encode(self, body: bytes) -> Tuple[bytes, Optional[str]]:
+        """
+        Compress a request body if worthwhile.
+
+        Returns:
+            Tuple of (body to send, Content-Encoding or None)
+        """
+        encoding = self.choose(len(body))
+        if encoding is None:
+            return body, None
+        compressed = _compress(body, encoding)
+        if len(compressed) >= len(body):
+            return body, None
+        return compressed, encoding
+
+
+class TransferStats:
+    """Per-endpoint counters of payload bytes before and after compression."""
+
+    def __init__(self):
+        self._endpoints: Dict[str, Dict[str, int]] = {}
+
+    def _counters(self, path: str) -> Dict[str, int]:
+        counters = self._endpoints.get(path)
+        if counters is None:
+            counters = {
+                "requests": 0,
+                "request_bytes": 0,
+                "request_wire_bytes": 0,
+                "response_bytes": 0,
+                "response_wire_bytes": 0,
+            }
+            self._endpoints[path] = counters
+        return counters
+
+    def record_request(self, path: str, size: int, wire_size: int) -> None:
+        """Record a request body of size bytes, sent as wire_size bytes."""
+        counters = self._counters(path)
+        counters["requests"] += 1
+        counters["request_bytes"] += size
+        counters["request_wire_bytes"] += wire_size
+
+    def record_response(self, path: str, size: int, wire_size: int) -> None:
+        """Record a response body of size bytes, received as wire_size bytes."""
+        counters = self._counters(path)
+        counters["response_bytes"] += size
+        counters["response_wire_bytes"] += wire_size
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the byte counters and bytes saved per endpoint."""
+        return {
+            path: dict(
+                counters,
+                saved_bytes=(counters["request_bytes"] - counters["request_wire_bytes"]
+                             + counters["response_bytes"] - counters["response_wire_bytes"])
+            )
+            for path, counters in self._endpoints.items()
+        }
+
+
+# Shared by all tenants, the API's capabilities do not depend on the caller
+compressor = RequestCompressor()
+transfer_stats = TransferStats()
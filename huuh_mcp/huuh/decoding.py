@@ -0,0 +1,176 @@
+"""JSON encoding of huuh API requests and decoding of responses, whole or streamed."""
+import codecs
+import json
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Callable, List, Optional
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+_loads: Optional[Callable[[bytes], Any]] = None
+
+
+def _orjson_loads() -> Optional[Callable[[bytes], Any]]:
+    """Get orjson's decoder if the optional dependency is installed."""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson.loads
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decode a JSON document with the configured backend.
+
+    JSON_BACKEND 'auto' uses orjson when it is installed and the standard
+    library otherwise, 'orjson' warns and falls back when it is missing.
+    """
+    global _loads
+    if _loads is None:
+        backend = settings.JSON_BACKEND.lower()
+        fast = _orjson_loads() if backend in ("auto", "orjson") else None
+        if fast is None and backend == "orjson":
+            logger.warning("JSON_BACKEND is 'orjson' but it is not installed (pip install huuh-mcp[fast-json]), "
+                           "falling back to the standard library")
+        _loads = fast or json.loads
+    return _loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a request body as compact UTF-8 JSON, the way httpx does."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+class _StreamReader:
+    """Text buffer over a byte stream that JSON values can be decoded from."""
+
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    async def _fill(self) -> None:
+        """Append the next chunk to the buffer, dropping what was already consumed."""
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self.buffer += self._utf8.decode(b"", final=True)
+            self.eof = True
+        else:
+            self.buffer += self._utf8.decode(chunk)
+
+    async def _fill_until(self, size: int) -> None:
+        """Read until the unconsumed buffer holds at least size characters or the stream ends."""
+        while not self.eof and len(self.buffer) - self.pos < size:
+            await self._fill()
+
+    async def peek(self) -> str:
+        """Skip whitespace and get the next character, empty at the end of the stream."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            await self._fill()
+
+    async def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars."""
+        char = await self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Invalid JSON: expected one of {chars!r} at offset {self.pos}, got {char!r}")
+        self.pos += 1
+        return char
+
+    async def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        await self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A value ending exactly at the buffer end may be a cut-off number
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            # Grow the buffer geometrically so a large value is re-scanned a bounded number of times
+            await self._fill_until(2 * (len(self.buffer) - self.pos) + 1)
+
+
+async def _find_key(reader: _StreamReader, key: str) -> bool:
+    """Advance through the top-level object to the value of key, False if it is missing."""
+    await reader.expect("{")
+    if await reader.peek() == "}":
+        return False
+    while True:
+        name = await reader.value()
+        await reader.expect(":")
+        if name == key:
+            return True
+        # Other members are decoded and discarded, they are small next to the documents
+        await reader.value()
+        if await reader.expect(",}") == "}":
+            return False
+
+
+async def iter_array_items(chunks: AsyncIterable[bytes], key: str) -> AsyncIterator[Any]:
+    """
+    Decode the items of an array member of a streamed top-level JSON object.
+
+    Only one item is held decoded at a time, so memory stays bounded by the
+    largest item rather than the whole response.
+
+    Args:
+        chunks: Raw response body chunks
+        key: Name of the array member of the top-level object
+
+    Yields:
+        Each item of the array in order, nothing if the member is missing or null
+    """
+    reader = _StreamReader(chunks)
+    if not await _find_key(reader, key):
+        return
+    if await reader.peek() != "[":
+        value = await reader.value()
+        if value is not None:
+            raise ValueError(f"Invalid response: '{key}' is not an array")
+        return
+
+    await reader.expect("[")
+    if await reader.peek() == "]":
+        return
+    while True:
+        yield await reader.value()
+        if await reader.expect(",]") == "]":
+            return
+
+
+async def collect_field(chunks: AsyncIterable[bytes], key: str, field: str) -> List[Any]:
+    """
+    Collect one field of every object in a streamed array member.
+
+    Args:
+        chunks: Raw response body chunks
+        key: Name of the array member of the top-level object
+        field: Field to take from each item, items without it are skipped
+
+    Returns:
+        The field values in array order
+    """
+    values = []
+    async for item in iter_array_items(chunks, key):
+        if isinstance(item, dict) and field in item:
+            values.append(item[field])
+    return values
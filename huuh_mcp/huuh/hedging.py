@@ -0,0 +1,139 @@
+"""Hedged requests to cut the tail latency of idempotent reads."""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Rolling window of recent request latencies for one endpoint."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float) -> None:
+        """Add a latency sample in seconds."""
+        self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Get a latency percentile (0-100) of the window, None if empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(math.ceil(percentile / 100 * len(ordered)) - 1, len(ordered) - 1)
+        return ordered[max(index, 0)]
+
+
+class Hedger:
+    """
+    Sends a second copy of slow requests and keeps whichever answers first.
+
+    A request is hedged once it has been outstanding longer than the
+    HEDGE_PERCENTILE latency of its endpoint. Hedges are paid from a token
+    bucket that every request refills by HEDGE_BUDGET, which caps the extra
+    load at that fraction of requests.
+    """
+
+    # Maximum hedges that can be spent in a burst after a quiet period
+    MAX_BURST = 10.0
+
+    def __init__(self):
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._tokens = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def _tracker(self, path: str) -> LatencyTracker:
+        tracker = self._trackers.get(path)
+        if tracker is None:
+            tracker = LatencyTracker()
+            self._trackers[path] = tracker
+        return tracker
+
+    def hedge_delay(self, path: str) -> Optional[float]:
+        """Get how long to wait before hedging a request, None until enough samples exist."""
+        tracker = self._tracker(path)
+        if len(tracker) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        return max(tracker.percentile(settings.HEDGE_PERCENTILE), settings.HEDGE_MIN_DELAY)
+
+    async def run(
+        self,
+        path: str,
+        attempt: Callable[[], Awaitable[T]],
+        succeeded: Callable[[T], bool] = lambda result: True,
+    ) -> T:
+        """
+        Run a request, hedging it if it is slow and the budget allows.
+
+        Only successful copies win the race and have their latency sampled,
+        so fast errors neither beat a slower success nor shorten the delay.
+
+        Args:
+            path: Endpoint path used to pick the latency distribution
+            attempt: Callable starting one copy of the request
+            succeeded: Whether a result of a copy counts as a success
+
+        Returns:
+            The result of the first copy to succeed, or of the primary if none did
+        """
+        self.requests += 1
+        self._tokens = min(self._tokens + settings.HEDGE_BUDGET, self.MAX_BURST)
+        tracker = self._tracker(path)
+        delay = self.hedge_delay(path)
+        started = time.monotonic()
+
+        if delay is None:
+            result = await attempt()
+            if succeeded(result):
+                tracker.record(time.monotonic() - started)
+            return result
+
+        primary = asyncio.create_task(attempt())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and self._tokens >= 1:
+                self._tokens -= 1
+                self.hedged += 1
+                logger.debug("Hedging request to %s after %.3fs", path, delay)
+                pending.add(asyncio.create_task(attempt()))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and succeeded(task.result()):
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        tracker.record(time.monotonic() - started)
+                        return task.result()
+            # Every copy failed, report the primary's error or response
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hedging counters and current hedge delays per endpoint."""
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "delays": {path: self.hedge_delay(path) for path in self._trackers},
+        }
+
+
+# Shared by all tenants, latency depends on the backend rather than the caller
+hedger = Hedger()
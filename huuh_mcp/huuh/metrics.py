@@ -0,0 +1,205 @@
+"""Process-wide latency histograms and counters, rendered in the Prometheus text format."""
+import bisect
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from a cached lookup to a slow retrieval
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# A sample from a collector: (metric name, 'counter' or 'gauge', labels, value)
+Sample = Tuple[str, str, Dict[str, str], float]
+
+METRIC_HELP = {
+    "huuh_tool_duration_seconds": "Duration of MCP tool calls",
+    "huuh_tool_errors_total": "Failed MCP tool calls by error type",
+    "huuh_upstream_duration_seconds": "Duration of API requests per endpoint, including retries",
+    "huuh_upstream_errors_total": "Failed API requests by endpoint and error type",
+    "huuh_phase_duration_seconds": "Duration of request phases: auth, token exchange and validation, decode, transform",
+    "huuh_collector_errors_total": "Metric collectors that failed, by collector",
+}
+
+
+class Histogram:
+    """Latency histogram with fixed buckets."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus the overflow bucket, not cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in, None without data."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the count, mean and estimated p50/p95/p99 in seconds."""
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels)
+    return "{" + rendered + "}" if rendered else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    """Context manager behind MetricsRegistry.timer, cheaper than a generator-based one."""
+
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+
+class MetricsRegistry:
+    """
+    Histograms and counters keyed by name and labels.
+
+    Recording is a dictionary lookup and a few additions, cheap enough for
+    every request. State owned by other components (caches, the connection
+    pool, transfer counters) is read at collection time through collectors
+    instead of being mirrored here.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self.started = time.time()
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """Record a duration in the histogram of name and labels."""
+        key = (name, _labels(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def timer(self, name: str, **labels: str) -> "_Timer":
+        """Get a context manager recording the duration of its block, whether or not it raises."""
+        return _Timer(self, name, labels)
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Add to the counter of name and labels."""
+        key = (name, _labels(labels))
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Register a callable returning samples read from other components when metrics are collected."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def histograms(self, name: str) -> Dict[Labels, Histogram]:
+        """Get the histograms recorded under a name, by labels."""
+        return {labels: histogram for (key, labels), histogram in self._histograms.items() if key == name}
+
+    def counters(self, name: str) -> Dict[Labels, float]:
+        """Get the counters recorded under a name, by labels."""
+        return {labels: value for (key, labels), value in self._counters.items() if key == name}
+
+    def collect(self) -> List[Sample]:
+        """Get the samples of all collectors; a failing collector is logged and counted, its samples so far kept."""
+        samples: List[Sample] = []
+        for collector in self._collectors:
+            try:
+                samples.extend(collector())
+            except Exception:
+                name = getattr(collector, "__qualname__", repr(collector))
+                logger.debug("Metrics collector %s failed", name, exc_info=True)
+                self.increment("huuh_collector_errors_total", collector=name)
+        return samples
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str, kind: str) -> None:
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name.replace('_', ' '))}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), histogram in sorted(self._histograms.items()):
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        # Collected first, so that collector failures show up in this scrape's counters
+        samples = sorted(self.collect(), key=lambda sample: (sample[0], sorted(sample[2].items())))
+
+        for (name, labels), value in sorted(self._counters.items()):
+            describe(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name, kind, labels, value in samples:
+            describe(name, kind)
+            lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+
+        describe("huuh_process_start_time_seconds", "gauge")
+        lines.append(f"huuh_process_start_time_seconds {_format_value(self.started)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop recorded histograms and counters, keeping collectors."""
+        self._histograms.clear()
+        self._counters.clear()
+
+
+# One registry per process; with several HTTP workers each reports its own
+metrics = MetricsRegistry()
@@ -0,0 +1,364 @@
+"""SQLite-backed response cache shared by server processes on the same machine."""
+import asyncio
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS responses (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        tag TEXT,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)",
+)
+
+# Expired entries are purged and the caps enforced after this many writes, or this many seconds
+_MAINTENANCE_WRITES = 100
+_MAINTENANCE_INTERVAL = 60.0
+
+# Seconds the writer thread waits for another process's write lock
+_WRITE_TIMEOUT = 5.0
+
+
+def default_path() -> Path:
+    """Get the cache database path, next to the token cache file unless configured."""
+    if settings.PERSISTENT_CACHE_FILE:
+        return Path(settings.PERSISTENT_CACHE_FILE)
+    return Path(settings.TOKEN_CACHE_FILE).with_name("response_cache.sqlite3")
+
+
+def encode_key(key: Hashable) -> str:
+    """Serialize a request cache key to the string stored on disk."""
+    return json.dumps(key, separators=(",", ":"))
+
+
+def decode_key(key: str) -> Tuple[str, str, Tuple[Tuple[str, str], ...]]:
+    """Rebuild a request cache key of (method, path, query items) from its stored form."""
+    method, path, query = json.loads(key)
+    return method, path, tuple((name, value) for name, value in query)
+
+
+class PersistentCache:
+    """
+    Response cache stored in an SQLite database.
+
+    Entries are kept per namespace (one per API key) so that accounts never
+    see each other's responses. The database runs in WAL mode, so several
+    server processes can read and write it at once. Reads never wait for a
+    lock: a busy database counts as a cache miss. Writes are queued to a
+    background thread that batches them into transactions and periodically
+    purges expired entries and enforces the size caps, so the event loop
+    never waits on disk or on another process's write lock; ``load`` reads
+    on a background thread for the same reason. Expiry uses wall-clock
+    time, which survives restarts.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self._path = path
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._queue: "queue.Queue[Optional[Tuple[str, tuple]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._reader: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Invalidations queued but not yet written, by (namespace, tag); reads skip their entries
+        self._pending_invalidations: Dict[Tuple[str, Optional[str]], int] = {}
+
+    @property
+    def path(self) -> Path:
+        """Database file, see default_path unless given."""
+        return self._path or default_path()
+
+    @property
+    def max_entries(self) -> int:
+        """Maximum number of entries, PERSISTENT_CACHE_MAX_ENTRIES unless given."""
+        return self._max_entries if self._max_entries is not None else settings.PERSISTENT_CACHE_MAX_ENTRIES
+
+    @property
+    def max_bytes(self) -> int:
+        """Maximum total size in bytes, PERSISTENT_CACHE_MAX_BYTES unless given."""
+        return self._max_bytes if self._max_bytes is not None else settings.PERSISTENT_CACHE_MAX_BYTES
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the database has been opened."""
+        return self._connection is not None
+
+    def _open(self, timeout: float) -> sqlite3.Connection:
+        """Open a connection to the database, creating its tables if needed."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        return connection
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the read connection on first use, None if the database cannot be opened."""
+        if self._connection is not None or self._disabled:
+            return self._connection
+        try:
+            # Setting up the schema may wait briefly for a lock, once per process
+            connection = self._open(timeout=0.5)
+            connection.execute("PRAGMA busy_timeout=0")
+        except sqlite3.Error as e:
+            logger.warning("Persistent cache disabled, cannot open %s: %s", self.path, e)
+            self._disabled = True
+            return None
+        self._connection = connection
+        return connection
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        """Run a read, returning no rows if the database is unavailable or busy."""
+        connection = self._connect()
+        if connection is None:
+            return []
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            logger.debug("Persistent cache skipped: %s", e)
+            return []
+
+    def _submit(self, operation: str, parameters: tuple) -> None:
+        """Queue a write for the writer thread, starting it on first use."""
+        if self._disabled:
+            return
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._run, name="huuh-cache-writer", daemon=True)
+                    self._writer.start()
+        self._queue.put((operation, parameters))
+
+    def get(self, namespace: str, key: Hashable, max_stale: float = 0.0) -> Optional[Tuple[Any, float]]:
+        """
+        Get a stored value.
+
+        Args:
+            namespace: Namespace of the API key
+            key: Request cache key
+            max_stale: Seconds past expiry an entry is still returned
+
+        Returns:
+            Tuple of the value and its remaining TTL in seconds (negative once
+            expired), or None if it is missing, too old or being invalidated
+        """
+        rows = self._execute(
+            "SELECT value, expires_at, tag FROM responses WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, encode_key(key), time.time() - max_stale)
+        )
+        if not rows:
+            return None
+        value, expires_at, tag = rows[0]
+        if self._pending_invalidations and (namespace, tag) in self._pending_invalidations:
+            return None
+        return json.loads(value), expires_at - time.time()
+
+    async def _read(self, read: Callable[..., T], *args: Any) -> T:
+        """Run a read on the reader thread, keeping the event loop off the disk."""
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="huuh-cache-reader")
+        return await asyncio.get_running_loop().run_in_executor(self._reader, read, *args)
+
+    async def load(self, namespace: str, key: Hashable, max_stale: float = 0.0) -> Optional[Tuple[Any, float]]:
+        """Get a stored value like get, reading on a background thread."""
+        if self._disabled:
+            return None
+        return await self._read(self.get, namespace, key, max_stale)
+
+    async def load_entries(self, namespace: str) -> List[Tuple[Tuple[str, str, Tuple[Tuple[str, str], ...]], float]]:
+        """List the keys stored for a namespace like entries, reading on a background thread."""
+        if self._disabled:
+            return []
+        return await self._read(self.entries, namespace)
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float, tag: Optional[str] = None) -> None:
+        """Store a JSON-serializable value for ttl seconds, written in the background."""
+        try:
+            data = json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        if len(data) > self.max_bytes:
+            return
+        self._submit("set", (namespace, encode_key(key), tag, data, len(data), time.time() + ttl))
+
+    def entries(self, namespace: str) -> List[Tuple[Tuple[str, str, Tuple[Tuple[str, str], ...]], float]]:
+        """
+        List the keys stored for a namespace, including recently expired ones.
+
+        Returns:
+            List of (request key, seconds until expiry) pairs, negative once expired
+        """
+        rows = self._execute("SELECT key, expires_at FROM responses WHERE namespace = ?", (namespace,))
+        now = time.time()
+        return [(decode_key(key), expires_at - now) for key, expires_at in rows]
+
+    def invalidate(self, namespace: str, tag: str) -> None:
+        """Remove a namespace's entries stored with the given tag, hiding them from reads right away."""
+        if self._disabled:
+            return
+        with self._lock:
+            pending = (namespace, tag)
+            self._pending_invalidations[pending] = self._pending_invalidations.get(pending, 0) + 1
+        self._submit("invalidate", (namespace, tag))
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Remove the entries of one namespace, or all of them."""
+        self._submit("clear", (namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number and total size of stored entries."""
+        rows = self._execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses")
+        entries, size = rows[0] if rows else (0, 0)
+        return {"path": str(self.path), "entries": entries, "bytes": size}
+
+    def _run(self) -> None:
+        """Writer thread: apply queued writes in batches and keep the database within its caps."""
+        try:
+            connection = self._open(timeout=_WRITE_TIMEOUT)
+        except sqlite3.Error as e:
+            logger.warning("Persistent cache disabled, cannot open %s: %s", self.path, e)
+            self._disabled = True
+            connection = None
+
+        writes = 0
+        maintained = time.monotonic()
+        stopping = False
+        while not stopping:
+            batch: List[Tuple[str, tuple]] = []
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if connection is not None and batch:
+                self._write(connection, batch)
+                writes += len(batch)
+                if writes >= _MAINTENANCE_WRITES or time.monotonic() - maintained >= _MAINTENANCE_INTERVAL:
+                    self._maintain(connection)
+                    writes = 0
+                    maintained = time.monotonic()
+            self._release(batch)
+            for _ in range(len(batch) + stopping):
+                self._queue.task_done()
+
+        if connection is not None:
+            connection.close()
+
+    def _write(self, connection: sqlite3.Connection, batch: List[Tuple[str, tuple]]) -> None:
+        """Apply a batch of writes in one transaction."""
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for operation, parameters in batch:
+                if operation == "set":
+                    connection.execute(
+                        "INSERT OR REPLACE INTO responses (namespace, key, tag, value, size, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        parameters
+                    )
+                elif operation == "invalidate":
+                    connection.execute("DELETE FROM responses WHERE namespace = ? AND tag = ?", parameters)
+                elif parameters[0] is None:
+                    connection.execute("DELETE FROM responses")
+                else:
+                    connection.execute("DELETE FROM responses WHERE namespace = ?", parameters)
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.warning("Persistent cache dropped %d writes: %s", len(batch), e)
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+
+    def _release(self, batch: List[Tuple[str, tuple]]) -> None:
+        """Stop hiding the entries of invalidations that have been written."""
+        with self._lock:
+            for operation, parameters in batch:
+                if operation != "invalidate":
+                    continue
+                remaining = self._pending_invalidations.get(parameters, 0) - 1
+                if remaining > 0:
+                    self._pending_invalidations[parameters] = remaining
+                else:
+                    self._pending_invalidations.pop(parameters, None)
+
+    def _maintain(self, connection: sqlite3.Connection) -> None:
+        """Purge long-expired entries, then evict the soonest-expiring ones past the caps."""
+        try:
+            connection.execute(
+                "DELETE FROM responses WHERE expires_at <= ?",
+                (time.time() - settings.PERSISTENT_CACHE_KEEP_EXPIRED,)
+            )
+            count, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            if count <= self.max_entries and size <= self.max_bytes:
+                return
+
+            # Walk the expiry index only as far as needed
+            doomed = []
+            for namespace, key, entry_size in connection.execute(
+                "SELECT namespace, key, size FROM responses ORDER BY expires_at"
+            ):
+                if count <= self.max_entries and size <= self.max_bytes:
+                    break
+                doomed.append((namespace, key))
+                count -= 1
+                size -= entry_size
+            connection.executemany("DELETE FROM responses WHERE namespace = ? AND key = ?", doomed)
+        except sqlite3.Error as e:
+            logger.debug("Persistent cache maintenance skipped: %s", e)
+
+    def flush(self) -> None:
+        """Wait until the queued writes have been applied."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write out queued writes and close the database."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            reader, self._reader = self._reader, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout=10)
+        if reader is not None:
+            reader.shutdown(wait=True)
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+# One database per process, namespaced per API key
+persistent_cache = PersistentCache()
@@ -0,0 +1,64 @@
+"""Startup prewarm of tokens, connections and frequently used responses."""
+import asyncio
+import logging
+from typing import Awaitable, Dict
+
+from ..config.settings import settings
+from .auth import get_auth_client
+from .client import get_api_client
+from .transport import warmup
+
+logger = logging.getLogger(__name__)
+
+
+async def _step(name: str, step: Awaitable) -> bool:
+    """Run one prewarm step, logging instead of raising when it fails."""
+    try:
+        result = await step
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.debug("Prewarm step %s failed: %s", name, e)
+        return False
+    return result is not False
+
+
+async def _connections() -> bool:
+    """Open keepalive connections, successful if at least one opened."""
+    return await warmup() > 0
+
+
+async def _token() -> bool:
+    """Obtain a token, and validate it when every tool call would."""
+    auth_client = get_auth_client()
+    token = await auth_client.get_token()
+    if settings.AUTH_MODE == "validate":
+        return await auth_client.validate_token(token)
+    return True
+
+
+async def prewarm() -> Dict[str, bool]:
+    """
+    Get the server ready for its first tool call while the MCP handshake runs.
+
+    Concurrently obtains a token, opens keepalive connections to the API and
+    prefetches the user options into the response cache; a tool call made
+    meanwhile joins the requests already in flight. Every step is best
+    effort: failures are logged and left for the first tool call to retry.
+
+    Returns:
+        Whether each step succeeded, by name
+    """
+    steps = {}
+    if settings.HTTP_WARMUP_CONNECTIONS > 0:
+        steps["connections"] = _connections()
+    # Without the server's own key (shared HTTP deployments) there is nothing to authenticate as
+    if get_auth_client().api_key:
+        steps["token"] = _token()
+        if settings.PREWARM_USER_OPTIONS:
+            steps["user_options"] = get_api_client().request("GET", "/mcp/user_options")
+
+    results = await asyncio.gather(*(_step(name, step) for name, step in steps.items()))
+    outcome = dict(zip(steps, results))
+    logger.debug("Prewarm finished: %s", outcome)
+    return outcome
@@ -0,0 +1,112 @@
+"""Background refreshes of stale cached responses."""
+import asyncio
+import contextvars
+import logging
+import random
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Runs cache refreshes in the background, one at a time per key.
+
+    Refreshes are queued and started at most one every ``spacing`` seconds
+    (with jitter), with a bounded number running at once, so that many
+    entries going stale together do not stampede the backend. Both default
+    to the SWR_REFRESH_SPACING and SWR_MAX_CONCURRENT_REFRESHES settings.
+    """
+
+    def __init__(self, spacing: Optional[float] = None, max_concurrency: Optional[int] = None):
+        self.spacing = spacing
+        self.max_concurrency = max_concurrency
+        self._queue: "OrderedDict[Hashable, Callable[[], Awaitable[Any]]]" = OrderedDict()
+        self._running: set = set()
+        self._tasks: "set[asyncio.Task]" = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+
+    def schedule(self, key: Hashable, refresh: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Queue a refresh unless one for the same key is already queued or running.
+
+        Args:
+            key: Identifies the cached entry being refreshed
+            refresh: Callable starting the refresh
+
+        Returns:
+            True if the refresh was queued
+        """
+        if key in self._queue or key in self._running:
+            return False
+        self._queue[key] = refresh
+        self.scheduled += 1
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            # Refreshes serve no caller: they must not inherit this caller's trace span or other context
+            self._worker = asyncio.create_task(self._run(), context=contextvars.Context())
+        self._wakeup.set()
+        return True
+
+    async def _run(self) -> None:
+        """Start queued refreshes, spaced out and bounded in number."""
+        spacing = settings.SWR_REFRESH_SPACING if self.spacing is None else self.spacing
+        concurrency = settings.SWR_MAX_CONCURRENT_REFRESHES if self.max_concurrency is None else self.max_concurrency
+        semaphore = asyncio.Semaphore(concurrency)
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            await semaphore.acquire()
+            key, refresh = self._queue.popitem(last=False)
+            self._running.add(key)
+            task = asyncio.create_task(self._refresh(key, refresh))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _: semaphore.release())
+            await asyncio.sleep(spacing * random.uniform(0.5, 1.5))
+
+    async def _refresh(self, key: Hashable, refresh: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await refresh()
+            self.completed += 1
+        except Exception as e:
+            # The stale entry keeps being served until it is too old
+            self.failed += 1
+            logger.debug("Background refresh of %s failed: %s", key, e)
+        finally:
+            self._running.discard(key)
+
+    async def stop(self) -> None:
+        """Cancel the scheduler and the refreshes running, and drop queued ones."""
+        tasks = list(self._tasks)
+        if self._worker is not None:
+            tasks.append(self._worker)
+            self._worker = None
+        self._queue.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Get queue length and refresh counters."""
+        return {
+            "queued": len(self._queue),
+            "running": len(self._running),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+# Shared by all tenants so that refreshes are staggered process-wide
+refresh_scheduler = RefreshScheduler()
@@ -0,0 +1,159 @@
+"""Retry and circuit breaker policies for huuh API requests."""
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Methods that can be sent again without side effects
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Statuses worth retrying: throttling and server-side failures
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Get the delay before the next attempt.
+
+    Uses exponential backoff with full jitter, or the server's Retry-After
+    when it asks for longer.
+
+    Args:
+        attempt: Number of the attempt that just failed, starting at 1
+        retry_after: Delay requested by the server in seconds, if any
+    """
+    ceiling = min(settings.RETRY_BACKOFF_BASE * (2 ** (attempt - 1)), settings.RETRY_BACKOFF_MAX)
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class CircuitOpenError(ValueError):
+    """Raised for a request rejected because the circuit of its endpoint is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one endpoint.
+
+    Opens after a run of consecutive failures and fails fast until the reset
+    timeout has passed, then lets a single probe request through (half-open)
+    to decide whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        # When the current half-open probe was let through, None if there is none
+        self._probe_started: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent now."""
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_started = None
+        # A probe that never reported back (cancelled, failed before sending)
+        # is given up after the reset timeout so the circuit cannot get stuck
+        if self.state == self.HALF_OPEN and (
+            self._probe_started is None or now - self._probe_started >= self.reset_timeout
+        ):
+            self._probe_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit past the threshold."""
+        self.failures += 1
+        self._probe_started = None
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Circuit opened after %d consecutive failures", self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the breaker state for observability."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+class ResilienceRegistry:
+    """Process-wide circuit breakers and retry counters, keyed by endpoint path."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+
+    def breaker(self, path: str) -> CircuitBreaker:
+        """Get the circuit breaker of an endpoint."""
+        breaker = self._breakers.get(path)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_RESET_TIMEOUT
+            )
+            self._breakers[path] = breaker
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        """Get breaker states per endpoint and the number of retries sent."""
+        return {
+            "retries": self.retries,
+            "circuits": {path: breaker.snapshot() for path, breaker in self._breakers.items()},
+        }
+
+
+# Shared by all tenants, backend health does not depend on the caller
+resilience = ResilienceRegistry()
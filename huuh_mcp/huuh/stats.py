@@ -0,0 +1,151 @@
+"""Server-wide observability: tool call metrics and stats gathered from every component."""
+import time
+from typing import Any, Dict, Iterable, List
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from fastmcp.server.middleware.middleware import CallNext
+
+from .client import HuuhClient, get_api_client
+from .compression import transfer_stats
+from .hedging import hedger
+from .metrics import Sample, metrics
+from .persistence import persistent_cache
+from .refresh import refresh_scheduler
+from .resilience import resilience
+from .tenants import tenant_pool
+from .transport import pool_stats
+
+# Circuit breaker states as gauge values
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Records the duration and failures of every MCP tool call."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext) -> Any:
+        tool = context.message.name
+        started = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception as e:
+            metrics.increment("huuh_tool_errors_total", tool=tool, type=type(e).__name__)
+            raise
+        finally:
+            metrics.observe("huuh_tool_duration_seconds", time.perf_counter() - started, tool=tool)
+
+        # Tools report failures as a result with an "error" key rather than raising
+        if result and _is_error_result(result[0]):
+            metrics.increment("huuh_tool_errors_total", tool=tool, type="error_result")
+        return result
+
+
+def _is_error_result(content: Any) -> bool:
+    """Check whether serialized tool output is an error dictionary, without decoding it."""
+    text = getattr(content, "text", None)
+    return isinstance(text, str) and text[:32].lstrip("{ \n").startswith('"error"')
+
+
+def _clients() -> List[HuuhClient]:
+    """Get the server's own client and every tenant's."""
+    return [get_api_client()] + tenant_pool.clients()
+
+
+def _cache_stats() -> Dict[str, Dict[str, int]]:
+    """Sum the response and retrieval cache counters over all clients."""
+    totals: Dict[str, Dict[str, int]] = {}
+    for client in _clients():
+        for name, cache in (("response", client.cache), ("retrieval", client.retrieval_cache)):
+            total = totals.setdefault(name, {})
+            for key, value in cache.stats().items():
+                total[key] = total.get(key, 0) + value
+    for total in totals.values():
+        lookups = total["hits"] + total["stale_hits"] + total["misses"]
+        total["hit_ratio"] = round((total["hits"] + total["stale_hits"]) / lookups, 4) if lookups else None
+    return totals
+
+
+def collect_samples() -> Iterable[Sample]:
+    """Read caches, the connection pool, transfer counters and resilience state as metric samples."""
+    for cache, counters in _cache_stats().items():
+        for key in ("hits", "stale_hits", "misses", "evictions"):
+            yield f"huuh_cache_{key}_total", "counter", {"cache": cache}, counters[key]
+        yield "huuh_cache_entries", "gauge", {"cache": cache}, counters["entries"]
+        yield "huuh_cache_bytes", "gauge", {"cache": cache}, counters["bytes"]
+    if persistent_cache.is_open:
+        persisted = persistent_cache.stats()
+        yield "huuh_cache_entries", "gauge", {"cache": "persistent"}, persisted["entries"]
+        yield "huuh_cache_bytes", "gauge", {"cache": "persistent"}, persisted["bytes"]
+
+    for key, value in pool_stats().items():
+        yield f"huuh_pool_{key}", "gauge", {}, value
+
+    for endpoint, counters in transfer_stats.stats().items():
+        yield "huuh_upstream_requests_total", "counter", {"endpoint": endpoint}, counters["requests"]
+        for direction in ("request", "response"):
+            labels = {"endpoint": endpoint, "direction": direction}
+            yield "huuh_bytes_total", "counter", dict(labels, encoding="identity"), counters[f"{direction}_bytes"]
+            yield "huuh_bytes_total", "counter", dict(labels, encoding="wire"), counters[f"{direction}_wire_bytes"]
+
+    resilience_stats = resilience.stats()
+    yield "huuh_retries_total", "counter", {}, resilience_stats["retries"]
+    for endpoint, circuit in resilience_stats["circuits"].items():
+        yield "huuh_circuit_state", "gauge", {"endpoint": endpoint}, _CIRCUIT_STATES.get(circuit["state"], 0)
+        yield "huuh_circuit_rejected_total", "counter", {"endpoint": endpoint}, circuit["rejected"]
+
+    hedging = hedger.stats()
+    for key in ("requests", "hedged", "hedge_wins"):
+        yield f"huuh_hedge_{key}_total", "counter", {}, hedging[key]
+
+    refreshes = refresh_scheduler.stats()
+    yield "huuh_refresh_queued", "gauge", {}, refreshes["queued"]
+    for key in ("completed", "failed"):
+        yield f"huuh_refresh_{key}_total", "counter", {}, refreshes[key]
+
+    yield "huuh_tenants", "gauge", {}, tenant_pool.stats()["tenants"]
+
+
+def _latencies(name: str, label: str) -> Dict[str, Dict[str, Any]]:
+    """Summarize the histograms of a metric by one of their labels."""
+    return {
+        dict(labels).get(label, ""): histogram.snapshot()
+        for labels, histogram in sorted(metrics.histograms(name).items())
+    }
+
+
+def _errors(name: str, label: str) -> Dict[str, Dict[str, float]]:
+    """Group the error counters of a metric by one of their labels, then by type."""
+    grouped: Dict[str, Dict[str, float]] = {}
+    for labels, value in metrics.counters(name).items():
+        labels = dict(labels)
+        grouped.setdefault(labels.get(label, ""), {})[labels.get("type", "")] = value
+    return grouped
+
+
+def stats_snapshot() -> Dict[str, Any]:
+    """
+    Get a diagnostic snapshot of the server.
+
+    Returns:
+        Latency summaries per tool, endpoint and phase (seconds), error counts
+        by type, cache hit ratios, connection pool usage, bytes transferred
+        per endpoint and the state of retries, circuits, hedging and refreshes
+    """
+    return {
+        "uptime_seconds": round(time.time() - metrics.started, 1),
+        "tools": _latencies("huuh_tool_duration_seconds", "tool"),
+        "tool_errors": _errors("huuh_tool_errors_total", "tool"),
+        "endpoints": _latencies("huuh_upstream_duration_seconds", "endpoint"),
+        "endpoint_errors": _errors("huuh_upstream_errors_total", "endpoint"),
+        "phases": _latencies("huuh_phase_duration_seconds", "phase"),
+        "caches": _cache_stats(),
+        "persistent_cache": persistent_cache.stats() if persistent_cache.is_open else None,
+        "connection_pool": pool_stats(),
+        "transfer": transfer_stats.stats(),
+        "resilience": resilience.stats(),
+        "hedging": hedger.stats(),
+        "refreshes": refresh_scheduler.stats(),
+        "tenants": tenant_pool.stats(),
+    }
+
+
+metrics.add_collector(collect_samples)
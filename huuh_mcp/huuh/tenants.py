@@ -0,0 +1,109 @@
+"""Per-caller API clients for serving several huuh accounts from one process."""
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from fastmcp.server.dependencies import get_http_headers, get_http_request
+
+from ..config.settings import settings
+from .auth import AuthClient, TokenCache
+from .client import HuuhClient, get_api_client
+
+logger = logging.getLogger(__name__)
+
+
+class TenantPool:
+    """
+    Bounded LRU of per-API-key clients.
+
+    Every tenant gets its own tokens and response caches, while all of them
+    share the process-wide connection pool.
+    """
+
+    def __init__(self, max_tenants: Optional[int] = None):
+        self._max_tenants = max_tenants
+        self._clients: "OrderedDict[str, HuuhClient]" = OrderedDict()
+
+    @property
+    def max_tenants(self) -> int:
+        """Maximum number of tenants kept, TENANT_POOL_SIZE unless given."""
+        return self._max_tenants if self._max_tenants is not None else settings.TENANT_POOL_SIZE
+
+    def get(self, api_key: str) -> HuuhClient:
+        """Get the client for an API key, creating it on first use."""
+        # Index by digest so raw keys are not kept around as dictionary keys
+        tenant_id = hashlib.sha256(api_key.encode()).hexdigest()
+        client = self._clients.get(tenant_id)
+        if client is not None:
+            self._clients.move_to_end(tenant_id)
+            return client
+
+        # Tokens stay in memory only and are refreshed on demand, idle tenants
+        # should not keep exchanging tokens in the background
+        auth = AuthClient(
+            api_key=api_key,
+            token_cache=TokenCache(persist=False),
+            background_renewal=False
+        )
+        client = HuuhClient(auth=auth)
+        self._clients[tenant_id] = client
+
+        while len(self._clients) > self.max_tenants:
+            _, evicted = self._clients.popitem(last=False)
+            evicted.auth.stop()
+        logger.debug("Created tenant client %s (%d tenants)", tenant_id[:8], len(self._clients))
+        return client
+
+    def clients(self) -> List[HuuhClient]:
+        """Get the clients of all tenants held by the pool."""
+        return list(self._clients.values())
+
+    def clear(self) -> None:
+        """Drop all tenants."""
+        for client in self._clients.values():
+            client.auth.stop()
+        self._clients.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of tenants held by the pool."""
+        return {"tenants": len(self._clients), "max_tenants": self.max_tenants}
+
+
+tenant_pool = TenantPool()
+
+
+def _request_api_key() -> Optional[str]:
+    """Get the API key sent with the current HTTP request, if any."""
+    headers = get_http_headers()
+    api_key = headers.get(settings.TENANT_API_KEY_HEADER.lower())
+    return api_key.strip() if api_key and api_key.strip() else None
+
+
+def _in_http_request() -> bool:
+    """Check whether the current tool call came in over the HTTP transport."""
+    try:
+        get_http_request()
+    except RuntimeError:
+        return False
+    return True
+
+
+def current_client() -> HuuhClient:
+    """
+    Get the API client for the caller of the current tool call.
+
+    HTTP requests carrying an API key header are served by that key's tenant;
+    stdio sessions use the server's own HUUH_API_KEY. HTTP requests without
+    the header are rejected, unless TENANT_ALLOW_DEFAULT_KEY lets them act
+    as the server's own account.
+
+    Raises:
+        ValueError: If an HTTP request has no API key header and falling back is not allowed
+    """
+    api_key = _request_api_key()
+    if api_key is not None:
+        return tenant_pool.get(api_key)
+    if _in_http_request() and not settings.TENANT_ALLOW_DEFAULT_KEY:
+        raise ValueError(f"Missing API key: send it in the {settings.TENANT_API_KEY_HEADER} header")
+    return get_api_client()
@@ -0,0 +1,318 @@
+"""Lightweight tracing of tool calls down to the API requests they make."""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from fastmcp.server.middleware.middleware import CallNext
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# W3C trace context header: version-trace_id-parent_id-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# OTLP status codes
+_STATUS_ERROR = 2
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns() if start_ns is None else start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute, e.g. a status code or whether a cache was hit."""
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        """Get the W3C traceparent header naming this span as the parent."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def child(self, name: str, kind: int = KIND_INTERNAL, start_ns: Optional[int] = None) -> "Span":
+        """Create a span under this one, e.g. for a phase timed from outside."""
+        return Span(name, self.trace_id, self.span_id, kind, start_ns=start_ns)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Convert to the OTLP/JSON span representation."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": _STATUS_ERROR, "message": self.error}
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class FileSpanExporter:
+    """
+    Appends finished spans to a file as OTLP/JSON, one export request per line.
+
+    This is the format of the OpenTelemetry Collector's file exporter, which
+    its otlpjsonfile receiver and most trace viewers can import. Spans are
+    written from a background thread so the event loop never waits on disk.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self._path = path
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        """Output file, TRACE_FILE unless given."""
+        return self._path or Path(settings.TRACE_FILE)
+
+    def export(self, span: Span) -> None:
+        """Queue a finished span for writing."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="huuh-trace-exporter", daemon=True)
+                    self._thread.start()
+        self._queue.put(span)
+
+    def _run(self) -> None:
+        """Write queued spans in batches until stopped."""
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            span = self._queue.get()
+            while True:
+                if span is None:
+                    stopping = True
+                else:
+                    batch.append(span)
+                try:
+                    span = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, spans: List[Span]) -> None:
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "huuh-mcp"}}]},
+                "scopeSpans": [{"scope": {"name": "huuh_mcp"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }, separators=(",", ":"))
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        except OSError as e:
+            logger.warning("Could not write %d spans to %s: %s", len(spans), self.path, e)
+
+    def close(self) -> None:
+        """Write out queued spans and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=5)
+
+
+class _SpanScope:
+    """Context manager making a span current for its block and ending it afterwards."""
+
+    __slots__ = ("tracer", "span", "_token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], traceback: Any) -> None:
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.end(self.span)
+
+
+class _NoSpanScope:
+    """Stand-in scope when the call is not traced."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpanScope()
+
+# Span of the current operation, None outside traced tool calls
+_current_span: ContextVar[Optional[Span]] = ContextVar("huuh_current_span", default=None)
+
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to the exporter.
+
+    Traces start at a tool call (see TracingMiddleware); spans requested
+    outside a traced tool call are not recorded, so background work and
+    unsampled calls cost a context variable lookup.
+    """
+
+    def __init__(self, exporter: Optional[FileSpanExporter] = None):
+        self.exporter = exporter or FileSpanExporter()
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        """Get the span of the current operation, if it is traced."""
+        return _current_span.get()
+
+    def root(self, name: str, traceparent: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        """
+        Start a trace, or continue the caller's, for the block.
+
+        A valid incoming traceparent header decides both the trace ID and
+        whether the call is sampled; otherwise TRACE_SAMPLE_RATE does.
+        """
+        if not settings.TRACING_ENABLED:
+            return _NO_SPAN
+        match = _TRACEPARENT.match(traceparent.strip().lower()) if traceparent else None
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            sampled = int(flags, 16) & 1
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = random.random() < settings.TRACE_SAMPLE_RATE
+        if not sampled:
+            return _NO_SPAN
+        return _SpanScope(self, Span(name, trace_id, parent_id, KIND_SERVER, attributes))
+
+    def span(self, name: str, kind: int = KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        """Time the block as a child of the current span, if the call is traced."""
+        parent = _current_span.get()
+        if parent is None:
+            return _NO_SPAN
+        return _SpanScope(self, Span(name, parent.trace_id, parent.span_id, kind, attributes))
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute on the current span, if the call is traced."""
+        span = _current_span.get()
+        if span is not None:
+            span.attributes[key] = value
+
+    def end(self, span: Span, end_ns: Optional[int] = None) -> None:
+        """End a span and export it."""
+        span.end_ns = time.time_ns() if end_ns is None else end_ns
+        self.exporter.export(span)
+
+
+def http_trace_hook(tracer: "Tracer", span: Span) -> Callable[[str, Dict[str, Any]], Awaitable[None]]:
+    """
+    Build an httpx trace extension recording connection phases under an HTTP span.
+
+    Records 'connection.acquire' (waiting for a pooled connection, or opening
+    one), 'connection.connect' when a new connection is opened, and
+    'http.wait_response' from the request being sent until the response
+    headers arrive, which is roughly the backend's processing time.
+    """
+    started = {"acquire": span.start_ns}
+
+    async def hook(event: str, info: Dict[str, Any]) -> None:
+        now = time.time_ns()
+        if event == "connection.connect_tcp.started":
+            started["connect"] = now
+            span.set_attribute("connection.reused", False)
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete") and "connect" in started:
+            started["connected"] = now
+        elif event.endswith(".send_request_headers.started"):
+            acquire = span.child("connection.acquire", start_ns=started.pop("acquire", now))
+            tracer.end(acquire, now)
+            if "connect" in started:
+                connect = span.child("connection.connect", start_ns=started.pop("connect"))
+                tracer.end(connect, started.pop("connected", now))
+            else:
+                span.set_attribute("connection.reused", True)
+            started["send"] = now
+        elif event.endswith(".receive_response_headers.complete") and "send" in started:
+            tracer.end(span.child("http.wait_response", start_ns=started.pop("send")), now)
+
+    return hook
+
+
+class TracingMiddleware(Middleware):
+    """Starts a trace for every MCP tool call, continuing the HTTP caller's traceparent when sent."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext) -> Any:
+        tool = context.message.name
+        scope = tracer.root(
+            f"tools/call {tool}",
+            traceparent=get_http_headers().get("traceparent"),
+            attributes={"mcp.tool.name": tool}
+        )
+        with scope:
+            return await call_next(context)
+
+
+tracer = Tracer()
+
+
+def close_tracing() -> None:
+    """Write out the spans still queued."""
+    tracer.exporter.close()
+
+
+atexit.register(close_tracing)
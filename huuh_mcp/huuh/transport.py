@@ -0,0 +1,216 @@
+"""Shared HTTP transport for the huuh API clients."""
+import asyncio
+import logging
+import urllib.request
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config.settings import settings
+from .compression import accept_encoding, compressor
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client shared by AuthClient and HuuhClient so that auth and data
+# calls reuse the same keepalive connections to the API host
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+class RequestCounter:
+    """Requests in flight through the transports sharing the counter, and how many wait for a connection."""
+
+    __slots__ = ("active", "waiting")
+
+    def __init__(self):
+        self.active = 0
+        self.waiting = 0
+
+
+# Counts the requests of every client built by build_http_client, see pool_stats
+request_counter = RequestCounter()
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    """Response body that releases its request from the counter once closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, counter: RequestCounter):
+        self._stream = stream
+        self._counter = counter
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._counter.active -= 1
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport counting the requests in flight through the transport it wraps.
+
+    A request counts from when it is sent until its response is closed. It
+    waits for a connection until httpcore reports the first step on one
+    (opening it or sending the request) through the trace extension, which
+    keeps working alongside a trace hook already set on the request.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, counter: Optional[RequestCounter] = None):
+        self._transport = transport
+        self.counter = counter or RequestCounter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        counter = self.counter
+        counter.active += 1
+        counter.waiting += 1
+        waiting = True
+        trace = request.extensions.get("trace")
+
+        async def _trace(event: str, info: Dict[str, Any]) -> None:
+            nonlocal waiting
+            if waiting:
+                waiting = False
+                counter.waiting -= 1
+            if trace is not None:
+                await trace(event, info)
+
+        request.extensions = dict(request.extensions, trace=_trace)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            counter.active -= 1
+            raise
+        finally:
+            if waiting:
+                waiting = False
+                counter.waiting -= 1
+        response.stream = _CountedStream(response.stream, counter)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _environment_proxy(url: str) -> Optional[str]:
+    """Get the proxy that HTTP(S)_PROXY, ALL_PROXY and NO_PROXY select for a URL, if any."""
+    parts = urlsplit(url)
+    if not parts.hostname or urllib.request.proxy_bypass(parts.hostname):
+        return None
+    proxies = urllib.request.getproxies()
+    proxy = proxies.get(parts.scheme) or proxies.get("all")
+    if not proxy:
+        return None
+    return proxy if "://" in proxy else f"http://{proxy}"
+
+
+def _http2_available() -> bool:
+    """Check whether the optional HTTP/2 dependency is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """Build an HTTP client with pool limits and timeouts taken from settings."""
+    http2 = settings.HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("HTTP2_ENABLED is set but 'h2' is not installed (pip install huuh-mcp[http2]), "
+                       "falling back to HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+    # An explicit transport disables httpx's own proxy lookup, so pass on the proxy of the API host
+    transport = httpx.AsyncHTTPTransport(
+        http2=http2, limits=limits, proxy=_environment_proxy(str(settings.INFOLAB_API_URL))
+    )
+    return httpx.AsyncClient(
+        http2=http2,
+        headers={"Accept-Encoding": accept_encoding()},
+        timeout=httpx.Timeout(
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            read=settings.HTTP_READ_TIMEOUT,
+            write=settings.HTTP_WRITE_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT
+        ),
+        limits=limits,
+        transport=CountingTransport(transport, request_counter)
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = build_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and its pooled connections."""
+    global _http_client
+    if _http_client is None:
+        return
+    client, _http_client = _http_client, None
+    await client.aclose()
+
+
+async def warmup(connections: Optional[int] = None) -> int:
+    """
+    Open keepalive connections to the API host ahead of the first request.
+
+    Args:
+        connections: Number of connections to open (defaults to HTTP_WARMUP_CONNECTIONS)
+
+    Returns:
+        Number of connections that were opened successfully
+    """
+    count = settings.HTTP_WARMUP_CONNECTIONS if connections is None else connections
+    client = get_http_client()
+    url = str(settings.INFOLAB_API_URL)
+
+    async def _open_connection() -> bool:
+        try:
+            # Any response will do, the point is the TCP/TLS handshake
+            response = await client.head(url)
+            compressor.observe(response)
+            return True
+        except httpx.HTTPError as e:
+            logger.debug("Connection warmup failed: %s", e)
+            return False
+
+    opened = sum(await asyncio.gather(*(_open_connection() for _ in range(count))))
+    logger.debug("Warmed up %d/%d connections to %s", opened, count, url)
+    return opened
+
+
+def pool_stats() -> Dict[str, int]:
+    """
+    Report connection pool usage of the shared client.
+
+    Requests are counted by the client's CountingTransport, as httpx does
+    not expose the state of its pool; open and idle connections are not
+    reported for the same reason.
+
+    Returns:
+        Dictionary with the requests in flight, how many of them wait for a
+        connection, and the configured limits
+    """
+    return {
+        "requests": request_counter.active,
+        "requests_waiting": request_counter.waiting,
+        "max_connections": settings.HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    }
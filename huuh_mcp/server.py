@@ -1,28 +1,75 @@
 """MCP server for huuh integration."""
 import argparse
+import asyncio
 import logging
 import os
-import socket
-from typing import Dict, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
-from dotenv import load_dotenv
 from fastmcp import FastMCP
-from fastmcp import Context
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
 from .config.settings import settings
+from .huuh.auth import get_auth_client
+from .huuh.client import get_api_client
+from .huuh.metrics import metrics
+from .huuh.persistence import persistent_cache
+from .huuh.prewarm import prewarm
+from .huuh.refresh import refresh_scheduler
+from .huuh.stats import ToolMetricsMiddleware
+from .huuh.tracing import TracingMiddleware, close_tracing
+from .huuh.tenants import tenant_pool
+from .huuh.transport import warmup
 from .utils.logging import configure_logging
 from .tools.user_options import get_user_options
 from .tools.marketplace import search_marketplace
-from .tools.information import retrieve_information
+from .tools.information import retrieve_information, retrieve_information_from_all_bases
 from .tools.contribution import contribute
 from .tools.persona import get_persona, refresh_persona, contribute_persona_to_course, contribute_persona_to_user
 from .tools.base import create_base, assign_base_to_space
 from .tools.space import create_spaces
+from .tools.batch import batch
+from .tools.diagnostics import server_stats
 
-# Configure logging
-configure_logging(log_level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def client_lifespan() -> AsyncIterator[None]:
+    """
+    Prewarm clients and persisted responses in the background, close them on shutdown.
+
+    Wraps the whole process rather than the FastMCP server lifespan, which runs
+    once per session (or per request in stateless HTTP mode). Nothing here is
+    awaited before serving, so startup is never delayed.
+    """
+    tasks = []
+    if settings.STARTUP_PREWARM:
+        tasks.append(asyncio.create_task(prewarm()))
+    elif settings.HTTP_WARMUP_CONNECTIONS > 0:
+        tasks.append(asyncio.create_task(warmup()))
+    if settings.PERSISTENT_CACHE_ENABLED:
+        tasks.append(asyncio.create_task(get_api_client().revalidate_persisted()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await refresh_scheduler.stop()
+        tenant_pool.clear()
+        await get_auth_client().close()
+        persistent_cache.close()
+        close_tracing()
+
+
+# Set once tool metrics are recorded and exposed, see enable_metrics
+_metrics_enabled = False
+
+# Set once tool calls are traced, see enable_tracing
+_tracing_enabled = False
+
 # Initialize MCP server
 mcp = FastMCP(
     "HuuhMCPServer",
@@ -99,11 +146,41 @@ mcp.tool(
                     "type": "string"
                 },
                 "description": "List of file IDs to search in (optional)"
+            },
+            "max_chars": {
+                "type": "integer",
+                "description": "Maximum total characters of content to return (optional)"
+            },
+            "max_tokens": {
+                "type": "integer",
+                "description": "Maximum total tokens of content to return, estimated (optional)"
+            },
+            "dedupe": {
+                "type": "boolean",
+                "description": "Remove duplicate and near-duplicate documents (optional)"
             }
         }
     }
 )(retrieve_information)
 
+# Register retrieve_information_from_all_bases with annotations
+mcp.tool(
+    annotations={
+        "name": "retrieve_information_from_all_bases",
+        "description": "Retrieve information from all accessible courses at once",
+        "parameters": {
+            "query": {
+                "type": "string",
+                "description": "Search query (max 150 characters)"
+            },
+            "top_k": {
+                "type": "integer",
+                "description": "Maximum number of documents to return (optional)"
+            }
+        }
+    }
+)(retrieve_information_from_all_bases)
+
 # Register contribute with annotations
 mcp.tool(
     annotations={
@@ -260,33 +337,186 @@ mcp.tool(
     }
 )(create_spaces)
 
+mcp.tool(
+    annotations={
+        "name": "batch",
+        "description": "Run several huuh tool calls in one request",
+        "parameters": {
+            "operations": {
+                "type": "array",
+                "items": {
+                    "type": "object"
+                },
+                "description": "List of operations, each {\"tool\": <tool name>, \"arguments\": {<tool parameters>}}"
+            },
+            "max_concurrency": {
+                "type": "integer",
+                "description": "Maximum number of operations run at once (optional)"
+            }
+        }
+    }
+)(batch)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Serve the metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def enable_metrics(http: bool) -> None:
+    """
+    Record tool call metrics and expose them.
+
+    Over HTTP the metrics are served at METRICS_PATH for Prometheus to scrape;
+    over stdio, where there is nothing to scrape, the server_stats tool
+    reports them instead. Safe to call more than once.
+
+    Args:
+        http: Whether the server runs the HTTP transport
+    """
+    global _metrics_enabled
+    if _metrics_enabled:
+        return
+    _metrics_enabled = True
+    mcp.add_middleware(ToolMetricsMiddleware())
+    if http:
+        mcp.custom_route(settings.METRICS_PATH, methods=["GET"], include_in_schema=False)(metrics_endpoint)
+    else:
+        mcp.tool(
+            annotations={
+                "name": "server_stats",
+                "description": "Report server latencies per tool and API endpoint, errors, cache hit ratios "
+                               "and connection usage",
+                "parameters": {}
+            }
+        )(server_stats)
+
+
+def enable_tracing() -> None:
+    """Trace every tool call, writing spans to TRACE_FILE. Safe to call more than once."""
+    global _tracing_enabled
+    if _tracing_enabled:
+        return
+    _tracing_enabled = True
+    mcp.add_middleware(TracingMiddleware())
+
+
+def create_http_app(path: Optional[str] = None, stateless: Optional[bool] = None) -> Starlette:
+    """
+    Create the Streamable HTTP app.
+
+    Also used as the uvicorn app factory by every worker process, which then
+    take their path and session mode from the MCP_PATH and MCP_STATELESS_HTTP
+    settings.
+
+    Args:
+        path: Path of the MCP endpoint (defaults to MCP_PATH)
+        stateless: Serve every request without server-side session state (defaults to MCP_STATELESS_HTTP)
+    """
+    # Worker processes import this module without going through main()
+    configure_logging(
+        log_level=settings.LOG_LEVEL,
+        log_file=settings.LOG_FILE or None,
+        log_format=settings.LOG_FORMAT,
+        use_queue=settings.LOG_QUEUE,
+        sampling=settings.LOG_SAMPLING
+    )
+    if settings.TRACING_ENABLED:
+        enable_tracing()
+    if settings.METRICS_ENABLED:
+        enable_metrics(http=True)
+    app = mcp.http_app(
+        path=path or settings.MCP_PATH,
+        stateless_http=settings.MCP_STATELESS_HTTP if stateless is None else stateless
+    )
+    mcp_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        async with client_lifespan(), mcp_lifespan(app):
+            yield
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def run_http(host: str, port: int, path: str, workers: int) -> None:
+    """
+    Serve the MCP server over Streamable HTTP.
+
+    Args:
+        host: Interface to bind to
+        port: Port to listen on
+        path: Path of the MCP endpoint
+        workers: Number of worker processes sharing the port
+    """
+    # Only needed for HTTP, keep it out of stdio startup
+    import uvicorn
+
+    logger.info("Starting MCP server with Streamable HTTP transport on http://%s:%s%s with %d worker(s)",
+                host, port, path, workers)
+    uvicorn_kwargs = {
+        "host": host,
+        "port": port,
+        "log_level": settings.LOG_LEVEL.lower(),
+        "timeout_graceful_shutdown": settings.MCP_GRACEFUL_SHUTDOWN_TIMEOUT,
+    }
+
+    if workers > 1:
+        # Sessions live in worker memory and requests of one client can reach
+        # any worker, so every request must be self-contained
+        os.environ["MCP_PATH"] = path
+        os.environ["MCP_STATELESS_HTTP"] = "true"
+        uvicorn.run("huuh_mcp.server:create_http_app", factory=True, workers=workers, **uvicorn_kwargs)
+    else:
+        uvicorn.run(create_http_app(path), **uvicorn_kwargs)
+
+
+async def run_stdio() -> None:
+    """Serve the MCP server over stdio."""
+    logger.info("Starting MCP server with STDIO transport")
+    if settings.TRACING_ENABLED:
+        enable_tracing()
+    if settings.METRICS_ENABLED:
+        enable_metrics(http=False)
+    async with client_lifespan():
+        await mcp.run_stdio_async()
+
 
 def main():
     """Main function for running the huuh server."""
-    load_dotenv()
+    # Settings load the .env file themselves on first use
+    configure_logging(
+        log_level=settings.LOG_LEVEL,
+        log_file=settings.LOG_FILE or None,
+        log_format=settings.LOG_FORMAT,
+        use_queue=settings.LOG_QUEUE,
+        sampling=settings.LOG_SAMPLING
+    )
+    parser = argparse.ArgumentParser(description="Run the huuh MCP server")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=settings.MCP_TRANSPORT,
+                        help="Transport to serve on (env MCP_TRANSPORT)")
+    parser.add_argument("--host", default=settings.MCP_HOST, help="HTTP interface to bind to (env MCP_HOST)")
+    parser.add_argument("--port", type=int, default=settings.MCP_PORT, help="HTTP port (env MCP_PORT or PORT)")
+    parser.add_argument("--path", default=settings.MCP_PATH, help="HTTP path of the MCP endpoint (env MCP_PATH)")
+    parser.add_argument("--workers", type=int, default=settings.MCP_WORKERS,
+                        help="Number of HTTP worker processes (env MCP_WORKERS)")
+    # Tolerate launcher flags meant for other tools, e.g. --env-file
+    args, _ = parser.parse_known_args()
+
     logger.info("Starting huuh MCP server...")
 
     try:
-        # logger.info(f"Starting MCP server with STDIO transport")
-        mcp.run(transport="stdio")
-
-        # Run the MCP server with Streamable HTTP transport
-        # sock = socket.socket()
-        # sock.bind(('', 0))
-        # port_number = sock.getsockname()[1]
-        # parser = argparse.ArgumentParser(description="Run MCP Streamable HTTP based server")
-        # parser.add_argument("--port", type=int, default=port_number, help="Localhost port to listen on")
-        # args = parser.parse_args()
-        # logger.info(f"Starting MCP server with Streamable HTTP transport on port {args.port} at path /mcp")
-        # mcp.run(transport="http",
-        #         port=os.getenv('PORT', args.port),
-        #         path="/mcp")
+        if args.transport == "http":
+            run_http(args.host, args.port, args.path, max(args.workers, 1))
+        else:
+            asyncio.run(run_stdio())
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
     except Exception as e:
         import traceback
         tb = traceback.format_exc()
-        logger.error(f"Error running MCP server: {str(e.__repr__())}: {tb}")
+        logger.error("Error running MCP server: %r: %s", e, tb)
 
 
 if __name__ == "__main__":
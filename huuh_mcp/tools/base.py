@@ -4,8 +4,9 @@ from typing import Dict, Any
 
 from fastmcp import Context
 
-from ..huuh.client import api_client
+from ..huuh.tenants import current_client
 from ..utils.auth_wrapper import ensure_authenticated_async, get_error_response
+from ..utils.notifications import Notifier
 
 logger = logging.getLogger(__name__)
 
@@ -25,26 +26,25 @@ async def create_base(
     Returns:
         A dictionary containing the result of the base creation.
     """
-    logger.info(f"create_base called with  base_name='{base_name}'")
+    logger.info("create_base called with  base_name='%s'", base_name)
 
+    notify = Notifier(ctx)
     try:
-        await ctx.info(f"Creating base '{base_name}'...")
-        await ctx.report_progress(0, 3)
+        await notify.start(f"Creating base '{base_name}'...", 3)
 
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
 
         # Validate inputs
         if not base_name or not base_description:
-            await ctx.error(
+            await notify.error(
                 "Missing required parameters: user_id, base_name, and base_description must be provided.")
             return {
                 "error": "Missing required parameters: user_id, base_name, and base_description must be provided."}
 
-        await ctx.report_progress(1, 3)
+        await notify.step()
 
         try:
             data = {
@@ -52,23 +52,22 @@ async def create_base(
                 "course_description": base_description
             }
             headers = {"Content-Type": "application/json"}
-            response = await api_client.request(
+            response = await current_client().request(
                 method="POST",
                 endpoint="/mcp/create_course",
                 json=data,
                 headers=headers
             )
 
-            await ctx.report_progress(3, 3)
-            await ctx.info("Base created successfully")
+            await notify.done("Base created successfully")
 
             return response
         except ValueError as e:
-            await ctx.error(f"Error creating base: {str(e)}")
+            await notify.error(f"Error creating base: {str(e)}")
             return {"error": f"Error creating base: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in create_base")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
 
 
@@ -87,26 +86,25 @@ async def assign_base_to_space(
     Returns:
         A dictionary containing the result of the assignment.
     """
-    logger.info(f"assign_base_to_space called with space_id='{space_id}', base_id='{base_id}'")
+    logger.info("assign_base_to_space called with space_id='%s', base_id='%s'", space_id, base_id)
 
+    notify = Notifier(ctx)
     try:
-        await ctx.info(f"Assigning base '{base_id}' to space '{space_id}'...")
-        await ctx.report_progress(0, 3)
+        await notify.start(f"Assigning base '{base_id}' to space '{space_id}'...", 3)
 
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
 
         # Validate inputs
         if not space_id or not base_id:
-            await ctx.error(
+            await notify.error(
                 "Missing required parameters: space_id and base_id must be provided.")
             return {
                 "error": "Missing required parameters: space_id and base_id must be provided."}
 
-        await ctx.report_progress(1, 3)
+        await notify.step()
 
         try:
             data = {
@@ -114,21 +112,20 @@ async def assign_base_to_space(
                 "base_id": base_id
             }
             headers = {"Content-Type": "application/json"}
-            response = await api_client.request(
+            response = await current_client().request(
                 method="POST",
                 endpoint="/mcp/assign_base_to_space",
                 json=data,
                 headers=headers
             )
 
-            await ctx.report_progress(3, 3)
-            await ctx.info("Base assigned to space successfully")
+            await notify.done("Base assigned to space successfully")
 
             return response
         except ValueError as e:
-            await ctx.error(f"Error assigning base to space: {str(e)}")
+            await notify.error(f"Error assigning base to space: {str(e)}")
             return {"error": f"Error assigning base to space: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in assign_base_to_space")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
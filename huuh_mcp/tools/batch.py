@@ -0,0 +1,147 @@
+"""Batch execution MCP tool."""
+import asyncio
+import logging
+import time
+from functools import lru_cache, partial
+from typing import Dict, Any, List, Optional
+
+from fastmcp import Context
+from pydantic import TypeAdapter, ValidationError
+
+from ..config.settings import settings
+from ..huuh.metrics import metrics
+from ..huuh.tracing import tracer
+from ..utils.auth_wrapper import ensure_authenticated_async, get_error_response, shared_authentication
+from ..utils.notifications import Notifier
+from .base import create_base, assign_base_to_space
+from .contribution import contribute
+from .information import retrieve_information, retrieve_information_from_all_bases
+from .marketplace import search_marketplace
+from .persona import get_persona, refresh_persona, contribute_persona_to_course, contribute_persona_to_user
+from .space import create_spaces
+from .user_options import get_user_options
+
+logger = logging.getLogger(__name__)
+
+# Tools that can be called from a batch, by name
+BATCH_TOOLS = {
+    "get_user_options": get_user_options,
+    "search_marketplace": search_marketplace,
+    "retrieve_information": retrieve_information,
+    "retrieve_information_from_all_bases": retrieve_information_from_all_bases,
+    "contribute": contribute,
+    "get_persona": get_persona,
+    "refresh_persona": refresh_persona,
+    "contribute_persona_to_course": contribute_persona_to_course,
+    "contribute_persona_to_user": contribute_persona_to_user,
+    "create_base": create_base,
+    "assign_base_to_space": assign_base_to_space,
+    "create_spaces": create_spaces,
+}
+
+
+@lru_cache(maxsize=None)
+def _validator(name: str) -> TypeAdapter:
+    """Get the validator of a batch tool's arguments, calling the tool once they are valid."""
+    # Validated like a direct call to the registered tool; batched calls run without a context
+    return TypeAdapter(partial(BATCH_TOOLS[name], ctx=None))
+
+
+def _describe(error: ValidationError) -> str:
+    """Summarize validation errors as 'argument: problem' pairs."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'arguments'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+async def _run_operation(operation: Any) -> Dict[str, Any]:
+    """Run a single batch operation and wrap its outcome."""
+    if not isinstance(operation, dict):
+        return {"tool": None, "error": "Each operation must be an object with 'tool' and 'arguments'."}
+
+    name = operation.get("tool")
+    arguments = operation.get("arguments") or {}
+    if name not in BATCH_TOOLS:
+        return {"tool": name, "error": f"Unknown tool: {name}"}
+    if not isinstance(arguments, dict) or "ctx" in arguments:
+        return {"tool": name, "error": "Operation arguments must be an object of tool parameters."}
+
+    # Recorded like a direct call, see ToolMetricsMiddleware and TracingMiddleware
+    started = time.perf_counter()
+    try:
+        with tracer.span(f"tools/call {name}", attributes={"mcp.tool.name": name}):
+            result = await _validator(name).validate_python(arguments)
+    except ValidationError as e:
+        metrics.increment("huuh_tool_errors_total", tool=name, type=type(e).__name__)
+        return {"tool": name, "error": f"Invalid arguments: {_describe(e)}"}
+    except Exception as e:
+        metrics.increment("huuh_tool_errors_total", tool=name, type=type(e).__name__)
+        raise
+    finally:
+        metrics.observe("huuh_tool_duration_seconds", time.perf_counter() - started, tool=name)
+
+    if isinstance(result, dict) and "error" in result:
+        metrics.increment("huuh_tool_errors_total", tool=name, type="error_result")
+        return {"tool": name, "error": result["error"]}
+    return {"tool": name, "result": result}
+
+
+async def batch(
+    operations: List[Dict[str, Any]],
+    max_concurrency: Optional[int] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Run several huuh tool calls in one request.
+
+    Operations run concurrently, so writes in the same batch are not ordered
+    relative to each other.
+
+    Args:
+        operations: List of {"tool": <tool name>, "arguments": {<tool parameters>}}
+        max_concurrency: Maximum number of operations run at once (optional)
+
+    Returns:
+        A dictionary with one result or error per operation, in request order.
+    """
+    notify = Notifier(ctx)
+    try:
+        # Validate inputs
+        if not operations:
+            await notify.error("Missing required parameters: operations must be provided.")
+            return {"error": "Missing required parameters: operations must be provided."}
+
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            await notify.error(f"Too many operations. Maximum is {settings.BATCH_MAX_OPERATIONS}.")
+            return {"error": f"Too many operations. Maximum is {settings.BATCH_MAX_OPERATIONS}."}
+
+        # Report start
+        await notify.start(f"Running {len(operations)} operations...", len(operations))
+
+        # Authenticate once for the whole batch
+        if not await ensure_authenticated_async():
+            await notify.error("Authentication failed")
+            return get_error_response("Please check your credentials.")
+
+        concurrency = min(max_concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY)
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def _run(operation: Any) -> Dict[str, Any]:
+            async with semaphore:
+                result = await _run_operation(operation)
+            await notify.step()
+            return result
+
+        with shared_authentication():
+            results = await asyncio.gather(*(_run(operation) for operation in operations))
+
+        # Report completion
+        failed = sum(1 for result in results if "error" in result)
+        await notify.done(f"Batch completed: {len(results) - failed} succeeded, {failed} failed")
+
+        return {"results": results}
+    except Exception as e:
+        logger.exception("Unexpected error in batch")
+        await notify.error("An unexpected error occurred")
+        return {"error": f"An unexpected error occurred: {str(e)}"}
@@ -4,8 +4,9 @@ from typing import Dict, Any
 
 from fastmcp import Context
 
-from ..huuh.client import api_client
+from ..huuh.tenants import current_client
 from ..utils.auth_wrapper import ensure_authenticated_async, get_error_response
+from ..utils.notifications import Notifier
 
 logger = logging.getLogger(__name__)
 
@@ -29,25 +30,23 @@ async def contribute(
     Returns:
         A dictionary containing the result of the contribution.
     """
+    notify = Notifier(ctx)
     try:
         # Validate content length
         if len(contribution_content) > 30000:
-            await ctx.error("Contribution content is too long. Maximum length is 30,000 characters.")
+            await notify.error("Contribution content is too long. Maximum length is 30,000 characters.")
             return {"error": "Contribution content is too long. Maximum length is 30,000 characters."}
         
         # Report start
-        await ctx.info(f"Adding contribution '{contribution_title}' to course...")
-        await ctx.report_progress(0, 2)
+        await notify.start(f"Adding contribution '{contribution_title}' to course...", 2)
         
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
         
         # Submit contribution
-        await ctx.report_progress(1, 2)
-        await ctx.info("Submitting contribution...")
+        await notify.step("Submitting contribution...")
         
         try:
             # Prepare data
@@ -58,18 +57,21 @@ async def contribute(
                 "contribution_content": contribution_content
             }
             
-            # Make request
-            response = await api_client.request("POST", "/mcp/contribute", json=data)
+            # Make request, cached retrievals for this base are stale afterwards
+            client = current_client()
+            try:
+                response = await client.request("POST", "/mcp/contribute", json=data)
+            finally:
+                client.retrieval_cache.invalidate(course_id)
             
             # Report completion
-            await ctx.report_progress(2, 2)
-            await ctx.info("Contribution submitted successfully")
+            await notify.done("Contribution submitted successfully")
             
             return response
         except ValueError as e:
-            await ctx.error(f"Error submitting contribution: {str(e)}")
+            await notify.error(f"Error submitting contribution: {str(e)}")
             return {"error": f"Error submitting contribution: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in contribute")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
@@ -0,0 +1,25 @@
+"""Server diagnostics MCP tool."""
+import logging
+from typing import Dict, Any
+
+from fastmcp import Context
+
+from ..huuh.stats import stats_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+async def server_stats(ctx: Context) -> Dict[str, Any]:
+    """
+    Report where the server spends its time.
+
+    Returns:
+        A dictionary with latency summaries per tool, API endpoint and request
+        phase (in seconds), error counts by type, cache hit ratios, connection
+        pool usage and bytes transferred per endpoint.
+    """
+    try:
+        return stats_snapshot()
+    except Exception as e:
+        logger.exception("Unexpected error in server_stats")
+        return {"error": f"An unexpected error occurred: {str(e)}"}
@@ -1,21 +1,140 @@
-"""Information retrieval MCP tool."""
+"""Information retrieval MCP tools."""
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
 
 from fastmcp import Context
 
-from ..huuh.client import api_client
+from ..config.settings import settings
+from ..huuh.cache import retrieval_key
+from ..huuh.metrics import metrics
+from ..huuh.tenants import current_client
+from ..huuh.tracing import tracer
+from ..utils.text import compact_documents, normalize_whitespace
 from ..utils.auth_wrapper import ensure_authenticated_async, get_error_response
+from ..utils.notifications import Notifier
 
 logger = logging.getLogger(__name__)
 
 
+async def fetch_content(
+    query: str,
+    course_id: str,
+    relevant_modules: Optional[List[str]] = None,
+    relevant_groups: Optional[List[str]] = None,
+    relevant_file_ids: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Fetch the page contents matching a query in one course, using the retrieval cache.
+
+    Returns:
+        List of page contents in ranked order
+
+    Raises:
+        ValueError: If the request fails
+    """
+    client = current_client()
+    cache_key = retrieval_key(query, course_id, relevant_modules, relevant_groups, relevant_file_ids)
+    if settings.RETRIEVAL_CACHE_ENABLED:
+        content = client.retrieval_cache.get(cache_key)
+        if content is not None:
+            logger.debug("Serving retrieval results from cache")
+            return list(content)
+    # A contribution to the course while the request is in flight makes its results stale
+    generation = client.retrieval_cache.generation(course_id)
+
+    # Build parameters
+    params = {
+        "query": normalize_whitespace(query),
+        "course_id": course_id,
+    }
+
+    # Add optional parameters only if they exist, in a stable order
+    _, _, modules, groups, file_ids = cache_key
+    if modules:
+        params["relevant_modules"] = ",".join(modules)
+    if groups:
+        params["relevant_groups"] = ",".join(groups)
+    if file_ids:
+        params["relevant_file_ids"] = ",".join(file_ids)
+
+    if settings.STREAM_RETRIEVAL:
+        # Only page_content is decoded, document metadata is skipped as it streams in
+        content = await client.stream_field("/mcp/information", "documents", "page_content", params=params)
+    else:
+        # Make request
+        response = await client.request("GET", "/mcp/information", params=params)
+
+        # Transform the response to include only page_content
+        content = []
+        if "documents" in response:
+            documents = response["documents"]
+
+            for doc in documents:
+                if "page_content" in doc:
+                    content.append(doc["page_content"])
+
+    if settings.RETRIEVAL_CACHE_ENABLED:
+        if client.retrieval_cache.generation(course_id) == generation:
+            client.retrieval_cache.set(cache_key, content, settings.RETRIEVAL_CACHE_TTL, tag=course_id)
+        else:
+            logger.debug("Not caching retrieval results, the course changed while they were fetched")
+    return list(content)
+
+
+def _extract_course_ids(options: Any) -> List[str]:
+    """Collect the course IDs found anywhere in a user options response, in order."""
+    course_ids: List[str] = []
+
+    def _walk(node: Any) -> None:
+        if isinstance(node, dict):
+            course_id = node.get("course_id")
+            if isinstance(course_id, (str, int)) and str(course_id) not in course_ids:
+                course_ids.append(str(course_id))
+            for value in node.values():
+                _walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                _walk(item)
+
+    _walk(options)
+    return course_ids
+
+
+def _merge_ranked(results: Dict[str, List[str]], top_k: int) -> List[Dict[str, str]]:
+    """
+    Merge per-course ranked results into a single top-k list.
+
+    Results are interleaved rank by rank so every course contributes its best
+    documents first; duplicate contents are kept once, attributed to the
+    course that ranked them highest.
+    """
+    merged: List[Dict[str, str]] = []
+    seen = set()
+    depth = max((len(content) for content in results.values()), default=0)
+    for rank in range(depth):
+        for course_id, content in results.items():
+            if rank >= len(content):
+                continue
+            fingerprint = normalize_whitespace(content[rank]).casefold()
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            merged.append({"course_id": course_id, "content": content[rank]})
+            if len(merged) >= top_k:
+                return merged
+    return merged
+
+
 async def retrieve_information(
     query: str,
     course_id: str,
     relevant_modules: Optional[List[str]] = None,
     relevant_groups: Optional[List[str]] = None,
     relevant_file_ids: Optional[List[str]] = None,
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    dedupe: bool = False,
     ctx: Context = None
 ) -> Dict[str, Any]:
     """
@@ -27,71 +146,164 @@ async def retrieve_information(
         relevant_modules: List of module numbers to search in (optional)
         relevant_groups: List of group IDs to search in (optional)
         relevant_file_ids: List of file IDs to search in (optional)
+        max_chars: Maximum total characters of content to return (optional)
+        max_tokens: Maximum total tokens of content to return, estimated (optional)
+        dedupe: Remove duplicate and near-duplicate documents (optional)
         
     Returns:
-        A dictionary containing document results.
+        A dictionary containing document results, and what was dropped when
+        a budget or dedupe was requested.
     """
+    notify = Notifier(ctx)
     try:
         # Validate query length
         if len(query) > 150:
-            await ctx.error("Query is too long. Maximum length is 150 characters.")
+            await notify.error("Query is too long. Maximum length is 150 characters.")
             return {"error": "Query is too long. Maximum length is 150 characters."}
         
         # Validate required parameters
         if not query:
-            await ctx.error("Missing required parameters: query must be provided.")
+            await notify.error("Missing required parameters: query must be provided.")
             return {"error": "Missing required parameters: query must be provided."}
         
         # Report start
-        await ctx.info(f"Retrieving information for '{query}'...")
-        await ctx.report_progress(0, 2)
+        await notify.start(f"Retrieving information for '{query}'...", 2)
         
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
         
         # Request information
-        await ctx.report_progress(1, 2)
-        await ctx.info("Searching for information...")
+        await notify.step("Searching for information...")
         
         try:
-            # Build parameters
-            params = {
-                "query": query,
-                "course_id": course_id,
-            }
-            
-            # Add optional parameters only if they exist
-            if relevant_modules:
-                params["relevant_modules"] = ",".join(relevant_modules)
-            if relevant_groups:
-                params["relevant_groups"] = ",".join(relevant_groups)
-            if relevant_file_ids:
-                params["relevant_file_ids"] = ",".join(relevant_file_ids)
-            
-            # Make request
-            response = await api_client.request("GET", "/mcp/information", params=params)
-            
-            # Transform the response to include only page_content
-            transformed_response = {"content": []}
-            if "documents" in response:
-                documents = response["documents"]
-                
-                for doc in documents:
-                    if "page_content" in doc:
-                        transformed_response["content"].append(doc["page_content"])
+            content = await fetch_content(
+                query, course_id, relevant_modules, relevant_groups, relevant_file_ids
+            )
+            transformed_response = {"content": content}
+
+            # Trim the highest-ranked documents to the requested budget
+            if dedupe or max_chars is not None or max_tokens is not None:
+                with metrics.timer("huuh_phase_duration_seconds", phase="transform"), tracer.span("transform"):
+                    content, dropped = compact_documents(
+                        content, dedupe=dedupe, max_chars=max_chars, max_tokens=max_tokens
+                    )
+                transformed_response = {"content": content, "dropped": dropped}
             
             # Report completion
-            await ctx.report_progress(2, 2)
-            await ctx.info("Information retrieved successfully")
+            await notify.done("Information retrieved successfully")
             
             return transformed_response
         except ValueError as e:
-            await ctx.error(f"Error retrieving information: {str(e)}")
+            await notify.error(f"Error retrieving information: {str(e)}")
             return {"error": f"Error retrieving information: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in retrieve_information")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
+        return {"error": f"An unexpected error occurred: {str(e)}"}
+
+
+async def retrieve_information_from_all_bases(
+    query: str,
+    top_k: int = 10,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Retrieve information from every course the user has access to.
+
+    Args:
+        query: Search query (max 150 characters)
+        top_k: Maximum number of documents to return (optional)
+
+    Returns:
+        A dictionary containing the merged document results with the course
+        each one came from, plus the courses that timed out, were skipped
+        at the overall deadline or failed.
+    """
+    notify = Notifier(ctx)
+    try:
+        # Validate query length
+        if len(query) > 150:
+            await notify.error("Query is too long. Maximum length is 150 characters.")
+            return {"error": "Query is too long. Maximum length is 150 characters."}
+
+        # Validate required parameters
+        if not query:
+            await notify.error("Missing required parameters: query must be provided.")
+            return {"error": "Missing required parameters: query must be provided."}
+
+        # Report start
+        await notify.start(f"Retrieving information for '{query}' from all bases...", 3)
+
+        # Authenticate
+        if not await ensure_authenticated_async():
+            await notify.error("Authentication failed")
+            return get_error_response("Please check your credentials.")
+
+        await notify.step()
+
+        try:
+            # Served from the response cache when get_user_options ran recently
+            options = await current_client().request("GET", "/mcp/user_options")
+            course_ids = _extract_course_ids(options)
+        except ValueError as e:
+            await notify.error(f"Error fetching user options: {str(e)}")
+            return {"error": f"Error fetching user options: {str(e)}"}
+
+        await notify.step(f"Searching {len(course_ids)} bases...")
+
+        semaphore = asyncio.Semaphore(settings.FEDERATED_MAX_CONCURRENCY)
+        started = set()
+
+        async def _search(course_id: str) -> List[str]:
+            async with semaphore:
+                # Each base's deadline starts once it is searched, not while it waits for a slot
+                started.add(course_id)
+                return await asyncio.wait_for(
+                    fetch_content(query, course_id), timeout=settings.FEDERATED_BASE_TIMEOUT
+                )
+
+        tasks = {course_id: asyncio.create_task(_search(course_id)) for course_id in course_ids}
+        if tasks:
+            _, pending = await asyncio.wait(tasks.values(), timeout=settings.FEDERATED_TOTAL_TIMEOUT or None)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results: Dict[str, List[str]] = {}
+        timed_out: List[str] = []
+        skipped: List[str] = []
+        failed: Dict[str, str] = {}
+        for course_id, task in tasks.items():
+            if task.cancelled():
+                # Cut off by the overall deadline, while running or before its turn
+                (timed_out if course_id in started else skipped).append(course_id)
+                continue
+            error = task.exception()
+            if error is None:
+                results[course_id] = task.result()
+            elif isinstance(error, asyncio.TimeoutError):
+                timed_out.append(course_id)
+            else:
+                failed[course_id] = str(error)
+
+        if timed_out:
+            logger.warning("Retrieval timed out for bases: %s", ", ".join(timed_out))
+        if skipped:
+            logger.warning("Retrieval skipped bases past the overall deadline: %s", ", ".join(skipped))
+
+        # Report completion
+        await notify.done("Information retrieved successfully")
+
+        return {
+            "content": _merge_ranked(results, max(top_k, 1)),
+            "bases_searched": len(results),
+            "timed_out": timed_out,
+            "skipped": skipped,
+            "failed": failed,
+        }
+    except Exception as e:
+        logger.exception("Unexpected error in retrieve_information_from_all_bases")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
@@ -5,8 +5,9 @@ from urllib.parse import quote
 
 from fastmcp import Context
 
-from ..huuh.client import api_client
+from ..huuh.tenants import current_client
 from ..utils.auth_wrapper import ensure_authenticated_async, get_error_response
+from ..utils.notifications import Notifier
 
 logger = logging.getLogger(__name__)
 
@@ -21,41 +22,38 @@ async def search_marketplace(query: str, ctx: Context) -> Dict[str, Any]:
     Returns:
         A dictionary containing search results.
     """
+    notify = Notifier(ctx)
     try:
         # Validate query length
         if len(query) > 150:
-            await ctx.error("Search query is too long. Maximum length is 150 characters.")
+            await notify.error("Search query is too long. Maximum length is 150 characters.")
             return {"error": "Search query is too long. Maximum length is 150 characters."}
         
         # Report start
-        await ctx.info(f"Searching marketplace for '{query}'...")
-        await ctx.report_progress(0, 2)
+        await notify.start(f"Searching marketplace for '{query}'...", 2)
         
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
         
         # Request search
-        await ctx.report_progress(1, 2)
-        await ctx.info("Executing search...")
+        await notify.step("Executing search...")
         
         try:
-            response = await api_client.request(
+            response = await current_client().request(
                 "GET", 
                 f"/mcp/search_marketplace?user_query={quote(query)}"
             )
             
             # Report completion
-            await ctx.report_progress(2, 2)
-            await ctx.info("Search completed successfully")
+            await notify.done("Search completed successfully")
             
             return response
         except ValueError as e:
-            await ctx.error(f"Error searching marketplace: {str(e)}")
+            await notify.error(f"Error searching marketplace: {str(e)}")
             return {"error": f"Error searching marketplace: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in search_marketplace")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
@@ -5,8 +5,9 @@ from urllib.parse import quote
 
 from fastmcp import Context
 
-from ..huuh.client import api_client
+from ..huuh.tenants import current_client
 from ..utils.auth_wrapper import ensure_authenticated_async, get_error_response
+from ..utils.notifications import Notifier
 
 logger = logging.getLogger(__name__)
 
@@ -21,38 +22,35 @@ async def get_persona(title: str, ctx: Context) -> Dict[str, Any]:
     Returns:
         A dictionary containing persona information.
     """
+    notify = Notifier(ctx)
     try:
         # Report start
-        await ctx.info(f"Retrieving persona '{title}'...")
-        await ctx.report_progress(0, 2)
+        await notify.start(f"Retrieving persona '{title}'...", 2)
 
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
 
         # Request persona
-        await ctx.report_progress(1, 2)
-        await ctx.info("Fetching persona information...")
+        await notify.step("Fetching persona information...")
 
         try:
-            response = await api_client.request(
+            response = await current_client().request(
                 "GET",
                 f"/mcp/get_persona?title={quote(title)}"
             )
 
             # Report completion
-            await ctx.report_progress(2, 2)
-            await ctx.info("Persona retrieved successfully")
+            await notify.done("Persona retrieved successfully")
 
             return response
         except ValueError as e:
-            await ctx.error(f"Error retrieving persona: {str(e)}")
+            await notify.error(f"Error retrieving persona: {str(e)}")
             return {"error": f"Error retrieving persona: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in get_persona")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
 
 
@@ -73,22 +71,19 @@ async def refresh_persona(
     Returns:
         A dictionary containing the result of the update.
     """
-    logger.info(f"refresh_persona called with parameters: title='{title}', "
-                f"new_content length={len(new_content)}, "
-                f"course_id='{course_id}'")
+    logger.info("refresh_persona called with parameters: title='%s', new_content length=%d, course_id='%s'",
+                title, len(new_content), course_id)
 
+    notify = Notifier(ctx)
     try:
-        await ctx.info(f"Updating persona '{title}'...")
-        await ctx.report_progress(0, 3)
+        await notify.start(f"Updating persona '{title}'...", 3)
 
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
 
-        await ctx.report_progress(1, 3)
-        await ctx.info("Updating persona content...")
+        await notify.step("Updating persona content...")
 
         try:
             form_data = {
@@ -101,7 +96,7 @@ async def refresh_persona(
 
             # Make the POST request with the form data in the body
             headers = {"Content-Type": "application/json"}
-            response = await api_client.request(
+            response = await current_client().request(
                 method="POST",
                 endpoint="/mcp/refresh_persona",
                 json=form_data,
@@ -109,16 +104,15 @@ async def refresh_persona(
             )
 
             # Report completion
-            await ctx.report_progress(3, 3)
-            await ctx.info("Persona updated successfully")
+            await notify.done("Persona updated successfully")
 
             return response
         except ValueError as e:
-            await ctx.error(f"Error updating persona: {str(e)}")
+            await notify.error(f"Error updating persona: {str(e)}")
             return {"error": f"Error updating persona: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in refresh_persona")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
 
 
@@ -140,33 +134,32 @@ async def contribute_persona_to_course(
         A dictionary containing the result of the contribution.
     """
     # Log all parameters at the beginning for debugging
-    logger.info(f"contribute_persona called with parameters: course_id='{course_id}', "
-                f"persona_title='{persona_title}', persona_content length={len(persona_content)}")
+    logger.info("contribute_persona called with parameters: course_id='%s', "
+                "persona_title='%s', persona_content length=%d", course_id, persona_title, len(persona_content))
 
+    notify = Notifier(ctx)
     try:
         # Report start
-        await ctx.info(f"Contributing new persona '{persona_title}' to course {course_id}...")
-        await ctx.report_progress(0, 3)
+        await notify.start(f"Contributing new persona '{persona_title}' to course {course_id}...", 3)
 
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
 
         # Validate inputs
         if not course_id or not persona_title or not persona_content:
-            await ctx.error(
+            await notify.error(
                 "Missing required parameters: course_id, persona_title, and persona_content must be provided.")
             return {
                 "error": "Missing required parameters: course_id, persona_title, and persona_content must be provided."}
 
         # Check content length
         if len(persona_content) > 500:
-            await ctx.error("Persona content is too long. Maximum length is 500 characters.")
+            await notify.error("Persona content is too long. Maximum length is 500 characters.")
             return {"error": "Persona content is too long. Maximum length is 500 characters."}
 
-        await ctx.report_progress(1, 3)
+        await notify.step()
 
         try:
             # Create the request data
@@ -178,7 +171,7 @@ async def contribute_persona_to_course(
 
             # Make the POST request
             headers = {"Content-Type": "application/json"}
-            response = await api_client.request(
+            response = await current_client().request(
                 method="POST",
                 endpoint="/mcp/contribute_persona_to_course",
                 json=data,
@@ -186,16 +179,15 @@ async def contribute_persona_to_course(
             )
 
             # Report completion
-            await ctx.report_progress(3, 3)
-            await ctx.info("Persona contributed successfully")
+            await notify.done("Persona contributed successfully")
 
             return response
         except ValueError as e:
-            await ctx.error(f"Error contributing persona: {str(e)}")
+            await notify.error(f"Error contributing persona: {str(e)}")
             return {"error": f"Error contributing persona: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in contribute_persona")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
 
 
@@ -216,33 +208,32 @@ async def contribute_persona_to_user(
         A dictionary containing the result of the contribution.
     """
     # Log all parameters at the beginning for debugging
-    logger.info(f"contribute_persona called with parameters: "
-                f"persona_title='{persona_title}', persona_content length={len(persona_content)}")
+    logger.info("contribute_persona called with parameters: persona_title='%s', persona_content length=%d",
+                persona_title, len(persona_content))
 
+    notify = Notifier(ctx)
     try:
         # Report start
-        await ctx.info(f"Contributing new persona '{persona_title}'...")
-        await ctx.report_progress(0, 3)
+        await notify.start(f"Contributing new persona '{persona_title}'...", 3)
 
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
 
         # Validate inputs
         if not persona_title or not persona_content:
-            await ctx.error(
+            await notify.error(
                 "Missing required parameters: user_id, persona_title, and persona_content must be provided.")
             return {
                 "error": "Missing required parameters: user_id, persona_title, and persona_content must be provided."}
 
         # Check content length
         if len(persona_content) > 500:
-            await ctx.error("Persona content is too long. Maximum length is 500 characters.")
+            await notify.error("Persona content is too long. Maximum length is 500 characters.")
             return {"error": "Persona content is too long. Maximum length is 500 characters."}
 
-        await ctx.report_progress(1, 3)
+        await notify.step()
 
         try:
             # Create the request data
@@ -253,7 +244,7 @@ async def contribute_persona_to_user(
 
             # Make the POST request
             headers = {"Content-Type": "application/json"}
-            response = await api_client.request(
+            response = await current_client().request(
                 method="POST",
                 endpoint="/mcp/add_persona_to_user",
                 json=data,
@@ -261,14 +252,13 @@ async def contribute_persona_to_user(
             )
 
             # Report completion
-            await ctx.report_progress(3, 3)
-            await ctx.info("Persona contributed successfully")
+            await notify.done("Persona contributed successfully")
 
             return response
         except ValueError as e:
-            await ctx.error(f"Error contributing persona: {str(e)}")
+            await notify.error(f"Error contributing persona: {str(e)}")
             return {"error": f"Error contributing persona: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in contribute_persona")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
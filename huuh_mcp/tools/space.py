@@ -4,8 +4,9 @@ from typing import Dict, Any
 
 from fastmcp import Context
 
-from ..huuh.client import api_client
+from ..huuh.tenants import current_client
 from ..utils.auth_wrapper import ensure_authenticated_async, get_error_response
+from ..utils.notifications import Notifier
 
 logger = logging.getLogger(__name__)
 
@@ -25,26 +26,25 @@ async def create_spaces(
     Returns:
         A dictionary containing the result of the space creation.
     """
-    logger.info(f"create_spaces called with space_name='{space_name}'")
+    logger.info("create_spaces called with space_name='%s'", space_name)
 
+    notify = Notifier(ctx)
     try:
-        await ctx.info(f"Creating space '{space_name}'...")
-        await ctx.report_progress(0, 3)
+        await notify.start(f"Creating space '{space_name}'...", 3)
 
         # Authenticate
-        await ctx.info("Authenticating...")
         if not await ensure_authenticated_async():
-            await ctx.error("Authentication failed")
+            await notify.error("Authentication failed")
             return get_error_response("Please check your credentials.")
 
         # Validate inputs
         if not space_name or not space_description:
-            await ctx.error(
+            await notify.error(
                 "Missing required parameters: space_name and space_description must be provided.")
             return {
                 "error": "Missing required parameters: space_name and space_description must be provided."}
 
-        await ctx.report_progress(1, 3)
+        await notify.step()
 
         try:
             data = {
@@ -52,21 +52,20 @@ async def create_spaces(
                 "space_description": space_description
             }
             headers = {"Content-Type": "application/json"}
-            response = await api_client.request(
+            response = await current_client().request(
                 method="POST",
                 endpoint="/mcp/create_spaces",
                 json=data,
                 headers=headers
             )
 
-            await ctx.report_progress(3, 3)
-            await ctx.info("Space created successfully")
+            await notify.done("Space created successfully")
 
             return response
         except ValueError as e:
-            await ctx.error(f"Error creating space: {str(e)}")
+            await notify.error(f"Error creating space: {str(e)}")
             return {"error": f"Error creating space: {str(e)}"}
     except Exception as e:
         logger.exception("Unexpected error in create_spaces")
-        await ctx.error("An unexpected error occurred")
+        await notify.error("An unexpected error occurred")
         return {"error": f"An unexpected error occurred: {str(e)}"}
@@ -1,68 +1,49 @@
-"""Synchronous authentication wrapper for tools."""
-import asyncio
+"""Authentication wrapper for tools."""
 import logging
-from typing import Any, Dict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator
 
-from ..huuh.auth import auth_client
+from ..config.settings import settings
+from ..huuh.metrics import metrics
+from ..huuh.tenants import current_client
+from ..huuh.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+# Set while several tool calls run under a single authentication check
+_authenticated: ContextVar[bool] = ContextVar("huuh_authenticated", default=False)
 
-def ensure_authenticated() -> bool:
+
+async def ensure_authenticated_async() -> bool:
     """
     Ensure authentication is valid before tool execution.
-    
-    This function runs the authentication check synchronously by creating
-    an event loop if needed.
+
+    Runs on the caller's event loop, so the token refresh task and the
+    tenant client from current_client() stay on the loop that uses them.
     
     Returns:
         bool: True if authentication is successful, False otherwise
     """
-    try:
-        # Try to get current event loop
-        try:
-            loop = asyncio.get_running_loop()
-            # If we're in an async context, we need to run in a thread
-            # But since we're being called from async functions anyway,
-            # let's create a task and run it
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(_run_auth_in_new_loop)
-                return future.result(timeout=30)  # 30 second timeout
-        except RuntimeError:
-            # No running loop, we can create our own
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                return loop.run_until_complete(_authenticate())
-            finally:
-                loop.close()
-                
-    except Exception as e:
-        logger.error(f"Authentication wrapper error: {str(e)}")
-        return False
+    if _authenticated.get():
+        return True
+    with metrics.timer("huuh_phase_duration_seconds", phase="auth"), tracer.span("auth"):
+        return await _authenticate()
 
 
-def _run_auth_in_new_loop() -> bool:
+@contextmanager
+def shared_authentication() -> Iterator[None]:
     """
-    Run authentication in a new event loop (for thread execution).
+    Skip the per-tool authentication check for tool calls made in this block.
+
+    Only use after a successful ensure_authenticated_async(); tasks created
+    inside the block inherit the flag.
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    token = _authenticated.set(True)
     try:
-        return loop.run_until_complete(_authenticate())
+        yield
     finally:
-        loop.close()
-
-
-async def ensure_authenticated_async() -> bool:
-    """
-    Async version of ensure_authenticated for use in async contexts.
-    
-    Returns:
-        bool: True if authentication is successful, False otherwise
-    """
-    return await _authenticate()
+        _authenticated.reset(token)
 
 
 async def _authenticate() -> bool:
@@ -74,7 +55,15 @@ async def _authenticate() -> bool:
     """
     try:
         logger.info("Authenticating MCP request")
-        
+        auth_client = current_client().auth
+
+        if settings.AUTH_MODE == "optimistic":
+            # Skip the validation round trip: make sure a token is available and
+            # let HuuhClient.request refresh and replay if the backend rejects it
+            await auth_client.get_token()
+            logger.info("Using cached token")
+            return True
+
         # Try to get and validate current token
         valid = await auth_client.validate_token()
         
@@ -93,7 +82,7 @@ async def _authenticate() -> bool:
             return True
             
     except Exception as e:
-        logger.error(f"Authentication error: {str(e)}")
+        logger.error("Authentication error: %s", e)
         return False
 
 
@@ -1,58 +1,172 @@
 """Configure logging for the huuh MCP server."""
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
 import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
-def configure_logging(log_level="INFO", log_file=None):
+# Listener writing queued records, while logging is configured with a queue
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of the records below WARNING from chosen loggers.
+
+    Rates apply to a logger and its children, the most specific name wins.
+    Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler leaving formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, they may change after the call returns, but
+        # leave timestamps, tracebacks and output formats to the listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the listener thread, if any."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def configure_logging(
+    log_level="INFO",
+    log_file=None,
+    log_format="text",
+    use_queue=True,
+    sampling: Optional[Dict[str, float]] = None
+):
     """Configure logging with enhanced format and optional file output.
-    
+
+    With use_queue, records are handed to a background thread that formats
+    and writes them, so that tool calls never wait on stderr or the log file.
+
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Optional file path to save logs
+        log_format: 'text' or 'json' (one object per line)
+        use_queue: Write records from a background thread
+        sampling: Fraction of records below WARNING kept, by logger name
     """
     # Parse the log level
     numeric_level = getattr(logging, log_level.upper(), None)
     if not isinstance(numeric_level, int):
         print(f"Invalid log level: {log_level}", file=sys.stderr)
         numeric_level = logging.INFO
-    
+
     # Basic configuration for logging
-    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    
+    log_format_string = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(log_format_string)
+
     # Configure root logger
     handlers = []
-    
+
     # Always add console handler
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter(log_format))
+    console_handler.setFormatter(formatter)
     handlers.append(console_handler)
-    
+
     # Add file handler if specified
     if log_file:
         # Ensure directory exists
         log_dir = os.path.dirname(log_file)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir, exist_ok=True)
-            
+
         file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(logging.Formatter(log_format))
+        file_handler.setFormatter(formatter)
         handlers.append(file_handler)
-    
+
+    # Configuring again (e.g. in HTTP worker processes) replaces the previous setup
+    global _listener
+    stop_logging()
+    if use_queue:
+        _listener = logging.handlers.QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+        _listener.start()
+        handlers = [_QueueHandler(_listener.queue)]
+
+    # Sampled-out records are dropped before they are queued or formatted
+    if sampling:
+        for handler in handlers:
+            handler.addFilter(SamplingFilter(sampling))
+
     # Configure the root logger
     logging.basicConfig(
         level=numeric_level,
-        format=log_format,
-        handlers=handlers
+        format=log_format_string,
+        handlers=handlers,
+        force=True
     )
-    
+
     # Set more conservative log levels for some noisy libraries
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("asyncio").setLevel(logging.WARNING)
-    
+
     # Our code should get the specified log level
     logger = logging.getLogger("huuh_mcp")
     logger.setLevel(numeric_level)
-    
-    logger.debug(f"Logging configured with level: {log_level}")
+
+    logger.debug("Logging configured with level: %s", log_level)
     if log_file:
-        logger.debug(f"Logs will be saved to: {log_file}")
+        logger.debug("Logs will be saved to: %s", log_file)
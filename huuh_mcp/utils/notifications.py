@@ -0,0 +1,155 @@
+"""Notification policy for MCP tool calls."""
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+from fastmcp import Context
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Notification levels, from quietest to most verbose
+LEVEL_OFF = "off"
+LEVEL_ERRORS = "errors"
+LEVEL_FULL = "full"
+
+
+class Notifier:
+    """
+    Sends the log and progress notifications of one tool call, following NOTIFY_LEVEL.
+
+    At 'full', info and progress notifications are held back until the call
+    has run for NOTIFY_MIN_DURATION, so fast calls send none at all; a call
+    that runs longer first sends its latest info and progress, then keeps
+    reporting with progress coalesced to one update per
+    NOTIFY_PROGRESS_INTERVAL. Errors and warnings are sent right away at
+    'full' and 'errors', nothing is sent at 'off' or without a context
+    (e.g. inside a batch).
+
+    ``done`` and ``error`` end the call; held-back updates are then sent only
+    if the call had already become visible.
+    """
+
+    def __init__(
+        self,
+        ctx: Optional[Context],
+        level: Optional[str] = None,
+        min_duration: Optional[float] = None,
+        progress_interval: Optional[float] = None
+    ):
+        self._ctx = ctx
+        self.level = (level or settings.NOTIFY_LEVEL).lower() if ctx is not None else LEVEL_OFF
+        self.min_duration = settings.NOTIFY_MIN_DURATION if min_duration is None else min_duration
+        self.progress_interval = settings.NOTIFY_PROGRESS_INTERVAL if progress_interval is None else progress_interval
+        self._started = time.monotonic()
+        self._visible = False
+        self._finished = False
+        self._total: Optional[float] = None
+        self._step = 0
+        self._pending_info: Optional[str] = None
+        self._pending_progress: Optional[Tuple[float, Optional[float]]] = None
+        self._last_progress_at = 0.0
+        self._timer: Optional[asyncio.Task] = None
+
+    async def start(self, message: str, total: Optional[float] = None) -> None:
+        """Announce the call and reset its progress to 0 of total steps."""
+        self._total = total
+        self._step = 0
+        await self.info(message)
+        await self.report_progress(0, total)
+
+    async def step(self, message: Optional[str] = None) -> None:
+        """Advance progress by one step, optionally announcing what comes next."""
+        self._step += 1
+        await self.report_progress(self._step, self._total)
+        if message:
+            await self.info(message)
+
+    async def done(self, message: str) -> None:
+        """Report the call as completed."""
+        if self._total is not None:
+            await self.report_progress(self._total, self._total)
+        await self.info(message)
+        await self._finish()
+
+    async def info(self, message: str) -> None:
+        """Send an info notification, subject to the policy."""
+        if self.level != LEVEL_FULL or self._finished:
+            return
+        if not self._visible:
+            self._pending_info = message
+            self._schedule(self.min_duration - (time.monotonic() - self._started))
+            return
+        await self._send_info(message)
+
+    async def report_progress(self, progress: float, total: Optional[float] = None) -> None:
+        """Send a progress notification, subject to the policy."""
+        if self.level != LEVEL_FULL or self._finished:
+            return
+        self._pending_progress = (progress, total)
+        if not self._visible:
+            self._schedule(self.min_duration - (time.monotonic() - self._started))
+            return
+        wait = self.progress_interval - (time.monotonic() - self._last_progress_at)
+        if wait > 0:
+            self._schedule(wait)
+            return
+        await self._send_progress()
+
+    async def warning(self, message: str) -> None:
+        """Send a warning notification unless notifications are off."""
+        if self.level in (LEVEL_FULL, LEVEL_ERRORS):
+            await self._ctx.warning(message)
+
+    async def error(self, message: str) -> None:
+        """Send an error notification unless notifications are off, and end the call."""
+        if self.level in (LEVEL_FULL, LEVEL_ERRORS):
+            await self._ctx.error(message)
+        await self._finish(flush=False)
+
+    def _schedule(self, delay: float) -> None:
+        """Flush held-back notifications after delay seconds, unless already scheduled."""
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_after(max(delay, 0.0)))
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._timer = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        """Make the call visible and send what was held back."""
+        self._visible = True
+        if self._pending_info is not None:
+            message, self._pending_info = self._pending_info, None
+            await self._send_info(message)
+        if self._pending_progress is not None:
+            await self._send_progress()
+
+    async def _finish(self, flush: bool = True) -> None:
+        """End the call: cancel the timer and send what is held back if the call is visible."""
+        if self._finished:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if flush and self._visible:
+            await self._flush()
+        self._finished = True
+
+    async def _send_info(self, message: str) -> None:
+        try:
+            await self._ctx.info(message)
+        except Exception as e:
+            logger.debug("Could not send notification: %s", e)
+
+    async def _send_progress(self) -> None:
+        progress, total = self._pending_progress
+        self._pending_progress = None
+        self._last_progress_at = time.monotonic()
+        try:
+            await self._ctx.report_progress(progress, total)
+        except Exception as e:
+            logger.debug("Could not send progress: %s", e)
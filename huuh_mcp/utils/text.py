@@ -0,0 +1,115 @@
+"""Text post-processing for retrieved documents."""
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Rough characters per LLM token, used to turn a token budget into characters
+CHARS_PER_TOKEN = 4
+
+# Shingles kept per document sketch; with fewer shingles the sketch is exact
+SKETCH_SIZE = 64
+
+# Estimated Jaccard similarity above which two documents are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of whitespace in a search query or document into single spaces."""
+    return " ".join(text.split())
+
+
+def sketch(text: str, size: int = SKETCH_SIZE) -> FrozenSet[int]:
+    """
+    Build a bottom-k MinHash sketch of a text's word 3-shingles.
+
+    Args:
+        text: Whitespace-normalized text
+        size: Number of smallest shingle hashes to keep
+
+    Returns:
+        Set of the smallest shingle hashes
+    """
+    words = text.lower().split()
+    if len(words) < 3:
+        return frozenset((hash(tuple(words)),))
+    hashes = set(map(hash, zip(words, words[1:], words[2:])))
+    if len(hashes) <= size:
+        return frozenset(hashes)
+    return frozenset(sorted(hashes)[:size])
+
+
+def similarity(a: FrozenSet[int], b: FrozenSet[int], size: int = SKETCH_SIZE) -> float:
+    """Estimate the Jaccard similarity of two documents from their sketches."""
+    # Unrelated documents share no shingles, skip the merge for them
+    if a.isdisjoint(b):
+        return 0.0
+    union = a | b
+    if len(union) > size:
+        union = frozenset(sorted(union)[:size])
+    if not union:
+        return 1.0
+    return len(union & a & b) / len(union)
+
+
+def compact_documents(
+    contents: List[str],
+    dedupe: bool = False,
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None
+) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Normalize, de-duplicate and truncate ranked documents to a size budget.
+
+    Documents are kept in rank order, so when the budget runs out the
+    lowest-ranked ones are dropped first and the last kept one is cut short.
+
+    Args:
+        contents: Document contents, highest-ranked first
+        dedupe: Remove exact and near-duplicate documents
+        max_chars: Maximum total characters to return (optional)
+        max_tokens: Maximum total tokens to return, estimated from characters (optional)
+
+    Returns:
+        Tuple of the kept contents and a report of what was dropped
+    """
+    budget = None
+    if max_chars is not None:
+        budget = max(max_chars, 0)
+    if max_tokens is not None:
+        token_chars = max(max_tokens, 0) * CHARS_PER_TOKEN
+        budget = token_chars if budget is None else min(budget, token_chars)
+
+    report = {"duplicates": 0, "documents_dropped": 0, "characters_dropped": 0, "truncated": False}
+    seen_texts = set()
+    kept_sketches: List[FrozenSet[int]] = []
+    kept: List[str] = []
+    used = 0
+
+    for content in contents:
+        text = normalize_whitespace(content)
+
+        if dedupe:
+            if text in seen_texts:
+                report["duplicates"] += 1
+                continue
+            seen_texts.add(text)
+            text_sketch = sketch(text)
+            if any(similarity(text_sketch, other) >= NEAR_DUPLICATE_THRESHOLD for other in kept_sketches):
+                report["duplicates"] += 1
+                continue
+            kept_sketches.append(text_sketch)
+
+        if budget is not None and used + len(text) > budget:
+            remaining = budget - used
+            if remaining > 0:
+                kept.append(text[:remaining])
+                report["truncated"] = True
+                report["characters_dropped"] += len(text) - remaining
+                used = budget
+            else:
+                report["documents_dropped"] += 1
+                report["characters_dropped"] += len(text)
+            continue
+
+        kept.append(text)
+        used += len(text)
+
+    return kept, report
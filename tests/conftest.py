@@ -0,0 +1,97 @@
+"""Shared fixtures: settings for a fake API and an in-process stand-in for it."""
+import inspect
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+import pytest
+
+# Settings are read on first use, so these apply to every test
+_state_dir = tempfile.mkdtemp(prefix="huuh-mcp-tests-")
+os.environ.update({
+    "HUUH_API_KEY": "test-key",
+    "BACKEND_URL": "http://huuh.test",
+    "TOKEN_CACHE_FILE": os.path.join(_state_dir, "token_cache.json"),
+    "PERSISTENT_CACHE_ENABLED": "false",
+    "HTTP_WARMUP_CONNECTIONS": "0",
+    "STARTUP_PREWARM": "false",
+    "TOKEN_BACKGROUND_RENEWAL": "false",
+})
+
+from huuh_mcp.config.settings import get_settings  # noqa: E402
+from huuh_mcp.huuh import transport  # noqa: E402
+from huuh_mcp.huuh.auth import AuthClient, TokenCache  # noqa: E402
+from huuh_mcp.huuh.client import HuuhClient  # noqa: E402
+from huuh_mcp.huuh.resilience import resilience  # noqa: E402
+
+Handler = Callable[[httpx.Request], Any]
+
+
+class FakeApi:
+    """
+    Stand-in for the huuh API behind the shared HTTP client.
+
+    Routes map (method, path) to a handler returning an httpx.Response, or
+    raising a transport error; handlers may be coroutines. The token
+    endpoint answers by default with numbered tokens.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        self.requests: List[httpx.Request] = []
+        self.route("POST", "/mcp/token", self._token)
+
+    def route(self, method: str, path: str, handler: Handler) -> None:
+        self.routes[(method, path)] = handler
+
+    def count(self, method: str, path: str) -> int:
+        """Number of requests received for an endpoint."""
+        return sum(1 for request in self.requests if request.method == method and request.url.path == path)
+
+    def _token(self, request: httpx.Request) -> httpx.Response:
+        number = self.count("POST", "/mcp/token")
+        return httpx.Response(200, json={"access_token": f"token-{number}", "expires_in": 3600})
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        handler = self.routes.get((request.method, request.url.path))
+        if handler is None:
+            return httpx.Response(404, json={"detail": "Not found"})
+        response = handler(request)
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """The loaded settings, which tests may change with monkeypatch.setattr."""
+    return get_settings()
+
+
+@pytest.fixture
+async def api():
+    """Route the shared HTTP client to a FakeApi for the test."""
+    fake = FakeApi()
+    transport._http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handle))
+    try:
+        yield fake
+    finally:
+        await transport.close_http_client()
+
+
+@pytest.fixture
+def huuh_client(api):
+    """An API client with its own in-memory token, talking to the fake API."""
+    auth = AuthClient(token_cache=TokenCache(persist=False), background_renewal=False)
+    return HuuhClient(auth=auth)
+
+
+@pytest.fixture(autouse=True)
+def reset_resilience():
+    """Start every test with closed circuits and no retries counted."""
+    resilience._breakers.clear()
+    resilience.retries = 0
+    yield
+    resilience._breakers.clear()
@@ -0,0 +1,111 @@
+"""Token exchange: concurrent callers share one exchange, renewal runs ahead of expiry."""
+import asyncio
+from datetime import datetime
+
+import httpx
+
+from huuh_mcp.huuh.auth import AuthClient, TokenCache
+
+
+def _client(**kwargs) -> AuthClient:
+    return AuthClient(token_cache=TokenCache(persist=False), **kwargs)
+
+
+async def test_concurrent_refreshes_share_one_exchange(api):
+    async def slow_token(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"access_token": "shared", "expires_in": 3600})
+
+    api.route("POST", "/mcp/token", slow_token)
+    auth = _client(background_renewal=False)
+
+    tokens = await asyncio.gather(*(auth.refresh_token() for _ in range(50)))
+
+    assert api.count("POST", "/mcp/token") == 1
+    assert set(tokens) == {"shared"}
+
+
+async def test_concurrent_get_token_without_cached_token_exchanges_once(api):
+    auth = _client(background_renewal=False)
+
+    tokens = await asyncio.gather(*(auth.get_token() for _ in range(20)))
+
+    assert api.count("POST", "/mcp/token") == 1
+    assert set(tokens) == {"token-1"}
+    assert await auth.get_token() == "token-1"
+    assert api.count("POST", "/mcp/token") == 1
+
+
+async def test_failed_exchange_is_shared_and_retried_by_next_caller(api):
+    api.route("POST", "/mcp/token", lambda request: httpx.Response(500, json={"detail": "down"}))
+    auth = _client(background_renewal=False)
+
+    results = await asyncio.gather(*(auth.refresh_token() for _ in range(10)), return_exceptions=True)
+
+    assert api.count("POST", "/mcp/token") == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    api.route("POST", "/mcp/token", lambda request: httpx.Response(200, json={"access_token": "ok", "expires_in": 60}))
+    assert await auth.refresh_token() == "ok"
+    assert api.count("POST", "/mcp/token") == 2
+
+
+async def test_cancelled_caller_does_not_abort_shared_exchange(api):
+    async def slow_token(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"access_token": "shared", "expires_in": 3600})
+
+    api.route("POST", "/mcp/token", slow_token)
+    auth = _client(background_renewal=False)
+
+    cancelled = asyncio.create_task(auth.refresh_token())
+    waiting = asyncio.create_task(auth.refresh_token())
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+
+    assert await waiting == "shared"
+    assert api.count("POST", "/mcp/token") == 1
+
+
+async def test_background_renewal_refreshes_before_expiry(api, settings, monkeypatch):
+    exchanged_at = []
+
+    def short_lived_token(request: httpx.Request) -> httpx.Response:
+        exchanged_at.append(datetime.now())
+        return httpx.Response(200, json={"access_token": f"token-{len(exchanged_at)}", "expires_in": 1})
+
+    api.route("POST", "/mcp/token", short_lived_token)
+    monkeypatch.setattr(settings, "TOKEN_RENEWAL_MARGIN", 0.8)
+    auth = _client(background_renewal=True)
+    try:
+        await auth.get_token()
+        first_expiry = auth.token_cache.expires_at
+
+        for _ in range(40):
+            if len(exchanged_at) >= 2:
+                break
+            await asyncio.sleep(0.05)
+
+        assert len(exchanged_at) >= 2
+        # Renewed within the margin but never earlier than half the lifetime
+        assert exchanged_at[1] < first_expiry
+        assert (exchanged_at[1] - exchanged_at[0]).total_seconds() >= 0.45
+        assert auth.token_cache.expires_at > first_expiry
+    finally:
+        auth.stop()
+
+
+async def test_background_renewal_skips_token_refreshed_meanwhile(api, settings, monkeypatch):
+    api.route("POST", "/mcp/token", lambda request: httpx.Response(200, json={"access_token": "t", "expires_in": 1}))
+    monkeypatch.setattr(settings, "TOKEN_RENEWAL_MARGIN", 0.5)
+    auth = _client(background_renewal=True)
+    try:
+        await auth.get_token()
+        await asyncio.sleep(0.2)
+        # A request refreshed the token before the renewal was due
+        await auth.refresh_token()
+        await asyncio.sleep(0.4)
+        # The renewal scheduled for the first token saw the new expiry and rescheduled
+        assert api.count("POST", "/mcp/token") == 2
+    finally:
+        auth.stop()
@@ -0,0 +1,61 @@
+"""Batched tool calls are validated and recorded like direct calls."""
+import httpx
+import pytest
+
+from huuh_mcp.huuh.metrics import metrics
+from huuh_mcp.tools.batch import batch
+
+
+@pytest.fixture(autouse=True)
+def batch_settings(settings, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_MODE", "optimistic")
+    monkeypatch.setattr(settings, "RETRIEVAL_CACHE_ENABLED", False)
+
+
+def _count(name: str, **labels: str) -> float:
+    wanted = tuple(sorted(labels.items()))
+    if name.endswith("_seconds"):
+        return sum(histogram.count for key, histogram in metrics.histograms(name).items() if key == wanted)
+    return sum(value for key, value in metrics.counters(name).items() if key == wanted)
+
+
+@pytest.mark.parametrize("arguments, problem", [
+    ({"query": "q", "course_id": "c", "relevant_modules": "abc"}, "relevant_modules"),
+    ({"query": "q", "course_id": "c", "max_chars": "abc"}, "max_chars"),
+    ({"query": "q"}, "course_id"),
+    ({"query": "q", "course_id": "c", "top_k": 3}, "top_k"),
+])
+async def test_invalid_arguments_are_per_operation_errors(api, arguments, problem):
+    api.route("GET", "/mcp/information", lambda request: httpx.Response(200, json={"documents": []}))
+    errors = _count("huuh_tool_errors_total", tool="retrieve_information", type="ValidationError")
+
+    result = await batch([
+        {"tool": "retrieve_information", "arguments": arguments},
+        {"tool": "retrieve_information", "arguments": {"query": "q", "course_id": "c"}},
+    ])
+
+    invalid, valid = result["results"]
+    assert invalid["error"].startswith("Invalid arguments") and problem in invalid["error"]
+    assert "result" in valid
+    assert api.count("GET", "/mcp/information") == 1
+    assert _count("huuh_tool_errors_total", tool="retrieve_information", type="ValidationError") == errors + 1
+
+
+async def test_arguments_are_coerced_like_a_direct_call(api):
+    seen = []
+
+    def information(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.params.get("relevant_modules"))
+        return httpx.Response(200, json={"documents": [{"page_content": "lecture notes"}]})
+
+    api.route("GET", "/mcp/information", information)
+    calls = _count("huuh_tool_duration_seconds", tool="retrieve_information")
+
+    result = await batch([{
+        "tool": "retrieve_information",
+        "arguments": {"query": "q", "course_id": "c", "relevant_modules": ["2", "1"], "max_chars": "5"},
+    }])
+
+    assert result["results"][0]["result"]["content"] == ["lectu"]
+    assert seen == ["1,2"]
+    assert _count("huuh_tool_duration_seconds", tool="retrieve_information") == calls + 1
@@ -0,0 +1,84 @@
+"""Writes invalidating cached responses that are being fetched at the same time."""
+import asyncio
+
+import httpx
+
+from huuh_mcp.huuh.cache import request_key
+
+PERSONA = "/mcp/get_persona"
+
+
+class Persona:
+    """Persona endpoint whose reads can be held back, answering with the current version."""
+
+    def __init__(self):
+        self.version = 1
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def read(self, request: httpx.Request) -> httpx.Response:
+        version = self.version
+        await self.release.wait()
+        return httpx.Response(200, json={"version": version})
+
+    def write(self, request: httpx.Request) -> httpx.Response:
+        self.version += 1
+        return httpx.Response(200, json={"status": "ok"})
+
+
+def _persona_api(api) -> Persona:
+    persona = Persona()
+    api.route("GET", PERSONA, persona.read)
+    api.route("POST", "/mcp/refresh_persona", persona.write)
+    return persona
+
+
+async def test_read_overtaken_by_write_is_not_cached(api, huuh_client):
+    persona = _persona_api(api)
+    persona.release.clear()
+    read = asyncio.create_task(huuh_client.request("GET", PERSONA))
+    while not api.count("GET", PERSONA):
+        await asyncio.sleep(0)
+
+    await huuh_client.request("POST", "/mcp/refresh_persona", json={})
+    persona.release.set()
+
+    assert await read == {"version": 1}
+    assert await huuh_client.request("GET", PERSONA) == {"version": 2}
+    assert api.count("GET", PERSONA) == 2
+
+
+async def test_read_after_write_does_not_join_earlier_fetch(api, huuh_client):
+    persona = _persona_api(api)
+    persona.release.clear()
+    before = asyncio.create_task(huuh_client.request("GET", PERSONA))
+    while not api.count("GET", PERSONA):
+        await asyncio.sleep(0)
+
+    await huuh_client.request("POST", "/mcp/refresh_persona", json={})
+    after = asyncio.create_task(huuh_client.request("GET", PERSONA))
+    await asyncio.sleep(0.01)
+    persona.release.set()
+
+    assert await before == {"version": 1}
+    assert await after == {"version": 2}
+    assert await huuh_client.request("GET", PERSONA) == {"version": 2}
+    assert api.count("GET", PERSONA) == 2
+
+
+async def test_stale_refresh_overtaken_by_write_is_not_cached(api, huuh_client):
+    persona = _persona_api(api)
+    key = request_key("GET", PERSONA, None)
+    huuh_client.cache.set(key, {"version": 0}, -1.0, tag=PERSONA)
+
+    persona.release.clear()
+    refresh = asyncio.create_task(huuh_client._refresh(key, "GET", PERSONA, None, None, None, 300.0))
+    while not api.count("GET", PERSONA):
+        await asyncio.sleep(0)
+
+    await huuh_client.request("POST", "/mcp/refresh_persona", json={})
+    persona.release.set()
+    await refresh
+
+    assert huuh_client.cache.get_stale(key) is None
+    assert await huuh_client.request("GET", PERSONA) == {"version": 2}
@@ -0,0 +1,66 @@
+"""Federated retrieval: per-base deadlines start when a base is searched, not while it queues."""
+import asyncio
+
+import httpx
+import pytest
+
+from huuh_mcp.tools.information import retrieve_information_from_all_bases
+
+
+def _bases(api, count: int, latency) -> None:
+    """Serve count courses whose searches take latency(course_id) seconds."""
+    courses = [{"course_id": f"course-{index}"} for index in range(count)]
+    api.route("GET", "/mcp/user_options", lambda request: httpx.Response(200, json={"courses": courses}))
+
+    async def information(request: httpx.Request) -> httpx.Response:
+        course_id = request.url.params["course_id"]
+        await asyncio.sleep(latency(course_id))
+        return httpx.Response(200, json={"documents": [{"page_content": f"from {course_id}"}]})
+
+    api.route("GET", "/mcp/information", information)
+
+
+@pytest.fixture(autouse=True)
+def federated_settings(settings, monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "RETRIEVAL_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "FEDERATED_MAX_CONCURRENCY", 2)
+
+
+async def test_queued_bases_are_not_timed_out(api, settings, monkeypatch):
+    # Four waves of 0.1s each take longer than one base's deadline
+    monkeypatch.setattr(settings, "FEDERATED_BASE_TIMEOUT", 0.3)
+    monkeypatch.setattr(settings, "FEDERATED_TOTAL_TIMEOUT", 5.0)
+    _bases(api, 8, lambda course_id: 0.1)
+
+    result = await retrieve_information_from_all_bases("queued bases", top_k=20)
+
+    assert result["bases_searched"] == 8
+    assert result["timed_out"] == []
+    assert result["skipped"] == []
+    assert len(result["content"]) == 8
+
+
+async def test_slow_base_times_out_alone(api, settings, monkeypatch):
+    monkeypatch.setattr(settings, "FEDERATED_BASE_TIMEOUT", 0.2)
+    monkeypatch.setattr(settings, "FEDERATED_TOTAL_TIMEOUT", 5.0)
+    _bases(api, 4, lambda course_id: 1.0 if course_id == "course-0" else 0.05)
+
+    result = await retrieve_information_from_all_bases("slow base", top_k=20)
+
+    assert result["timed_out"] == ["course-0"]
+    assert result["skipped"] == []
+    assert result["bases_searched"] == 3
+
+
+async def test_overall_deadline_skips_bases_not_started(api, settings, monkeypatch):
+    monkeypatch.setattr(settings, "FEDERATED_BASE_TIMEOUT", 5.0)
+    monkeypatch.setattr(settings, "FEDERATED_TOTAL_TIMEOUT", 0.3)
+    # First wave finishes at 0.2s, the second is cut off while running, the third never starts
+    _bases(api, 6, lambda course_id: 0.2)
+
+    result = await retrieve_information_from_all_bases("overall deadline", top_k=20)
+
+    assert result["bases_searched"] == 2
+    assert sorted(result["timed_out"]) == ["course-2", "course-3"]
+    assert sorted(result["skipped"]) == ["course-4", "course-5"]
@@ -0,0 +1,45 @@
+"""Hedged requests: which copy wins the race and which latencies are sampled."""
+import asyncio
+
+import pytest
+
+from huuh_mcp.huuh.hedging import Hedger
+
+PATH = "/courses/search"
+
+
+@pytest.fixture
+def hedger(settings, monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(settings, "HEDGE_MIN_DELAY", 0.01)
+    monkeypatch.setattr(settings, "HEDGE_BUDGET", 1.0)
+    hedger = Hedger()
+    hedger._tracker(PATH).record(0.01)
+    return hedger
+
+
+def _succeeded(status: int) -> bool:
+    return status < 500
+
+
+async def test_fast_server_error_does_not_win_the_race(hedger):
+    results = iter([(0.1, 200), (0.0, 503)])
+
+    async def attempt() -> int:
+        delay, status = next(results)
+        await asyncio.sleep(delay)
+        return status
+
+    assert await hedger.run(PATH, attempt, _succeeded) == 200
+    assert hedger.hedged == 1
+    assert hedger.hedge_wins == 0
+
+
+async def test_server_error_latencies_are_not_sampled(hedger):
+    async def attempt() -> int:
+        return 503
+
+    for _ in range(5):
+        assert await hedger.run(PATH, attempt, _succeeded) == 503
+    assert len(hedger._tracker(PATH)) == 1
+    assert hedger.hedge_delay(PATH) == 0.01
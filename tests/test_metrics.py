@@ -0,0 +1,28 @@
+"""Metric collectors that fail are logged and counted instead of silently dropped."""
+import logging
+
+from huuh_mcp.huuh.metrics import MetricsRegistry
+
+
+def test_failing_collector_is_logged_and_counted(caplog):
+    registry = MetricsRegistry()
+
+    def broken():
+        yield "huuh_partial", "gauge", {}, 1
+        raise RuntimeError("collector bug")
+
+    def healthy():
+        yield "huuh_healthy", "gauge", {}, 2
+
+    registry.add_collector(broken)
+    registry.add_collector(healthy)
+
+    with caplog.at_level(logging.DEBUG, logger="huuh_mcp.huuh.metrics"):
+        rendered = registry.render_prometheus()
+
+    assert "huuh_healthy 2" in rendered
+    assert "huuh_partial 1" in rendered
+    assert 'huuh_collector_errors_total{collector="test_failing_collector_is_logged_and_counted.<locals>.broken"} 1' \
+        in rendered
+    [record] = [record for record in caplog.records if record.exc_info]
+    assert "collector bug" in str(record.exc_info[1])
@@ -0,0 +1,146 @@
+"""Persistent cache: disk access off the event loop, invalidation, expiry index, caps and revalidation."""
+import sqlite3
+import threading
+import time
+
+import httpx
+import pytest
+
+from huuh_mcp.huuh.auth import AuthClient, TokenCache
+from huuh_mcp.huuh.client import HuuhClient
+from huuh_mcp.huuh.persistence import PersistentCache
+
+
+def _key(index: int):
+    return ("GET", "/mcp/user_options", (("page", str(index)),))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PersistentCache(path=tmp_path / "cache.sqlite3", max_entries=1000, max_bytes=10_000_000)
+    yield cache
+    cache.close()
+
+
+def test_set_is_written_in_background(cache):
+    cache.set("ns", _key(1), {"value": 1}, ttl=60, tag="/mcp/user_options")
+    cache.flush()
+
+    value, remaining = cache.get("ns", _key(1))
+    assert value == {"value": 1}
+    assert 0 < remaining <= 60
+    assert cache.get("other", _key(1)) is None
+
+
+def test_expires_at_is_indexed(cache):
+    cache.set("ns", _key(1), {}, ttl=60)
+    cache.flush()
+
+    indexes = [row[1] for row in cache._execute("PRAGMA index_list(responses)")]
+    assert "responses_expires_at" in indexes
+
+
+def test_invalidated_entries_are_hidden_before_the_delete_is_written(cache):
+    cache.set("ns", _key(1), {"value": 1}, ttl=60, tag="/mcp/user_options")
+    cache.flush()
+
+    # Hold the writer back so the delete stays queued
+    blocker = sqlite3.connect(cache.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        cache.invalidate("ns", "/mcp/user_options")
+        assert cache.get("ns", _key(1)) is None
+    finally:
+        blocker.execute("COMMIT")
+        blocker.close()
+
+    cache.flush()
+    assert cache.get("ns", _key(1)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_locked_database_does_not_block_callers(cache):
+    cache.set("ns", _key(0), {"value": 0}, ttl=60)
+    cache.flush()
+
+    blocker = sqlite3.connect(cache.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        for index in range(1, 50):
+            cache.set("ns", _key(index), {"value": index}, ttl=60)
+            cache.get("ns", _key(index - 1))
+        assert time.perf_counter() - started < 0.1
+    finally:
+        blocker.execute("COMMIT")
+        blocker.close()
+
+    # The writer waited for the lock and applied everything afterwards
+    cache.flush()
+    assert cache.stats()["entries"] == 50
+
+
+def test_caps_evict_soonest_expiring_entries(tmp_path):
+    cache = PersistentCache(path=tmp_path / "cache.sqlite3", max_entries=10, max_bytes=10_000_000)
+    try:
+        for index in range(100):
+            cache.set("ns", _key(index), {"value": index}, ttl=60 + index)
+        cache.flush()
+
+        remaining = sorted(int(key[2][0][1]) for key, _ in cache.entries("ns"))
+        assert remaining == list(range(90, 100))
+    finally:
+        cache.close()
+
+
+def test_closed_cache_writes_out_queued_entries(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = PersistentCache(path=path)
+    cache.set("ns", _key(1), {"value": 1}, ttl=60)
+    cache.close()
+
+    reopened = PersistentCache(path=path)
+    try:
+        assert reopened.get("ns", _key(1))[0] == {"value": 1}
+    finally:
+        reopened.close()
+
+
+async def test_load_reads_off_the_event_loop(cache):
+    cache.set("ns", _key(1), {"value": 1}, ttl=60)
+    cache.flush()
+    threads = []
+    get = cache.get
+    cache.get = lambda *args: threads.append(threading.current_thread().name) or get(*args)
+
+    value, _ = await cache.load("ns", _key(1))
+
+    assert value == {"value": 1}
+    assert threads == ["huuh-cache-reader_0"]
+
+
+async def test_startup_revalidates_only_recently_expired_entries(tmp_path, api, settings, monkeypatch):
+    monkeypatch.setattr(settings, "SWR_MAX_STALENESS", 600.0)
+    monkeypatch.setattr(settings, "SWR_ENDPOINTS", ["/mcp/user_options"])
+    persistent = PersistentCache(path=tmp_path / "cache.sqlite3")
+    client = HuuhClient(
+        auth=AuthClient(token_cache=TokenCache(persist=False), background_renewal=False),
+        persistent=persistent
+    )
+    api.route("GET", "/mcp/user_options", lambda request: httpx.Response(200, json={"page": request.url.params["page"]}))
+    # Fresh, stale by 10s, 100s and 300s, and expired beyond SWR_MAX_STALENESS
+    for index, ttl in enumerate((60, -10, -100, -300, -1000)):
+        persistent.set(client.namespace, _key(index), {"old": True}, ttl=ttl, tag="/mcp/user_options")
+    persistent.flush()
+
+    try:
+        assert await client.revalidate_persisted(limit=2) == 2
+        assert api.count("GET", "/mcp/user_options") == 2
+        assert client.cache.get(_key(1)) == {"page": "1"}
+        assert client.cache.get(_key(2)) == {"page": "2"}
+
+        assert await client.revalidate_persisted() == 1
+        assert client.cache.get(_key(3)) == {"page": "3"}
+        assert api.count("GET", "/mcp/user_options") == 3
+    finally:
+        persistent.close()
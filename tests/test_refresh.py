@@ -0,0 +1,51 @@
+"""Background refreshes run detached from the caller that scheduled them."""
+import asyncio
+import contextvars
+
+from huuh_mcp.huuh.refresh import RefreshScheduler
+from huuh_mcp.huuh.tracing import tracer
+
+caller: contextvars.ContextVar = contextvars.ContextVar("caller", default=None)
+
+
+async def test_refreshes_do_not_inherit_caller_context(settings, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracer, "end", lambda span, end_ns=None: None)
+    scheduler = RefreshScheduler(spacing=0, max_concurrency=2)
+    seen = []
+
+    async def refresh():
+        seen.append((caller.get(), tracer.current()))
+
+    for index in range(2):
+        caller.set(f"caller-{index}")
+        with tracer.root(f"call {index}"):
+            scheduler.schedule(index, refresh)
+        await asyncio.sleep(0.01)
+
+    try:
+        assert seen == [(None, None), (None, None)]
+    finally:
+        await scheduler.stop()
+
+
+async def test_stop_cancels_running_refreshes():
+    scheduler = RefreshScheduler(spacing=0, max_concurrency=2)
+    started = asyncio.Event()
+    cancelled = []
+
+    async def refresh():
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    scheduler.schedule("key", refresh)
+    await started.wait()
+    await scheduler.stop()
+
+    assert cancelled == [True]
+    assert scheduler.stats()["running"] == 0
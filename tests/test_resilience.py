@@ -0,0 +1,190 @@
+"""Retries and circuit breaking against an API that injects faults."""
+import asyncio
+import time
+from typing import Any, List
+
+import httpx
+import pytest
+
+from huuh_mcp.huuh import client as client_module
+from huuh_mcp.huuh.resilience import CircuitBreaker, resilience
+
+PATH = "/mcp/faulty"
+
+
+class Faults:
+    """Handler answering with scripted faults, then with success once the script runs out."""
+
+    def __init__(self, *script: Any):
+        self.script: List[Any] = list(script)
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if not self.script:
+            return httpx.Response(200, json={"ok": True})
+        fault = self.script.pop(0)
+        if isinstance(fault, type) and issubclass(fault, httpx.RequestError):
+            raise fault("injected", request=request)
+        if isinstance(fault, tuple):
+            status, headers = fault
+            return httpx.Response(status, headers=headers, json={"detail": "injected"})
+        return httpx.Response(fault, json={"detail": "injected"})
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(settings, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "RETRY_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(settings, "RETRY_BACKOFF_MAX", 2.0)
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", False)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_ENABLED", True)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 5)
+
+
+@pytest.mark.parametrize("fault", [503, 502, 429, httpx.ConnectError, httpx.ReadTimeout])
+async def test_get_is_retried_until_success(api, huuh_client, fault):
+    api.route("GET", PATH, Faults(fault, fault))
+
+    assert await huuh_client.request("GET", PATH) == {"ok": True}
+    assert api.count("GET", PATH) == 3
+    assert resilience.retries == 2
+
+
+async def test_get_gives_up_after_max_attempts(api, huuh_client):
+    api.route("GET", PATH, Faults(503, 503, 503, 503))
+
+    with pytest.raises(ValueError, match="injected"):
+        await huuh_client.request("GET", PATH)
+    assert api.count("GET", PATH) == 3
+
+
+@pytest.mark.parametrize("fault", [503, 429, httpx.ConnectError])
+async def test_post_is_not_retried(api, huuh_client, fault):
+    api.route("POST", PATH, Faults(fault))
+
+    with pytest.raises(ValueError):
+        await huuh_client.request("POST", PATH, json={"title": "x"})
+    assert api.count("POST", PATH) == 1
+    assert resilience.retries == 0
+
+
+async def test_client_errors_are_not_retried(api, huuh_client):
+    api.route("GET", PATH, Faults(404))
+
+    with pytest.raises(ValueError):
+        await huuh_client.request("GET", PATH)
+    assert api.count("GET", PATH) == 1
+
+
+async def test_retry_after_is_honoured(api, huuh_client):
+    api.route("GET", PATH, Faults((429, {"Retry-After": "1"})))
+
+    started = time.monotonic()
+    assert await huuh_client.request("GET", PATH) == {"ok": True}
+
+    assert time.monotonic() - started >= 1.0
+    assert api.count("GET", PATH) == 2
+
+
+async def test_retry_after_beyond_backoff_max_is_not_waited_for(api, huuh_client):
+    api.route("GET", PATH, Faults((503, {"Retry-After": "120"})))
+
+    started = time.monotonic()
+    with pytest.raises(ValueError):
+        await huuh_client.request("GET", PATH)
+
+    assert time.monotonic() - started < 1.0
+    assert api.count("GET", PATH) == 1
+
+
+async def test_circuit_opens_rejects_fast_half_opens_and_closes(api, huuh_client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_TIMEOUT", 0.2)
+    faults = Faults(503, httpx.ConnectError, 503)
+    api.route("GET", PATH, faults)
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await huuh_client.request("GET", PATH)
+    breaker = resilience.breaker(PATH)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Open: rejected without reaching the API
+    started = time.monotonic()
+    with pytest.raises(ValueError, match="temporarily unavailable"):
+        await huuh_client.request("GET", PATH)
+    assert time.monotonic() - started < 0.05
+    assert api.count("GET", PATH) == 3
+    assert breaker.rejected == 1
+
+    # After the reset timeout a single probe goes through and closes the circuit
+    await asyncio.sleep(0.25)
+    assert await huuh_client.request("GET", PATH) == {"ok": True}
+    assert api.count("GET", PATH) == 4
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_failed_half_open_probe_reopens_circuit(api, huuh_client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_TIMEOUT", 0.2)
+    api.route("GET", PATH, Faults(503, 503, 503))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await huuh_client.request("GET", PATH)
+    await asyncio.sleep(0.25)
+
+    with pytest.raises(ValueError, match="injected"):
+        await huuh_client.request("GET", PATH)
+    breaker = resilience.breaker(PATH)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(ValueError, match="temporarily unavailable"):
+        await huuh_client.request("GET", PATH)
+    assert api.count("GET", PATH) == 3
+
+
+async def test_throttling_does_not_open_circuit(api, huuh_client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    api.route("GET", PATH, Faults(429, 429, 429))
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await huuh_client.request("GET", PATH)
+
+    assert resilience.breaker(PATH).state == CircuitBreaker.CLOSED
+    assert api.count("GET", PATH) == 3
+
+
+async def test_retries_stop_once_circuit_opens(api, huuh_client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 5)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    api.route("GET", PATH, Faults(503, 503, 503, 503, 503))
+
+    with pytest.raises(ValueError, match="injected"):
+        await huuh_client.request("GET", PATH)
+
+    assert api.count("GET", PATH) == 2
+    assert resilience.retries == 1
+    assert resilience.breaker(PATH).state == CircuitBreaker.OPEN
+
+
+async def test_retry_is_not_sent_when_circuit_opened_during_backoff(api, huuh_client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 5)
+    monkeypatch.setattr(client_module, "backoff_delay", lambda attempt, retry_after=None: 0.05)
+    api.route("GET", PATH, Faults(503, 503, 503))
+
+    request = asyncio.create_task(huuh_client.request("GET", PATH))
+    while not resilience.retries:
+        await asyncio.sleep(0)
+    # Other requests open the circuit while this one backs off
+    breaker = resilience.breaker(PATH)
+    for _ in range(5):
+        breaker.record_failure()
+
+    with pytest.raises(ValueError, match="temporarily unavailable"):
+        await request
+    assert api.count("GET", PATH) == 1
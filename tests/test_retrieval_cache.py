@@ -0,0 +1,55 @@
+"""Retrieval cache consistency with contributions to the searched course."""
+import asyncio
+
+import httpx
+import pytest
+
+from huuh_mcp.huuh.client import get_api_client
+from huuh_mcp.tools.contribution import contribute
+from huuh_mcp.tools.information import fetch_content
+
+
+@pytest.fixture(autouse=True)
+def retrieval_settings(settings, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_MODE", "optimistic")
+    monkeypatch.setattr(settings, "RETRIEVAL_CACHE_ENABLED", True)
+    get_api_client().retrieval_cache.clear()
+    yield
+    get_api_client().retrieval_cache.clear()
+
+
+async def test_retrieval_overtaken_by_contribution_is_not_cached(api):
+    contributions = []
+    release = asyncio.Event()
+
+    async def information(request: httpx.Request) -> httpx.Response:
+        documents = [{"page_content": title} for title in ["lecture"] + contributions]
+        await release.wait()
+        return httpx.Response(200, json={"documents": documents})
+
+    def contribution(request: httpx.Request) -> httpx.Response:
+        contributions.append("new notes")
+        return httpx.Response(200, json={"status": "ok"})
+
+    api.route("GET", "/mcp/information", information)
+    api.route("POST", "/mcp/contribute", contribution)
+
+    retrieval = asyncio.create_task(fetch_content("notes", "course-1"))
+    while not api.count("GET", "/mcp/information"):
+        await asyncio.sleep(0)
+    result = await contribute("course-1", "1", "New notes", "new notes", None)
+    assert "error" not in result
+    release.set()
+
+    assert await retrieval == ["lecture"]
+    assert await fetch_content("notes", "course-1") == ["lecture", "new notes"]
+    assert api.count("GET", "/mcp/information") == 2
+
+
+async def test_retrieval_is_cached_without_contribution(api):
+    api.route("GET", "/mcp/information", lambda request: httpx.Response(200, json={"documents": []}))
+
+    await fetch_content("notes", "course-1")
+    await fetch_content("notes", "course-1")
+
+    assert api.count("GET", "/mcp/information") == 1
@@ -0,0 +1,102 @@
+"""Per-API-key clients for HTTP callers, and rejection of calls without a key."""
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import httpx
+import pytest
+from fastmcp.server.http import _current_http_request
+from starlette.requests import Request
+
+from huuh_mcp.huuh.client import get_api_client
+from huuh_mcp.huuh.tenants import TenantPool, current_client, tenant_pool
+
+
+@contextmanager
+def http_request(headers: Optional[Dict[str, str]] = None) -> Iterator[None]:
+    """Make tool calls in the block look like they came in over HTTP with the given headers."""
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/mcp",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    token = _current_http_request.set(Request(scope))
+    try:
+        yield
+    finally:
+        _current_http_request.reset(token)
+
+
+@pytest.fixture
+def accounts(api):
+    """Fake API issuing one token per API key and answering user options with the key's account."""
+    def token(request: httpx.Request) -> httpx.Response:
+        api_key = request.headers["Authorization"].removeprefix("Bearer ")
+        return httpx.Response(200, json={"access_token": f"token-for-{api_key}", "expires_in": 3600})
+
+    def user_options(request: httpx.Request) -> httpx.Response:
+        account = request.headers["Authorization"].removeprefix("Bearer token-for-")
+        return httpx.Response(200, json={"account": account})
+
+    api.route("POST", "/mcp/token", token)
+    api.route("GET", "/mcp/user_options", user_options)
+    return api
+
+
+@pytest.fixture(autouse=True)
+def empty_pool():
+    tenant_pool.clear()
+    yield
+    tenant_pool.clear()
+
+
+async def test_api_keys_get_isolated_clients_and_caches(accounts, settings):
+    with http_request({settings.TENANT_API_KEY_HEADER: "key-a"}):
+        client_a = current_client()
+    with http_request({settings.TENANT_API_KEY_HEADER: "key-b"}):
+        client_b = current_client()
+
+    assert client_a is not client_b
+    assert client_a.cache is not client_b.cache
+    assert client_a.namespace != client_b.namespace
+
+    assert await client_a.request("GET", "/mcp/user_options") == {"account": "key-a"}
+    assert await client_b.request("GET", "/mcp/user_options") == {"account": "key-b"}
+    assert await client_a.request("GET", "/mcp/user_options") == {"account": "key-a"}
+    assert accounts.count("GET", "/mcp/user_options") == 2
+
+    with http_request({settings.TENANT_API_KEY_HEADER: "key-a"}):
+        assert current_client() is client_a
+
+
+def test_pool_evicts_least_recently_used_tenant():
+    pool = TenantPool(max_tenants=2)
+    client_a = pool.get("key-a")
+    client_b = pool.get("key-b")
+    assert pool.get("key-a") is client_a
+
+    pool.get("key-c")
+
+    assert pool.stats() == {"tenants": 2, "max_tenants": 2}
+    assert pool.get("key-a") is client_a
+    assert pool.get("key-b") is not client_b
+
+
+def test_http_call_without_api_key_is_rejected(settings, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_ALLOW_DEFAULT_KEY", False)
+    with http_request(), pytest.raises(ValueError, match=settings.TENANT_API_KEY_HEADER):
+        current_client()
+    with http_request({settings.TENANT_API_KEY_HEADER: "  "}), pytest.raises(ValueError):
+        current_client()
+
+
+def test_http_call_without_api_key_uses_server_key_when_allowed(settings, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_ALLOW_DEFAULT_KEY", True)
+    with http_request():
+        assert current_client() is get_api_client()
+    assert tenant_pool.stats()["tenants"] == 0
+
+
+def test_stdio_call_uses_server_key(settings, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_ALLOW_DEFAULT_KEY", False)
+    assert current_client() is get_api_client()
@@ -0,0 +1,86 @@
+"""Document compaction: normalization, duplicate removal and size budgets."""
+import random
+import time
+
+import pytest
+
+from huuh_mcp.utils.text import CHARS_PER_TOKEN, compact_documents, normalize_whitespace
+
+
+def _document(rng: random.Random, words: int = 300) -> str:
+    vocabulary = [f"word{index}" for index in range(2000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def test_whitespace_is_normalized():
+    assert normalize_whitespace("  lecture\n\tnotes  on\r\nproofs ") == "lecture notes on proofs"
+    kept, report = compact_documents(["a  b\n c"])
+    assert kept == ["a b c"]
+    assert report == {"duplicates": 0, "documents_dropped": 0, "characters_dropped": 0, "truncated": False}
+
+
+def test_exact_duplicates_are_removed_after_normalization():
+    kept, report = compact_documents(["first  document", "second", "first document\n"], dedupe=True)
+
+    assert kept == ["first document", "second"]
+    assert report["duplicates"] == 1
+
+
+def test_near_duplicates_are_removed_keeping_the_higher_ranked():
+    rng = random.Random(1)
+    original = _document(rng)
+    # One word changed out of 300 leaves almost all 3-shingles shared
+    words = original.split()
+    words[150] = "changed"
+    near_duplicate = " ".join(words)
+    unrelated = _document(rng)
+
+    kept, report = compact_documents([original, near_duplicate, unrelated], dedupe=True)
+
+    assert kept == [original, unrelated]
+    assert report["duplicates"] == 1
+
+
+def test_duplicates_are_kept_without_dedupe():
+    kept, report = compact_documents(["same", "same"])
+
+    assert kept == ["same", "same"]
+    assert report["duplicates"] == 0
+
+
+def test_max_chars_truncates_last_kept_and_drops_the_rest():
+    kept, report = compact_documents(["a" * 60, "b" * 60, "c" * 60], max_chars=100)
+
+    assert kept == ["a" * 60, "b" * 40]
+    assert report == {"duplicates": 0, "documents_dropped": 1, "characters_dropped": 80, "truncated": True}
+
+
+@pytest.mark.parametrize("max_chars, max_tokens, budget", [
+    (None, 10, 10 * CHARS_PER_TOKEN),
+    (30, 10, 30),
+    (100, 5, 5 * CHARS_PER_TOKEN),
+])
+def test_tighter_of_char_and_token_budgets_applies(max_chars, max_tokens, budget):
+    kept, report = compact_documents(["x" * 200], max_chars=max_chars, max_tokens=max_tokens)
+
+    assert kept == ["x" * budget]
+    assert report["characters_dropped"] == 200 - budget
+
+
+def test_zero_budget_drops_everything():
+    kept, report = compact_documents(["abc", "def"], max_chars=0)
+
+    assert kept == []
+    assert report == {"duplicates": 0, "documents_dropped": 2, "characters_dropped": 6, "truncated": False}
+
+
+def test_compaction_stays_well_under_a_millisecond_per_document():
+    rng = random.Random(2)
+    documents = [_document(rng) for _ in range(200)]
+
+    started = time.perf_counter()
+    compact_documents(documents, dedupe=True, max_tokens=100_000)
+    per_document = (time.perf_counter() - started) / len(documents)
+
+    # About 0.3 ms per 300-word document when measured, the bound leaves room for slow machines
+    assert per_document < 0.001
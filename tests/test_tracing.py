@@ -0,0 +1,23 @@
+"""Spans recorded for API requests."""
+from typing import List
+
+import httpx
+
+from huuh_mcp.huuh.tracing import KIND_CLIENT, Span, tracer
+
+
+async def test_request_span_omits_query_string(api, huuh_client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 1.0)
+    ended: List[Span] = []
+    monkeypatch.setattr(tracer, "end", lambda span, end_ns=None: ended.append(span))
+    api.route("GET", "/mcp/information", lambda request: httpx.Response(200, json={"documents": []}))
+
+    with tracer.root("tool"):
+        await huuh_client.request("GET", "/mcp/information?scope=private", params={"query": "my secret question"})
+
+    [span] = [span for span in ended if span.kind == KIND_CLIENT]
+    assert span.attributes["url.path"] == "/mcp/information"
+    assert span.attributes["server.address"] == "huuh.test"
+    assert "url.full" not in span.attributes
+    assert "secret" not in repr(span.to_otlp()) and "private" not in repr(span.to_otlp())
@@ -0,0 +1,101 @@
+"""Connection pool usage counted around the shared client's transport, and proxy selection."""
+import asyncio
+
+import httpx
+import pytest
+
+from huuh_mcp.huuh import transport
+from huuh_mcp.huuh.transport import CountingTransport, _environment_proxy, pool_stats
+
+
+class Pool:
+    """Handler that holds requests until a connection is free, then until they are released."""
+
+    def __init__(self, connections: int):
+        self.connections = asyncio.Semaphore(connections)
+        self.release = asyncio.Event()
+
+    async def body(self):
+        yield b"x" * 1024
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        async with self.connections:
+            # httpcore reports the first step on a connection through the trace extension
+            await request.extensions["trace"]("connection.connect_tcp.started", {})
+            await self.release.wait()
+        # Streamed like a real connection's body, rather than read up front
+        return httpx.Response(200, content=self.body())
+
+
+@pytest.fixture
+def counter(monkeypatch):
+    counter = transport.RequestCounter()
+    monkeypatch.setattr(transport, "request_counter", counter)
+    return counter
+
+
+def _client(handler, counter) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=CountingTransport(httpx.MockTransport(handler), counter))
+
+
+async def test_requests_without_a_connection_are_waiting(counter):
+    pool = Pool(connections=2)
+    client = _client(pool, counter)
+    requests = [asyncio.create_task(client.get("http://huuh.test/")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    stats = pool_stats()
+    assert (stats["requests"], stats["requests_waiting"]) == (3, 1)
+
+    pool.release.set()
+    await asyncio.gather(*requests)
+    assert (pool_stats()["requests"], pool_stats()["requests_waiting"]) == (0, 0)
+
+
+async def test_existing_trace_hook_still_receives_events(counter):
+    pool = Pool(connections=1)
+    pool.release.set()
+    events = []
+
+    async def hook(event, info):
+        events.append(event)
+
+    await _client(pool, counter).get("http://huuh.test/", extensions={"trace": hook})
+    assert events == ["connection.connect_tcp.started"]
+
+
+async def test_streamed_response_counts_until_closed(counter):
+    pool = Pool(connections=1)
+    pool.release.set()
+    async with _client(pool, counter).stream("GET", "http://huuh.test/") as response:
+        assert pool_stats()["requests"] == 1
+        async for _ in response.aiter_bytes():
+            pass
+    assert pool_stats()["requests"] == 0
+
+
+async def test_failed_request_is_released(counter):
+    def _fail(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("refused", request=request)
+
+    with pytest.raises(httpx.ConnectError):
+        await _client(_fail, counter).get("http://huuh.test/")
+    assert (pool_stats()["requests"], pool_stats()["requests_waiting"]) == (0, 0)
+
+
+@pytest.mark.parametrize("environment, url, proxy", [
+    ({"HTTPS_PROXY": "http://proxy:3128"}, "https://api.huuh.test", "http://proxy:3128"),
+    ({"HTTPS_PROXY": "proxy:3128"}, "https://api.huuh.test", "http://proxy:3128"),
+    ({"HTTPS_PROXY": "http://proxy:3128"}, "http://api.huuh.test", None),
+    ({"ALL_PROXY": "socks5://proxy:1080"}, "http://api.huuh.test", "socks5://proxy:1080"),
+    ({"HTTPS_PROXY": "http://proxy:3128", "NO_PROXY": "huuh.test"}, "https://api.huuh.test", None),
+    ({}, "https://api.huuh.test", None),
+])
+def test_environment_proxy_of_api_host(monkeypatch, environment, url, proxy):
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "NO_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(name.lower(), raising=False)
+    for name, value in environment.items():
+        monkeypatch.setenv(name, value)
+
+    assert _environment_proxy(url) == proxy